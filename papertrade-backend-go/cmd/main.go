@@ -31,6 +31,7 @@ func main() {
 	{
 		v1.GET("/stock/data", handler.GetStockData)
 		v1.GET("/sector/data", handler.GetSectorData)
+		v1.POST("/batch/range", handler.GetBatchRange)
 
 		// Options endpoints
 		v1.GET("/options/contracts", handler.GetOptionContracts)
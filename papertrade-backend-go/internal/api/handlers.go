@@ -1,6 +1,7 @@
 package api
 
 import (
+	"encoding/json"
 	"net/http"
 	"time"
 
@@ -119,6 +120,97 @@ func (h *Handler) GetSectorData(c *gin.Context) {
 	})
 }
 
+const (
+	// maxBatchSymbols bounds the symbols of one batch range request
+	maxBatchSymbols = 100
+	// batchWorkers is the number of symbols fetched concurrently per request
+	batchWorkers = 8
+)
+
+// GetBatchRange handles POST /api/v1/batch/range
+// The response is newline-delimited JSON, streamed as symbols complete: one
+// line per symbol-day record, a {"symbol", "error"} line per failed symbol
+// and a final {"status": "complete", ...} summary line.
+func (h *Handler) GetBatchRange(c *gin.Context) {
+	var req domain.BatchRangeRequest
+	if err := c.ShouldBindJSON(&req); err != nil {
+		c.JSON(http.StatusBadRequest, domain.ErrorResponse{
+			Status:    "error",
+			Code:      "INVALID_REQUEST",
+			Message:   err.Error(),
+			Details:   make(map[string]interface{}),
+			Timestamp: time.Now(),
+		})
+		return
+	}
+
+	if len(req.Symbols) == 0 || len(req.Symbols) > maxBatchSymbols || req.FromDate == "" || req.ToDate == "" {
+		c.JSON(http.StatusBadRequest, domain.ErrorResponse{
+			Status:    "error",
+			Code:      "MISSING_PARAMETERS",
+			Message:   "symbols (1-100), from_date and to_date are required",
+			Details:   map[string]interface{}{"max_symbols": maxBatchSymbols},
+			Timestamp: time.Now(),
+		})
+		return
+	}
+
+	from, fromErr := time.Parse("2006-01-02", req.FromDate)
+	to, toErr := time.Parse("2006-01-02", req.ToDate)
+	if fromErr != nil || toErr != nil || to.Before(from) {
+		c.JSON(http.StatusBadRequest, domain.ErrorResponse{
+			Status:    "error",
+			Code:      "INVALID_DATE_RANGE",
+			Message:   "from_date and to_date must be YYYY-MM-DD with from_date <= to_date",
+			Details:   make(map[string]interface{}),
+			Timestamp: time.Now(),
+		})
+		return
+	}
+
+	kind := req.Type
+	if kind == "" {
+		kind = "stock"
+	}
+	if kind != "stock" && kind != "sector" {
+		c.JSON(http.StatusBadRequest, domain.ErrorResponse{
+			Status:    "error",
+			Code:      "INVALID_TYPE",
+			Message:   "type must be stock or sector",
+			Details:   make(map[string]interface{}),
+			Timestamp: time.Now(),
+		})
+		return
+	}
+
+	ctx := c.Request.Context()
+	c.Header("Content-Type", "application/x-ndjson")
+	c.Status(http.StatusOK)
+	encoder := json.NewEncoder(c.Writer)
+	summary := domain.BatchSummary{Status: "complete"}
+
+	for result := range h.dataService.FetchRange(ctx, kind, req.Symbols, req.FromDate, req.ToDate, req.Timewise, batchWorkers) {
+		summary.Symbols++
+		if result.Err != nil {
+			summary.Failed++
+			_ = encoder.Encode(domain.BatchError{Symbol: result.Symbol, Error: result.Err.Error()})
+		} else {
+			for _, record := range result.Records {
+				_ = encoder.Encode(record)
+			}
+			summary.Records += len(result.Records)
+		}
+		c.Writer.Flush()
+	}
+
+	// A cancelled request gets no summary, so the client sees it as truncated
+	if ctx.Err() != nil {
+		return
+	}
+	_ = encoder.Encode(summary)
+	c.Writer.Flush()
+}
+
 // HealthCheck handles GET /health
 func (h *Handler) HealthCheck(c *gin.Context) {
 	c.JSON(http.StatusOK, gin.H{
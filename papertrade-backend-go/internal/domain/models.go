@@ -56,6 +56,29 @@ type OptionCandles struct {
 	Candles  []TimewiseData `json:"candles"`
 }
 
+// BatchRangeRequest is the body of POST /api/v1/batch/range
+type BatchRangeRequest struct {
+	Symbols  []string `json:"symbols"`
+	FromDate string   `json:"from_date"` // YYYY-MM-DD
+	ToDate   string   `json:"to_date"`   // YYYY-MM-DD
+	Type     string   `json:"type"`      // "stock" (default) or "sector"
+	Timewise bool     `json:"timewise"`
+}
+
+// BatchError is a batch range line for a symbol that could not be fetched
+type BatchError struct {
+	Symbol string `json:"symbol"`
+	Error  string `json:"error"`
+}
+
+// BatchSummary is the last line of a complete batch range response
+type BatchSummary struct {
+	Status  string `json:"status"`
+	Symbols int    `json:"symbols"`
+	Records int    `json:"records"`
+	Failed  int    `json:"failed"`
+}
+
 // ErrorResponse represents API error response
 type ErrorResponse struct {
 	Status    string                 `json:"status"`
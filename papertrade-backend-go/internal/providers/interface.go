@@ -6,4 +6,8 @@ import "github.com/papertrade/backend-go/internal/domain"
 type StockDataProvider interface {
 	GetStockData(symbol, date string, timewise bool) (*domain.StockData, error)
 	GetSectorData(symbol, date string, timewise bool) (*domain.SectorData, error)
+
+	// Range methods return one record per trading day in [fromDate, toDate], oldest first
+	GetStockRange(symbol, fromDate, toDate string, timewise bool) ([]*domain.StockData, error)
+	GetSectorRange(symbol, fromDate, toDate string, timewise bool) ([]*domain.SectorData, error)
 }
@@ -81,6 +81,62 @@ func (p *RandomProvider) GetSectorData(symbol, date string, timewise bool) (*dom
 	return data, nil
 }
 
+// GetStockRange generates one record per weekday in [fromDate, toDate]
+func (p *RandomProvider) GetStockRange(symbol, fromDate, toDate string, timewise bool) ([]*domain.StockData, error) {
+	days, err := weekdays(fromDate, toDate)
+	if err != nil {
+		return nil, err
+	}
+
+	var records []*domain.StockData
+	for _, day := range days {
+		data, err := p.GetStockData(symbol, day, timewise)
+		if err != nil {
+			return nil, err
+		}
+		records = append(records, data)
+	}
+	return records, nil
+}
+
+// GetSectorRange generates one record per weekday in [fromDate, toDate]
+func (p *RandomProvider) GetSectorRange(symbol, fromDate, toDate string, timewise bool) ([]*domain.SectorData, error) {
+	days, err := weekdays(fromDate, toDate)
+	if err != nil {
+		return nil, err
+	}
+
+	var records []*domain.SectorData
+	for _, day := range days {
+		data, err := p.GetSectorData(symbol, day, timewise)
+		if err != nil {
+			return nil, err
+		}
+		records = append(records, data)
+	}
+	return records, nil
+}
+
+// weekdays lists the Monday-Friday dates (YYYY-MM-DD) in [fromDate, toDate]
+func weekdays(fromDate, toDate string) ([]string, error) {
+	from, err := time.Parse("2006-01-02", fromDate)
+	if err != nil {
+		return nil, err
+	}
+	to, err := time.Parse("2006-01-02", toDate)
+	if err != nil {
+		return nil, err
+	}
+
+	var days []string
+	for day := from; !day.After(to); day = day.AddDate(0, 0, 1) {
+		if day.Weekday() != time.Saturday && day.Weekday() != time.Sunday {
+			days = append(days, day.Format("2006-01-02"))
+		}
+	}
+	return days, nil
+}
+
 func max(a, b float64) float64 {
 	if a > b {
 		return a
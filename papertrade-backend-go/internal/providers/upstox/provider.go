@@ -166,6 +166,117 @@ func (p *UpstoxProvider) GetSectorData(symbol, date string, timewise bool) (*dom
 	return data, nil
 }
 
+// GetStockRange returns daily candles in [fromDate, toDate] with one historical-candle call
+// (plus monthly 5-minute calls when timewise)
+func (p *UpstoxProvider) GetStockRange(symbol, fromDate, toDate string, timewise bool) ([]*domain.StockData, error) {
+	key, ok := p.getInstrumentKey(symbol)
+	if !ok {
+		return nil, fmt.Errorf("symbol not found: %s", symbol)
+	}
+	return p.getRange(key, symbol, fromDate, toDate, timewise)
+}
+
+// GetSectorRange returns daily sector candles in [fromDate, toDate]
+func (p *UpstoxProvider) GetSectorRange(symbol, fromDate, toDate string, timewise bool) ([]*domain.SectorData, error) {
+	key, ok := p.getInstrumentKey(symbol)
+	if !ok {
+		return nil, fmt.Errorf("sector not found: %s", symbol)
+	}
+
+	days, err := p.getRange(key, symbol, fromDate, toDate, timewise)
+	if err != nil {
+		return nil, err
+	}
+	records := make([]*domain.SectorData, 0, len(days))
+	for _, day := range days {
+		sector := domain.SectorData(*day)
+		records = append(records, &sector)
+	}
+	return records, nil
+}
+
+// intradayWindowDays bounds the date span of one 5-minute candle request
+const intradayWindowDays = 30
+
+func (p *UpstoxProvider) getRange(key, symbol, fromDate, toDate string, timewise bool) ([]*domain.StockData, error) {
+	candles, err := p.fetchCandles(key, "day", fromDate, toDate)
+	if err != nil {
+		return nil, err
+	}
+
+	var intraday map[string][]domain.TimewiseData
+	if timewise {
+		intraday = p.fetchIntraday(key, fromDate, toDate)
+	}
+
+	// Upstox returns the newest candle first
+	records := make([]*domain.StockData, 0, len(candles))
+	for i := len(candles) - 1; i >= 0; i-- {
+		c := candles[i]
+		tsStr, _ := c[0].(string)
+		if len(tsStr) < 10 {
+			continue
+		}
+		date := tsStr[:10]
+		records = append(records, &domain.StockData{
+			Symbol:     symbol,
+			Date:       date,
+			OpenPrice:  toFloat(c[1]),
+			HighPrice:  toFloat(c[2]),
+			LowPrice:   toFloat(c[3]),
+			ClosePrice: toFloat(c[4]),
+			Volume:     toInt64(c[5]),
+			IV:         1.0,
+			Timewise:   intraday[date],
+			Extra:      make(map[string]interface{}),
+		})
+	}
+	return records, nil
+}
+
+// fetchIntraday returns 5-minute candles in [fromDate, toDate] by date, oldest first.
+// Windows that fail are skipped, as in GetStockData.
+func (p *UpstoxProvider) fetchIntraday(key, fromDate, toDate string) map[string][]domain.TimewiseData {
+	byDate := make(map[string][]domain.TimewiseData)
+	from, err := time.Parse("2006-01-02", fromDate)
+	if err != nil {
+		return byDate
+	}
+	to, err := time.Parse("2006-01-02", toDate)
+	if err != nil {
+		return byDate
+	}
+
+	for start := from; !start.After(to); start = start.AddDate(0, 0, intradayWindowDays) {
+		end := start.AddDate(0, 0, intradayWindowDays-1)
+		if end.After(to) {
+			end = to
+		}
+		intraday, err := p.fetchCandles(key, "5minute", start.Format("2006-01-02"), end.Format("2006-01-02"))
+		if err != nil {
+			continue
+		}
+		for i := len(intraday) - 1; i >= 0; i-- {
+			c := intraday[i]
+			tsStr, _ := c[0].(string)
+			t, err := time.Parse(time.RFC3339, tsStr)
+			if err != nil {
+				continue
+			}
+			date := t.Format("2006-01-02")
+			byDate[date] = append(byDate[date], domain.TimewiseData{
+				Time:       t.Format("15:04"),
+				OpenPrice:  toFloat(c[1]),
+				HighPrice:  toFloat(c[2]),
+				LowPrice:   toFloat(c[3]),
+				ClosePrice: toFloat(c[4]),
+				Volume:     toInt64(c[5]),
+			})
+		}
+	}
+	return byDate
+}
+
 func (p *UpstoxProvider) getInstrumentKey(symbol string) (string, bool) {
 	p.instrumentLock.RLock()
 	defer p.instrumentLock.RUnlock()
@@ -1,8 +1,10 @@
 package service
 
 import (
+	"context"
 	"fmt"
 	"os"
+	"sync"
 
 	"github.com/papertrade/backend-go/internal/domain"
 	"github.com/papertrade/backend-go/internal/providers"
@@ -37,3 +39,76 @@ func (s *DataService) GetStockData(symbol, date string, timewise bool) (*domain.
 func (s *DataService) GetSectorData(symbol, date string, timewise bool) (*domain.SectorData, error) {
 	return s.provider.GetSectorData(symbol, date, timewise)
 }
+
+// RangeResult is one symbol's daily records (or error) from FetchRange
+type RangeResult struct {
+	Symbol  string
+	Records []interface{}
+	Err     error
+}
+
+// FetchRange fetches the daily records of many symbols over a date range
+// with at most `workers` concurrent provider calls. Results arrive per
+// symbol in completion order; the channel is closed once every symbol is
+// done or ctx is cancelled.
+func (s *DataService) FetchRange(ctx context.Context, kind string, symbols []string, fromDate, toDate string, timewise bool, workers int) <-chan RangeResult {
+	jobs := make(chan string)
+	results := make(chan RangeResult)
+
+	go func() {
+		defer close(jobs)
+		for _, symbol := range symbols {
+			select {
+			case jobs <- symbol:
+			case <-ctx.Done():
+				return
+			}
+		}
+	}()
+
+	var wg sync.WaitGroup
+	for i := 0; i < workers; i++ {
+		wg.Add(1)
+		go func() {
+			defer wg.Done()
+			for symbol := range jobs {
+				result := RangeResult{Symbol: symbol}
+				result.Records, result.Err = s.getRange(kind, symbol, fromDate, toDate, timewise)
+				select {
+				case results <- result:
+				case <-ctx.Done():
+					return
+				}
+			}
+		}()
+	}
+
+	go func() {
+		wg.Wait()
+		close(results)
+	}()
+	return results
+}
+
+func (s *DataService) getRange(kind, symbol, fromDate, toDate string, timewise bool) ([]interface{}, error) {
+	var records []interface{}
+	if kind == "sector" {
+		data, err := s.provider.GetSectorRange(symbol, fromDate, toDate, timewise)
+		if err != nil {
+			return nil, err
+		}
+		for _, record := range data {
+			records = append(records, record)
+		}
+		return records, nil
+	}
+
+	data, err := s.provider.GetStockRange(symbol, fromDate, toDate, timewise)
+	if err != nil {
+		return nil, err
+	}
+	for _, record := range data {
+		records = append(records, record)
+	}
+	return records, nil
+}
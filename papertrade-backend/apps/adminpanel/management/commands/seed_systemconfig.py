@@ -20,6 +20,38 @@ class Command(BaseCommand):
                 'description': 'Global maximum concurrent backtests across all users',
                 'is_public': False
             },
+            'backtest.engine_mode': {
+                'value': 'vectorized',
+                'description': 'Backtest engine mode: vectorized (NumPy kernels) or legacy (row-by-row loops)',
+                'is_public': False
+            },
+            'backtest.shard_size': {
+                'value': '50',
+                'description': 'Stocks per shard when a backtest is split across workers (Celery chord / local process pool)',
+                'is_public': False
+            },
+            'backtest.sweep_max_combinations': {
+                'value': '500',
+                'description': 'Maximum parameter combinations evaluated by one parameter sweep',
+                'is_public': False
+            },
+            'backtest.result_cache': {
+                'value': 'true',
+                'description': 'Reuse results of an identical earlier backtest (same spec and price data) instead of re-running',
+                'is_public': False
+            },
+            
+            # Strategy Configuration
+            'strategy.calculator_mode': {
+                'value': 'vectorized',
+                'description': 'Predefined strategy calculators: vectorized (array implementations) or legacy (row-by-row Decimal loops)',
+                'is_public': False
+            },
+            'strategy.sync_chunk_size': {
+                'value': '100',
+                'description': 'Stocks per chunk task in background strategy sync jobs',
+                'is_public': False
+            },
             
             # Options Configuration
             'options.strike_interval': {
@@ -56,6 +88,31 @@ class Command(BaseCommand):
                 'description': 'Cron expression for auto sync schedule (3 AM IST daily)',
                 'is_public': False
             },
+            'sync.fetch_mode': {
+                'value': 'batch',
+                'description': 'Price fetch mode: batch (streamed range requests) or daily (one request per stock and day)',
+                'is_public': False
+            },
+            'sync.fetch_concurrency': {
+                'value': '8',
+                'description': 'Concurrent requests to the Go service per price sync job, split across its chunk tasks (at least 1 per chunk)',
+                'is_public': False
+            },
+            'sync.fetch_queue_size': {
+                'value': '2000',
+                'description': 'Fetched rows buffered for the sync DB writer before fetchers wait',
+                'is_public': False
+            },
+            'sync.write_batch_size': {
+                'value': '1000',
+                'description': 'Synced days upserted per bulk write (one transaction each)',
+                'is_public': False
+            },
+            'sync.chunk_size': {
+                'value': '50',
+                'description': 'Stocks per price sync chunk task (chunks run in parallel on workers)',
+                'is_public': False
+            },
             
             # Admin Feature Toggles
             'admin.can_manage_stocks': {
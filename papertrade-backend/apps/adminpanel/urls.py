@@ -15,6 +15,7 @@ urlpatterns = [
     path('admins/<int:admin_id>/delete/', views.delete_admin, name='admin-delete-admin'),
     path('users/<int:user_id>/toggle-status/', views.toggle_user_status, name='admin-toggle-user-status'),
     path('dashboard/stats/', views.dashboard_stats, name='dashboard_stats'),
+    path('backtests/cache/stats/', views.backtest_cache_stats, name='backtest_cache_stats'),
     path('database/tables/', views.get_tables, name='database_tables'),
     path('database/tables/<str:table_name>/', views.get_table_schema, name='database_table_schema'),
     path('database/query/', views.execute_query, name='database_run_query'),
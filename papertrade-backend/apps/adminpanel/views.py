@@ -362,6 +362,17 @@ def dashboard_stats(request):
     
     return get_success_response(stats)
 
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def backtest_cache_stats(request):
+    """Backtest result cache hit/miss counts."""
+    if not isinstance(request.user, AdminUser):
+        return get_error_response('FORBIDDEN', 'Access denied', status_code=403)
+    
+    from apps.backtests.cache import BacktestCache
+    return get_success_response(BacktestCache.stats())
+
 from django.db import connection
 
 @api_view(['GET'])
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import BacktestRun, Trade
+from .models import BacktestRun, BacktestSweep, Trade
 
 
 @admin.register(BacktestRun)
@@ -9,6 +9,13 @@ class BacktestRunAdmin(admin.ModelAdmin):
     search_fields = ['run_id', 'user__email']
 
 
+@admin.register(BacktestSweep)
+class BacktestSweepAdmin(admin.ModelAdmin):
+    list_display = ['sweep_id', 'user', 'status', 'total_combinations', 'rank_by', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['sweep_id', 'user__email']
+
+
 @admin.register(Trade)
 class TradeAdmin(admin.ModelAdmin):
     list_display = ['stock_enum', 'user', 'buy_date', 'sell_date', 'pnl', 'created_at']
@@ -0,0 +1,159 @@
+"""
+Memoized backtest results.
+
+A run's specification (strategy definition, resolved stock set, dates,
+criteria, trade strategy and wallet) is hashed canonically. A completed run
+with the same hash and the same price-data version is cloned instead of
+executed. The price-data version is derived from every row the engine reads
+for the run: StockPriceDaily and the stored indicators (StockIndicatorDaily)
+of its stocks over the loaded window, by row count and latest updated_at.
+A price sync touching that window, or an indicator recompute reaching it
+(including one caused by a price change before the window), invalidates the
+cached result. Price rows written outside the sync/indicator-store path
+without an indicator update are not detected until the indicators change.
+"""
+import hashlib
+import json
+import logging
+from typing import List, Optional
+from django.db import connection
+from django.db.models import Count, Max, Q
+from .models import BacktestRun
+from apps.stocks.models import StockPriceDaily, StockIndicatorDaily
+
+logger = logging.getLogger(__name__)
+
+# Bump when engine changes alter results, to invalidate all cached runs
+CACHE_VERSION = 5
+
+# Result fields copied from the source run on a cache hit
+CLONED_FIELDS = [
+    'total_signals', 'win_count', 'loss_count', 'win_rate',
+    'final_wallet_amount', 'total_pnl', 'pnl_percentage', 'number_of_trades',
+    'equity_curve_json', 'risk_metrics', 'walk_forward_windows',
+]
+
+
+class BacktestCache:
+    """Lookup and clone of identical completed runs."""
+
+    def __init__(self, backtest_run: BacktestRun, stock_ids: List[int]):
+        self.backtest_run = backtest_run
+        self.stock_ids = sorted(stock_ids)
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """Cache switch from SystemConfig ('backtest.result_cache', default on)."""
+        from apps.adminpanel.models import SystemConfig
+        config = SystemConfig.objects.filter(key='backtest.result_cache').first()
+        return config is None or config.value.strip().lower() not in ('false', '0', 'off')
+
+    def strategy_definition(self) -> dict:
+        """What the signals depend on: predefined code (plus AUTO rules) or rules_json."""
+        run = self.backtest_run
+        definition = {}
+        if run.strategy_predefined:
+            definition['predefined'] = run.strategy_predefined.code
+            linked = run.strategy_predefined.rule_based_strategy
+            if run.strategy_predefined.type == 'AUTO' and linked:
+                definition['rules_json'] = linked.rules_json
+        if run.strategy_rule_based:
+            definition['rules_json'] = run.strategy_rule_based.rules_json
+        if run.strategy_custom_script:
+            definition['custom_script'] = run.strategy_custom_script
+        return definition
+
+    def spec_hash(self) -> str:
+        """SHA-256 of the canonical (sorted-key) JSON of the run specification."""
+        run = self.backtest_run
+        spec = {
+            'version': CACHE_VERSION,
+            'strategy': self.strategy_definition(),
+            'stocks': self.stock_ids,
+            'start_date': str(run.start_date),
+            'end_date': str(run.end_date),
+            'criteria_type': run.criteria_type,
+            'magnitude_threshold': run.magnitude_threshold,
+            'trade_strategy': run.trade_strategy or '',
+            'initial_wallet_amount': f'{run.initial_wallet_amount:.2f}',
+            'walk_forward': run.walk_forward_config or {},
+        }
+        canonical = json.dumps(spec, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def price_data_version(self) -> str:
+        """
+        Version of the rows the run reads: prices and stored indicators over
+        the loaded window (including the indicator buffer).
+        """
+        from .engine import BacktestEngine
+        run = self.backtest_run
+        window = {
+            'stock_id__in': self.stock_ids,
+            'date__gte': run.start_date - BacktestEngine.FETCH_BUFFER,
+            'date__lte': run.end_date,
+        }
+        parts = []
+        for model in (StockPriceDaily, StockIndicatorDaily):
+            version = model.objects.filter(**window).order_by().aggregate(rows=Count('id'), updated=Max('updated_at'))
+            # Epoch microseconds keep the version within the 64-char field
+            updated = int(version['updated'].timestamp() * 1_000_000) if version['updated'] else ''
+            parts.append(f"{version['rows']}:{updated}")
+        return '|'.join(parts)
+
+    def lookup(self) -> Optional[BacktestRun]:
+        """
+        Find a completed run with the same spec and price version.
+        Records the hash/version on this run either way, so it can serve later runs.
+        """
+        run = self.backtest_run
+        run.spec_hash = self.spec_hash()
+        run.price_data_version = self.price_data_version()
+        run.save(update_fields=['spec_hash', 'price_data_version', 'updated_at'])
+
+        return BacktestRun.objects.filter(
+            spec_hash=run.spec_hash,
+            price_data_version=run.price_data_version,
+            status='completed',
+        ).exclude(id=run.id).order_by('-created_at').first()
+
+    def clone(self, source: BacktestRun):
+        """Copy the source run's results (summary fields and result rows) into this run."""
+        run = self.backtest_run
+        for field in CLONED_FIELDS:
+            setattr(run, field, getattr(source, field))
+        run.cache_hit = True
+
+        # Copy result rows inside the database
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO backtest_results
+                    (backtest_run_id, stock_symbol, signal_date, signal,
+                     expected_price, actual_close, prev_close, result)
+                SELECT %s, stock_symbol, signal_date, signal,
+                       expected_price, actual_close, prev_close, result
+                FROM backtest_results
+                WHERE backtest_run_id = %s
+                ORDER BY id
+                """,
+                [run.id, source.id]
+            )
+
+        logger.info(f"Backtest {run.run_id} served from cache (source {source.run_id})")
+
+    @staticmethod
+    def stats() -> dict:
+        """Hit/miss counts over runs that went through the cache."""
+        counts = BacktestRun.objects.exclude(spec_hash='').aggregate(
+            total=Count('id'),
+            hits=Count('id', filter=Q(cache_hit=True)),
+        )
+        hits = counts['hits']
+        misses = counts['total'] - hits
+        return {
+            'enabled': BacktestCache.is_enabled(),
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / counts['total'] * 100, 2) if counts['total'] else 0,
+        }
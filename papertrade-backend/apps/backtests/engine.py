@@ -2,16 +2,21 @@
 Backtest engine for executing trading strategies.
 """
 import logging
+import os
 from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import List, Dict, Any
+import numpy as np
 import requests
 from django.conf import settings
 from django.utils import timezone
-from .models import BacktestRun, Trade
-from apps.stocks.models import Stock, StockPriceDaily
+from .models import BacktestRun, BacktestResult, Trade
+from apps.stocks.models import Stock
+from apps.stocks.panel import PricePanel
 from apps.strategies.models import StrategyMaster, StrategyRuleBased
 from apps.strategies.logic import StrategyEngine
+from . import kernels
+from .metrics import risk_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -19,14 +24,27 @@ logger = logging.getLogger(__name__)
 class BacktestEngine:
     """Main backtest execution engine."""
     
-    def __init__(self, backtest_run: BacktestRun):
+    ENGINE_MODES = ('vectorized', 'legacy')
+    DEFAULT_ENGINE_MODE = 'vectorized'
+    DEFAULT_SHARD_SIZE = 50
+    FETCH_BUFFER = timedelta(days=30) # Prior days needed for indicators
+    RESULT_BATCH_SIZE = 5000
+    
+    def __init__(self, backtest_run: BacktestRun, engine_mode: str = None):
         self.backtest_run = backtest_run
+        self.engine_mode = engine_mode
         self.results = []
         self.stats = {
             'total_signals': 0,
             'win_count': 0,
             'loss_count': 0,
         }
+        self.pnl = {
+            'final_values': [],
+            'trades': 0,
+        }
+        self.curve = None # Daily equity of the simulated stocks (see _start_curve)
+        self.equity_curve = None # Merged (dates, equity, invested, traded) after reduce()
         
     def execute(self, stock_ids: List[int], execution_mode: str = 'signal_close'):
         """
@@ -35,102 +53,313 @@ class BacktestEngine:
         start_time = timezone.now()
         
         try:
-            self.backtest_run.status = 'running'
-            self.backtest_run.save()
-            
-            # Get stocks
-            stocks = Stock.objects.filter(id__in=stock_ids, status='active')
-            if not stocks.exists():
-                raise ValueError('No active stocks found')
-            
-            # Get date range with buffer (need prior days for indicators)
-            start_date = self.backtest_run.start_date
-            end_date = self.backtest_run.end_date
-            fetch_start = start_date - timedelta(days=30)
+            stock_ids = self.prepare(stock_ids)
+            if self.load_cached(stock_ids, start_time):
+                return
             
-            # Strategy Code
-            strategy = self.backtest_run.strategy_predefined
-            strategy_rule = self.backtest_run.strategy_rule_based
+            if self.backtest_run.walk_forward_config:
+                # Walk-forward: rolling in-sample optimisation, stitched out-of-sample results
+                from .walkforward import WalkForward
+                results = WalkForward(self).execute(stock_ids)
+                self.complete(results, (timezone.now() - start_time).total_seconds())
+                return
             
-            if not strategy and not strategy_rule:
-                raise ValueError("No strategy selected")
-                
-            # Process each stock
-            for stock in stocks:
-                self._process_stock(stock, strategy, fetch_start, end_date)
-            
-            # Calculate final stats
-            self.backtest_run.total_signals = self.stats['total_signals']
-            self.backtest_run.win_count = self.stats['win_count']
-            self.backtest_run.loss_count = self.stats['loss_count']
+            partial = self.run_shard(stock_ids, self.capital_per_stock(len(stock_ids)))
+            self.merge([partial], (timezone.now() - start_time).total_seconds())
+        except Exception as e:
+            self.fail(e)
+            raise
+
+    def execute_parallel(self, stock_ids: List[int], execution_mode: str = 'signal_close', shard_size: int = None):
+        """
+        Execute backtest with the stocks split into shards, run in a local
+        process pool (used in 'direct' mode; background mode fans the same
+        shards out as a Celery chord, see tasks.py).
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        from django.db import connections
+        
+        if self.backtest_run.walk_forward_config:
+            # Walk-forward windows depend on each other; not sharded
+            return self.execute(stock_ids, execution_mode)
+        
+        start_time = timezone.now()
+        
+        try:
+            stock_ids = self.prepare(stock_ids)
+            if self.load_cached(stock_ids, start_time):
+                return
+            shards = self.split_shards(stock_ids, shard_size or self.get_shard_size())
+            capital = self.capital_per_stock(len(stock_ids))
             
-            if self.stats['total_signals'] > 0:
-                self.backtest_run.win_rate = (self.stats['win_count'] / self.stats['total_signals']) * 100
+            if len(shards) <= 1:
+                partials = [self.run_shard(stock_ids, capital)]
             else:
-                self.backtest_run.win_rate = 0
-            
-            # --- PnL Calculation ---
-            if self.backtest_run.trade_strategy and self.backtest_run.initial_wallet_amount > 0:
-                 self._calculate_pnl(stocks, strategy, strategy_rule, fetch_start, end_date)
-            
-            # Save detailed results
-            self.backtest_run.list_of_trades_json = self.results
-            self.backtest_run.status = 'completed'
-            self.backtest_run.time_taken = (timezone.now() - start_time).total_seconds()
-            self.backtest_run.save()
-            
-            logger.info(f"Backtest {self.backtest_run.run_id} completed successfully")
+                # Forked workers must not share the parent's DB connections
+                connections.close_all()
+                with ProcessPoolExecutor(max_workers=min(len(shards), os.cpu_count() or 1)) as pool:
+                    partials = list(pool.map(
+                        run_backtest_shard,
+                        [self.backtest_run.id] * len(shards),
+                        shards,
+                        [capital] * len(shards),
+                        [self.engine_mode] * len(shards),
+                    ))
             
+            self.merge(partials, (timezone.now() - start_time).total_seconds())
         except Exception as e:
-            logger.error(f"Backtest {self.backtest_run.run_id} failed: {str(e)}")
-            self.backtest_run.status = 'failed'
-            self.backtest_run.error_message = str(e)
-            self.backtest_run.save()
+            self.fail(e)
             raise
 
-    def _process_stock(self, stock, strategy, start_date, end_date):
-        """Process a single stock: Generate signals & Verify."""
+    def prepare(self, stock_ids: List[int]) -> List[int]:
+        """
+        Validate the run and mark it running.
+        Returns the active stock ids in processing (symbol) order.
+        """
+        if self.engine_mode is None:
+            self.engine_mode = self.get_engine_mode()
         
-        # 1. Fetch Prices
-        prices = list(StockPriceDaily.objects.filter(
-            stock=stock,
-            date__gte=start_date,
-            date__lte=end_date
-        ).order_by('date'))
+        self.backtest_run.status = 'running'
+        self.backtest_run.save()
         
-        if not prices:
-            return
+        # Get stocks
+        stock_ids = list(
+            Stock.objects.filter(id__in=stock_ids, status='active').values_list('id', flat=True)
+        )
+        if not stock_ids:
+            raise ValueError('No active stocks found')
+        
+        if not self.backtest_run.strategy_predefined and not self.backtest_run.strategy_rule_based:
+            raise ValueError("No strategy selected")
+        
+        return stock_ids
+
+    def load_cached(self, stock_ids: List[int], start_time) -> bool:
+        """
+        Complete the run from an identical earlier run (same spec hash and
+        price-data version) if the result cache is enabled.
+        Returns True on a cache hit.
+        """
+        from .cache import BacktestCache
+        
+        if not BacktestCache.is_enabled():
+            return False
+        
+        cache = BacktestCache(self.backtest_run, stock_ids)
+        source = cache.lookup()
+        if source is None:
+            return False
+        
+        cache.clone(source)
+        self.backtest_run.status = 'completed'
+        self.backtest_run.time_taken = (timezone.now() - start_time).total_seconds()
+        self.backtest_run.save()
+        return True
+
+    def capital_per_stock(self, total_stocks: int) -> float:
+        """PnL Configuration: equal capital per stock across the whole run."""
+        return float(self.backtest_run.initial_wallet_amount) / total_stocks
+
+    def run_shard(self, stock_ids: List[int], capital_per_stock: float) -> Dict[str, Any]:
+        """
+        Generate, verify and trade signals for a shard of stocks.
+        Returns JSON-serializable partial results for merge().
+        """
+        if self.engine_mode is None:
+            self.engine_mode = self.get_engine_mode()
+        
+        stocks = list(Stock.objects.filter(id__in=stock_ids))
+        
+        # Get date range with buffer (need prior days for indicators)
+        start_date = self.backtest_run.start_date
+        end_date = self.backtest_run.end_date
+        fetch_start = start_date - self.FETCH_BUFFER
+        
+        # Strategy Code
+        strategy = self.backtest_run.strategy_predefined
+        strategy_rule = self.backtest_run.strategy_rule_based
+        calculator = StrategyEngine.get_signal_calculator(strategy, strategy_rule)
+            
+        # Load all prices for the shard once (stocks x dates panel; stored indicators for rule-based strategies)
+        uses_rules = bool(strategy_rule or (strategy and strategy.type == 'AUTO'))
+        panel = PricePanel.load([stock.id for stock in stocks], fetch_start, end_date, indicators=uses_rules)
+        self.run_stocks(stocks, panel, calculator, capital_per_stock)
+        
+        return self.partial()
+
+    def partial(self) -> Dict[str, Any]:
+        """Accumulated stats, result rows, PnL and equity curve of the stocks processed so far."""
+        curve = None
+        if self.curve is not None:
+            curve = {
+                'dates': [str(d) for d in self.curve['dates'].tolist()],
+                'equity': self.curve['equity'].tolist(),
+                'invested': self.curve['invested'].tolist(),
+                'traded': self.curve['traded'],
+                'base': self.curve['base'],
+            }
+        return {
+            'stats': self.stats,
+            'results': self.results,
+            'pnl': self.pnl,
+            'curve': curve,
+        }
+
+    def run_stocks(self, stocks, panel: PricePanel, calculator, capital_per_stock: float):
+        """
+        Process each stock of a loaded panel: signals are generated once,
+        then verified and traded. `calculator` maps a PriceSeries to signals.
+        """
+        simulate_pnl = self.simulates_pnl()
+        if simulate_pnl:
+            self._start_curve(panel)
+        for stock in stocks:
+            prices = panel.series(stock.id)
+            signals = calculator(prices) if calculator and len(prices) else []
+            self._process_stock(stock, prices, signals)
+            if simulate_pnl:
+                self._simulate_stock(prices, signals, capital_per_stock)
+
+    def merge(self, partials: List[Dict[str, Any]], time_taken: float):
+        """
+        Reduce step: combine shard partials (in shard order) into the run
+        and mark it completed.
+        """
+        self.complete(self.reduce(partials), time_taken)
 
-        # 2. Generate Signals (Hypothetical)
-        generated_signals = []
-        
-        if self.backtest_run.strategy_rule_based:
-             generated_signals = StrategyEngine.calculate_rule_based_strategy(
-                 prices, 
-                 self.backtest_run.strategy_rule_based.rules_json
-             )
-        elif strategy.type == 'AUTO':
-            if strategy.rule_based_strategy:
-                generated_signals = StrategyEngine.calculate_rule_based_strategy(
-                    prices, 
-                    strategy.rule_based_strategy.rules_json
+    def complete(self, results: List[Dict[str, Any]], time_taken: float):
+        """Save detailed results and mark the run completed."""
+        self.save_results(results)
+        self.backtest_run.status = 'completed'
+        self.backtest_run.time_taken = time_taken
+        self.backtest_run.save()
+        
+        logger.info(f"Backtest {self.backtest_run.run_id} completed successfully")
+
+    def reduce(self, partials: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Set the run's accuracy and PnL fields from partials (without saving).
+        Returns the combined result rows.
+        """
+        stats = {'total_signals': 0, 'win_count': 0, 'loss_count': 0}
+        results = []
+        final_values = []
+        trades = 0
+        curves = []
+        for partial in partials:
+            for key in stats:
+                stats[key] += partial['stats'][key]
+            results.extend(partial['results'])
+            final_values.extend(partial['pnl']['final_values'])
+            trades += partial['pnl']['trades']
+            if partial.get('curve'):
+                curves.append(partial['curve'])
+        
+        # Calculate final stats
+        self.backtest_run.total_signals = stats['total_signals']
+        self.backtest_run.win_count = stats['win_count']
+        self.backtest_run.loss_count = stats['loss_count']
+        
+        if stats['total_signals'] > 0:
+            self.backtest_run.win_rate = (stats['win_count'] / stats['total_signals']) * 100
+        else:
+            self.backtest_run.win_rate = 0
+        
+        # --- PnL Calculation ---
+        if self.simulates_pnl():
+             self._finalize_pnl(final_values, trades)
+             if curves:
+                 self._merge_curves(curves)
+        
+        return results
+
+    def set_equity_curve(self, dates, equity, invested, traded: float):
+        """Store the run's daily equity curve (compact parallel arrays) and its risk metrics."""
+        self.equity_curve = (dates, equity, invested, traded)
+        self.backtest_run.equity_curve_json = {
+            'dates': [str(d) for d in dates.tolist()],
+            'equity': np.round(equity, 2).tolist(),
+        }
+        self.backtest_run.risk_metrics = risk_metrics(dates, equity, invested, traded)
+
+    def save_results(self, results: List[Dict[str, Any]]):
+        """Bulk insert per-signal result rows into the backtest_results table."""
+        BacktestResult.objects.bulk_create(
+            (
+                BacktestResult(
+                    backtest_run_id=self.backtest_run.id,
+                    stock_symbol=row['stock_symbol'],
+                    signal_date=row['signal_date'],
+                    signal=row['signal'],
+                    expected_price=row['expected_price'],
+                    actual_close=row['actual_close'],
+                    prev_close=row['prev_close'],
+                    result=row['result'],
                 )
-        elif strategy.code == 'DAILY_CLOSE_MOMENTUM':
-            generated_signals = StrategyEngine.calculate_one_day_trend(prices)
-        elif strategy.code == 'TWO_DAY_CLOSE_MOMENTUM':
-            generated_signals = StrategyEngine.calculate_three_day_trend(prices)
-        elif strategy.code == 'OVERSOLD_REVERSAL':
-             generated_signals = StrategyEngine.calculate_oversold_reversal(prices)
+                for row in results
+            ),
+            batch_size=self.RESULT_BATCH_SIZE,
+        )
+
+    def fail(self, error):
+        """Mark the run failed (discarding result rows already written by shards)."""
+        logger.error(f"Backtest {self.backtest_run.run_id} failed: {str(error)}")
+        if self.backtest_run.pk:
+            self.backtest_run.signal_results.all().delete()
+        self.backtest_run.status = 'failed'
+        self.backtest_run.error_message = str(error)
+        self.backtest_run.save()
+
+    def simulates_pnl(self) -> bool:
+        return bool(self.backtest_run.trade_strategy and self.backtest_run.initial_wallet_amount > 0)
+
+    @staticmethod
+    def split_shards(stock_ids: List[int], shard_size: int) -> List[List[int]]:
+        """Split (ordered) stock ids into contiguous shards."""
+        shard_size = max(int(shard_size), 1)
+        return [stock_ids[i:i + shard_size] for i in range(0, len(stock_ids), shard_size)]
+
+    @classmethod
+    def get_shard_size(cls) -> int:
+        """Stocks per shard from SystemConfig ('backtest.shard_size')."""
+        from apps.adminpanel.models import SystemConfig
+        config = SystemConfig.objects.filter(key='backtest.shard_size').first()
+        try:
+            size = int(config.value) if config else cls.DEFAULT_SHARD_SIZE
+        except ValueError:
+            size = cls.DEFAULT_SHARD_SIZE
+        return size if size > 0 else cls.DEFAULT_SHARD_SIZE
+
+    @classmethod
+    def get_engine_mode(cls) -> str:
+        """
+        Engine mode from SystemConfig ('backtest.engine_mode').
+        'vectorized' uses the NumPy kernels, 'legacy' the row-by-row loops.
+        """
+        from apps.adminpanel.models import SystemConfig
+        config = SystemConfig.objects.filter(key='backtest.engine_mode').first()
+        mode = config.value.strip().lower() if config else cls.DEFAULT_ENGINE_MODE
+        return mode if mode in cls.ENGINE_MODES else cls.DEFAULT_ENGINE_MODE
+
+    def _process_stock(self, stock, prices, generated_signals):
+        """Verify a single stock's generated signals against its PriceSeries."""
+        
+        # Prices come from the run's shared PricePanel
+        if not len(prices):
+            return
             
-        # 3. Verify Signals
-        # Map prices by date for quick lookup
-        price_map = {p.date: p for p in prices}
+        if self.engine_mode == 'vectorized':
+            self._verify_signals_vectorized(stock, prices, generated_signals)
+            return
+        
+        # Map closes by date for quick lookup
+        dates = prices.date_list()
+        closes = prices.close.tolist()
+        price_map = dict(zip(dates, closes))
         
         # We also need 'previous day' lookup for verification (Change = Today - Yesterday)
-        # Assuming prices list is sorted
-        prev_price_map = {}
-        for i in range(1, len(prices)):
-            prev_price_map[prices[i].date] = prices[i-1]
+        # Series is sorted by date
+        prev_price_map = dict(zip(dates[1:], closes[:-1]))
 
         criteria = self.backtest_run.criteria_type
         
@@ -142,10 +371,10 @@ class BacktestEngine:
             if not (self.backtest_run.start_date <= sig_date <= self.backtest_run.end_date):
                 continue
             
-            actual_price_obj = price_map.get(sig_date)
-            prev_price_obj = prev_price_map.get(sig_date)
+            actual_close = price_map.get(sig_date)
+            prev_close = prev_price_map.get(sig_date)
             
-            if not actual_price_obj or not prev_price_obj:
+            if actual_close is None or prev_close is None:
                 continue # Cannot verify without price data
 
             # Also validate expected value if it's required or provided
@@ -158,8 +387,6 @@ class BacktestEngine:
             # Verification Logic
             is_win = False
             
-            actual_close = float(actual_price_obj.close_price)
-            prev_close = float(prev_price_obj.close_price)
             actual_change = actual_close - prev_close
             
             predicted_dir = sig['signal_direction']
@@ -208,139 +435,275 @@ class BacktestEngine:
                 'result': 'WIN' if is_win else 'LOSS'
             })
 
-    def _calculate_pnl(self, stocks, strategy, strategy_rule, start_date, end_date):
+    def _verify_signals_vectorized(self, stock, prices, generated_signals):
+        """Vectorized equivalent of the verification loop in _process_stock."""
+        if not generated_signals:
+            return
+        
+        sig_dates, directions, expected = kernels.signal_arrays(generated_signals)
+        
+        kept, actual_close, prev_close, is_win = kernels.verify_signals(
+            prices.dates, prices.close, sig_dates, directions, expected,
+            self.backtest_run.start_date,
+            self.backtest_run.end_date,
+            self.backtest_run.criteria_type,
+            self.backtest_run.magnitude_threshold,
+        )
+        if len(kept) == 0:
+            return
+        
+        wins = int(np.count_nonzero(is_win))
+        self.stats['total_signals'] += len(kept)
+        self.stats['win_count'] += wins
+        self.stats['loss_count'] += len(kept) - wins
+        
+        self.results.extend(
+            {
+                'stock_symbol': stock.symbol,
+                'signal_date': sig_date,
+                'signal': generated_signals[i]['signal_direction'],
+                'expected_price': expected_price,
+                'actual_close': actual,
+                'prev_close': prev,
+                'result': 'WIN' if win else 'LOSS'
+            }
+            for i, sig_date, expected_price, actual, prev, win in zip(
+                kept.tolist(),
+                np.datetime_as_string(sig_dates[kept], unit='D').tolist(),
+                expected[kept].tolist(),
+                actual_close.tolist(),
+                prev_close.tolist(),
+                is_win.tolist(),
+            )
+        )
+
+    def _simulate_stock_vectorized(self, prices, generated_signals, capital, mode):
         """
-        Calculate PnL based on selected strategy (Re-Entry or Buy & Hold).
-        Allocates equal capital to each stock.
+        Vectorized equivalent of the per-stock Re-Entry / Buy & Hold simulation.
+        Returns (final_value, trades, fills) with fills as (day index, signed qty).
         """
-        initial_capital = float(self.backtest_run.initial_wallet_amount)
-        if not stocks:
+        if mode not in ('buy_hold', 're_entry'):
+            return 0.0, 0, []
+        if not generated_signals:
+            return capital, 0, []
+        
+        dates, close = prices.dates, prices.close
+        last_price = float(close[-1])
+        
+        sig_dates, directions, _ = kernels.signal_arrays(generated_signals)
+        order = np.argsort(sig_dates, kind='stable')
+        sig_dates = sig_dates[order]
+        directions = directions[order]
+        
+        # Only trade within the user requested range
+        in_range = (sig_dates >= np.datetime64(self.backtest_run.start_date, 'D')) & \
+                   (sig_dates <= np.datetime64(self.backtest_run.end_date, 'D'))
+        sig_dates = sig_dates[in_range]
+        directions = directions[in_range]
+        idx, found = kernels.locate(dates, sig_dates)
+        
+        if mode == 'buy_hold':
+            ups = np.flatnonzero(directions == kernels.DIRECTION_UP)
+            if len(ups) == 0:
+                return capital, 0, []
+            first = ups[0]
+            entry_price = float(close[idx[first]]) if found[first] else None
+            final_value, trades, qty = kernels.simulate_buy_hold(entry_price, last_price, capital)
+            return final_value, trades, [(int(idx[first]), qty)] if qty else []
+        
+        day_idx = idx[found]
+        final_value, trades, fills = kernels.simulate_re_entry(close[day_idx], directions[found], last_price, capital)
+        return final_value, trades, [(int(day_idx[position]), qty) for position, qty in fills]
+
+    def _simulate_stock(self, prices, generated_signals, capital):
+        """
+        Simulate PnL for one stock based on selected strategy (Re-Entry or Buy & Hold)
+        and record its final value.
+        """
+        if not len(prices):
+            self.pnl['final_values'].append(capital) # No trade, keep capital
+            self._add_to_curve(prices, [], capital)
             return
+        
+        mode = self.backtest_run.trade_strategy # 're_entry' or 'buy_hold'
+        if self.engine_mode == 'vectorized':
+            final_value, trades, fills = self._simulate_stock_vectorized(prices, generated_signals, capital, mode)
+        else:
+            final_value, trades, fills = self._simulate_stock_legacy(prices, generated_signals, capital, mode)
+        
+        self.pnl['final_values'].append(final_value)
+        self.pnl['trades'] += trades
+        self._add_to_curve(prices, fills, capital)
 
-        capital_per_stock = initial_capital / len(stocks)
-        total_final_value = 0.0
+    def _start_curve(self, panel: PricePanel):
+        """Daily equity accumulators over the panel's dates within the requested range."""
+        dates = panel.dates
+        in_range = (dates >= np.datetime64(self.backtest_run.start_date, 'D')) & \
+                   (dates <= np.datetime64(self.backtest_run.end_date, 'D'))
+        dates = dates[in_range]
+        self.curve = {
+            'dates': dates,
+            'equity': np.zeros(len(dates), dtype=np.float64),
+            'invested': np.zeros(len(dates), dtype=np.float64),
+            'traded': 0.0,
+            'base': 0.0,
+        }
+
+    def _add_to_curve(self, prices, fills, capital):
+        """Add one stock's mark-to-market equity (from its fills) to the curve."""
+        curve = self.curve
+        if curve is None:
+            return
+        curve['base'] += capital
+        if not len(prices):
+            curve['equity'] += capital
+            return
+        
+        fill_days = [day for day, _ in fills]
+        fill_qty = [qty for _, qty in fills]
+        equity, invested, traded = kernels.equity_curve(prices.close, fill_days, fill_qty, capital)
+        curve['equity'] += kernels.align_curve(prices.dates, equity, curve['dates'], capital)
+        curve['invested'] += kernels.align_curve(prices.dates, invested, curve['dates'], 0.0)
+        curve['traded'] += traded
+
+    def _merge_curves(self, curves):
+        """Sum shard equity curves on the union of their dates."""
+        shard_dates = [np.array(curve['dates'], dtype='datetime64[D]') for curve in curves]
+        axis = np.unique(np.concatenate(shard_dates))
+        equity = np.zeros(len(axis), dtype=np.float64)
+        invested = np.zeros(len(axis), dtype=np.float64)
+        traded = 0.0
+        for dates, curve in zip(shard_dates, curves):
+            equity += kernels.align_curve(dates, np.asarray(curve['equity']), axis, curve['base'])
+            invested += kernels.align_curve(dates, np.asarray(curve['invested']), axis, 0.0)
+            traded += curve['traded']
+        self.set_equity_curve(axis, equity, invested, traded)
+
+    def _simulate_stock_legacy(self, prices, generated_signals, capital, mode):
+        """
+        Signal-by-signal Re-Entry / Buy & Hold simulation.
+        Returns (final_value, trades, fills) with fills as (day index, signed qty).
+        """
         total_trades = 0
+        fills = []
         
-        mode = self.backtest_run.trade_strategy # 're_entry' or 'buy_hold'
+        price_map = dict(zip(prices.date_list(), prices.close.tolist()))
+        day_index = {d: i for i, d in enumerate(prices.date_list())}
+        
+        # Sort signals by date
+        generated_signals = sorted(generated_signals, key=lambda x: x['date'])
+        
+        # Filter signals within user requested range ONLY
+        # (Signals might cover 'fetch_start', but we only trade within 'run.start_date' to 'run.end_date')
+        user_start = self.backtest_run.start_date
+        user_end = self.backtest_run.end_date
+        
+        valid_signals = [
+            s for s in generated_signals 
+            if user_start <= s['date'] <= user_end
+        ]
 
-        for stock in stocks:
-            # 1. Fetch Prices again (Optimization: Could reuse if cached, but for now fetch cleanly)
-            prices = list(StockPriceDaily.objects.filter(
-                stock=stock,
-                date__gte=start_date,
-                date__lte=end_date
-            ).order_by('date'))
-            
-            if not prices:
-                total_final_value += capital_per_stock # No trade, keep capital
-                continue
+        # Simulation State
+        cash = capital
+        holdings_qty = 0
+        # active_trade = None # Not needed strictly if we just track cash/holdings
 
-            price_map = {p.date: p for p in prices}
-            ordered_dates = [p.date for p in prices] # Sorted list of dates avail in range
-
-            # 2. Re-Generate Signals (To ensure we have the full sequence for trading)
-            # (Logic duplicated from _process_stock, should ideally be shared but keeping isolated for safety now)
-            generated_signals = []
-            if strategy_rule:
-                 generated_signals = StrategyEngine.calculate_rule_based_strategy(prices, strategy_rule.rules_json)
-            elif strategy.type == 'AUTO' and strategy.rule_based_strategy:
-                 generated_signals = StrategyEngine.calculate_rule_based_strategy(prices, strategy.rule_based_strategy.rules_json)
-            elif strategy.code == 'DAILY_CLOSE_MOMENTUM':
-                 generated_signals = StrategyEngine.calculate_one_day_trend(prices)
-            elif strategy.code == 'TWO_DAY_CLOSE_MOMENTUM':
-                 generated_signals = StrategyEngine.calculate_three_day_trend(prices)
-            elif strategy.code == 'OVERSOLD_REVERSAL':
-                 generated_signals = StrategyEngine.calculate_oversold_reversal(prices)
-            
-            # Sort signals by date
-            generated_signals.sort(key=lambda x: x['date'])
-            
-            # Filter signals within user requested range ONLY
-            # (Signals might cover 'fetch_start', but we only trade within 'run.start_date' to 'run.end_date')
-            user_start = self.backtest_run.start_date
-            user_end = self.backtest_run.end_date
+        # MODE: BUY & HOLD (Enter on First BUY, Exit on Last Day)
+        if mode == 'buy_hold':
+            first_buy = next((s for s in valid_signals if s['signal_direction'] == 'UP'), None)
+            if first_buy:
+                # Enter
+                entry_date = first_buy['date']
+                entry_price = price_map.get(entry_date)
+                if entry_price is not None:
+                     # Assume buy at Close of Signal Day
+                     if entry_price > 0:
+                         holdings_qty = int(cash // entry_price)
+                         cash -= (holdings_qty * entry_price)
+                         total_trades += 1
+                         if holdings_qty > 0:
+                             fills.append((day_index[entry_date], holdings_qty))
+                         
+                         # Exit at End of Period (Last available price)
+                         exit_price = float(prices.close[-1])
+                         cash += (holdings_qty * exit_price)
+                         holdings_qty = 0
+                         total_trades += 1 # Exit count? User said "no of trade will be each buy and sell" -> yes 2 trades logic
             
-            valid_signals = [
-                s for s in generated_signals 
-                if user_start <= s['date'] <= user_end
-            ]
-
-            # Simulation State
-            cash = capital_per_stock
-            holdings_qty = 0
-            # active_trade = None # Not needed strictly if we just track cash/holdings
-
-            # MODE: BUY & HOLD (Enter on First BUY, Exit on Last Day)
-            if mode == 'buy_hold':
-                first_buy = next((s for s in valid_signals if s['signal_direction'] == 'UP'), None)
-                if first_buy:
-                    # Enter
-                    entry_date = first_buy['date']
-                    entry_price_obj = price_map.get(entry_date)
-                    if entry_price_obj:
-                         entry_price = float(entry_price_obj.close_price) # Assume buy at Close of Signal Day
-                         if entry_price > 0:
-                             holdings_qty = int(cash // entry_price)
-                             cash -= (holdings_qty * entry_price)
-                             total_trades += 1
-                             
-                             # Exit at End of Period (Last available price)
-                             last_price_obj = prices[-1]
-                             exit_price = float(last_price_obj.close_price)
-                             cash += (holdings_qty * exit_price)
-                             holdings_qty = 0
-                             total_trades += 1 # Exit count? User said "no of trade will be each buy and sell" -> yes 2 trades logic
-                
-                total_final_value += cash
-
-            # MODE: RE-ENTRY (Signal Based)
-            elif mode == 're_entry':
-                 # Logic:
-                 # Buy Signal -> Buy (if cash).
-                 # Sell Signal -> Sell (if holding).
-                 # Re-enter on next Buy.
+            return cash, total_trades, fills
+
+        # MODE: RE-ENTRY (Signal Based)
+        elif mode == 're_entry':
+             # Logic:
+             # Buy Signal -> Buy (if cash).
+             # Sell Signal -> Sell (if holding).
+             # Re-enter on next Buy.
+             
+             for sig in valid_signals:
+                 sig_date = sig['date']
+                 direction = sig['signal_direction']
+                 current_price = price_map.get(sig_date)
+                 if current_price is None: continue
                  
-                 for sig in valid_signals:
-                     sig_date = sig['date']
-                     direction = sig['signal_direction']
-                     price_obj = price_map.get(sig_date)
-                     if not price_obj: continue
-                     current_price = float(price_obj.close_price)
-                     
-                     if direction == 'UP':
-                         if holdings_qty == 0 and cash > 0:
-                             # Buy
-                             holdings_qty = int(cash // current_price)
-                             if holdings_qty > 0:
-                                 cash -= (holdings_qty * current_price)
-                                 total_trades += 1
-                                 
-                     elif direction == 'DOWN':
+                 if direction == 'UP':
+                     if holdings_qty == 0 and cash > 0:
+                         # Buy
+                         holdings_qty = int(cash // current_price)
                          if holdings_qty > 0:
-                             # Sell
-                             cash += (holdings_qty * current_price)
-                             holdings_qty = 0
+                             cash -= (holdings_qty * current_price)
                              total_trades += 1
-                 
-                 # Mark to Market at end (if still holding, liquidate at last price for Final Value calc)
-                 if holdings_qty > 0:
-                     last_price_obj = prices[-1]
-                     last_price = float(last_price_obj.close_price)
-                     cash += (holdings_qty * last_price)
-                     # holdings_qty = 0 # Don't count as 'trade' if it's just valuation? Or forced exit?
-                     # Usually forced exit is better for final PnL.
-                     # "Exit at last trade day" applies to BuyHold. For Active? usually implied.
-                     # Let's count it as final value but maybe not a 'trade' unless signaled?
-                     # User said "exit the stock when we get sell signal".
-                     # If no sell signal by end? PnL is usually unrealized + realized.
-                     # We will calculate total Value = Cash + (Qty * LastPrice).
-                 
-                 total_final_value += cash
+                             fills.append((day_index[sig_date], holdings_qty))
+                             
+                 elif direction == 'DOWN':
+                     if holdings_qty > 0:
+                         # Sell
+                         cash += (holdings_qty * current_price)
+                         fills.append((day_index[sig_date], -holdings_qty))
+                         holdings_qty = 0
+                         total_trades += 1
+             
+             # Mark to Market at end (if still holding, liquidate at last price for Final Value calc)
+             if holdings_qty > 0:
+                 last_price = float(prices.close[-1])
+                 cash += (holdings_qty * last_price)
+                 # holdings_qty = 0 # Don't count as 'trade' if it's just valuation? Or forced exit?
+                 # Usually forced exit is better for final PnL.
+                 # "Exit at last trade day" applies to BuyHold. For Active? usually implied.
+                 # Let's count it as final value but maybe not a 'trade' unless signaled?
+                 # User said "exit the stock when we get sell signal".
+                 # If no sell signal by end? PnL is usually unrealized + realized.
+                 # We will calculate total Value = Cash + (Qty * LastPrice).
+             
+             return cash, total_trades, fills
+        
+        return 0.0, total_trades, fills
 
-        # Final Aggregation
+    def _finalize_pnl(self, final_values, total_trades):
+        """Set the run's PnL fields from the per-stock final values."""
+        initial_capital = float(self.backtest_run.initial_wallet_amount)
+        
+        # Sum sequentially in stock order (same float result however the run was sharded)
+        total_final_value = 0.0
+        for value in final_values:
+            total_final_value += value
+        
         self.backtest_run.final_wallet_amount = Decimal(total_final_value)
         self.backtest_run.total_pnl = Decimal(total_final_value - initial_capital)
         if initial_capital > 0:
             self.backtest_run.pnl_percentage = Decimal(((total_final_value - initial_capital) / initial_capital) * 100)
         
         self.backtest_run.number_of_trades = total_trades
+
+
+def run_backtest_shard(backtest_run_id: int, stock_ids: List[int], capital_per_stock: float, engine_mode: str = None):
+    """Run one shard of a backtest (process pool / Celery entry point)."""
+    backtest_run = BacktestRun.objects.select_related(
+        'strategy_predefined__rule_based_strategy', 'strategy_rule_based'
+    ).get(id=backtest_run_id)
+    engine = BacktestEngine(backtest_run, engine_mode=engine_mode)
+    partial = engine.run_shard(stock_ids, capital_per_stock)
+    
+    # Shards write their own result rows; only stats and PnL go to the reduce step
+    engine.save_results(partial['results'])
+    partial['results'] = []
+    return partial
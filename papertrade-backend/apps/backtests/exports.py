@@ -0,0 +1,151 @@
+"""
+Streaming exports of backtest results.
+
+Rows are read from backtest_results with a server-side cursor and written
+out chunk by chunk, so memory stays flat regardless of run size. CSV is
+always available; the columnar formats (Parquet, Arrow IPC stream) need
+pyarrow and are imported lazily.
+"""
+import csv
+from .models import BacktestRun
+
+EXPORT_CHUNK_SIZE = 5000
+
+# (header, BacktestResult field)
+RESULT_COLUMNS = [
+    ('Stock', 'stock_symbol'),
+    ('Signal Date', 'signal_date'),
+    ('Signal', 'signal'),
+    ('Expected Price', 'expected_price'),
+    ('Actual Close', 'actual_close'),
+    ('Prev Close', 'prev_close'),
+    ('Result', 'result'),
+]
+
+COLUMNAR_FORMATS = {
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+
+def iter_results(backtest: BacktestRun):
+    """Result rows (tuples in RESULT_COLUMNS order) streamed from the database."""
+    fields = [field for _, field in RESULT_COLUMNS]
+    return backtest.signal_results.order_by('stock_symbol', 'signal_date', 'id').values_list(
+        *fields
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(backtest: BacktestRun):
+    """Yield the CSV export line by line: header, results, then a summary."""
+    writer = csv.writer(_Echo())
+
+    yield writer.writerow(['Run ID'] + [header for header, _ in RESULT_COLUMNS])
+    for row in iter_results(backtest):
+        yield writer.writerow([backtest.run_id, *row])
+
+    yield writer.writerow([])
+    yield writer.writerow(['Summary'])
+    yield writer.writerow(['Total Signals', backtest.total_signals])
+    yield writer.writerow(['Wins', backtest.win_count])
+    yield writer.writerow(['Losses', backtest.loss_count])
+    yield writer.writerow(['Win Rate %', f"{backtest.win_rate:.2f}"])
+    if backtest.final_wallet_amount is not None:
+        yield writer.writerow(['Total Trades', backtest.number_of_trades])
+        yield writer.writerow(['Initial Wallet', backtest.initial_wallet_amount])
+        yield writer.writerow(['Final Wallet', backtest.final_wallet_amount])
+        yield writer.writerow(['Total P/L', backtest.total_pnl])
+        yield writer.writerow(['P/L %', backtest.pnl_percentage])
+
+
+class _ChunkSink:
+    """
+    Write-only file object for pyarrow writers. Written bytes are collected
+    until drain() hands them to the response, so only one chunk is buffered.
+    """
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def stream_columnar(backtest: BacktestRun, file_format: str):
+    """
+    Yield a Parquet file (one row group per chunk) or an Arrow IPC stream
+    (one record batch per chunk) of the results. Requires pyarrow.
+    """
+    import pyarrow as pa
+
+    schema = pa.schema([
+        ('stock_symbol', pa.string()),
+        ('signal_date', pa.date32()),
+        ('signal', pa.string()),
+        ('expected_price', pa.float64()),
+        ('actual_close', pa.float64()),
+        ('prev_close', pa.float64()),
+        ('result', pa.string()),
+    ]).with_metadata({'run_id': str(backtest.run_id)})
+
+    sink = _ChunkSink()
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(sink, schema)
+        write = writer.write_table
+        to_chunk = pa.Table.from_batches
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+        write = writer.write_batch
+        to_chunk = lambda batches: batches[0]
+
+    def flush(rows):
+        columns = list(zip(*rows))
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+            schema=schema,
+        )
+        write(to_chunk([batch]))
+
+    rows = []
+    for row in iter_results(backtest):
+        rows.append(row)
+        if len(rows) >= EXPORT_CHUNK_SIZE:
+            flush(rows)
+            rows = []
+            yield sink.drain()
+    if rows:
+        flush(rows)
+
+    writer.close()
+    yield sink.drain()
@@ -0,0 +1,217 @@
+"""
+Vectorized NumPy kernels for the backtest engine.
+
+Every kernel works on one stock's contiguous float64 arrays (a PriceSeries
+from apps.stocks.panel plus signal arrays) and mirrors the
+scalar logic in BacktestEngine exactly (same comparisons, same float
+arithmetic, same ordering), so both engine modes produce identical results.
+"""
+import numpy as np
+
+DIRECTION_UP = 1
+DIRECTION_DOWN = -1
+DIRECTION_NONE = 0
+
+_DIRECTION_CODES = {'UP': DIRECTION_UP, 'DOWN': DIRECTION_DOWN}
+
+
+def signal_arrays(signals):
+    """
+    Convert a list of signal dicts into (dates, directions, expected) arrays.
+    Unknown directions map to DIRECTION_NONE, missing expected values to 0.
+    """
+    dates = np.array([s['date'] for s in signals], dtype='datetime64[D]')
+    directions = np.array(
+        [_DIRECTION_CODES.get(s['signal_direction'], DIRECTION_NONE) for s in signals],
+        dtype=np.int8
+    )
+    expected = np.array(
+        [float(v) if v is not None else 0.0 for v in (s.get('expected_value') for s in signals)],
+        dtype=np.float64
+    )
+    return dates, directions, expected
+
+
+def locate(dates, targets):
+    """
+    Find the index of each target date in the sorted `dates` array.
+    Returns (index, found) where `found` marks exact matches.
+    """
+    idx = np.searchsorted(dates, targets)
+    found = idx < len(dates)
+    found[found] = dates[idx[found]] == targets[found]
+    return idx, found
+
+
+def verify_signals(dates, close, sig_dates, directions, expected,
+                   start_date, end_date, criteria, magnitude_threshold):
+    """
+    Verify signals against actual closes (Today vs Yesterday).
+
+    Returns (kept, actual_close, prev_close, is_win) where `kept` are the
+    positions of verifiable signals in the input order.
+    """
+    start = np.datetime64(start_date, 'D')
+    end = np.datetime64(end_date, 'D')
+
+    idx, found = locate(dates, sig_dates)
+    # Need both the signal day and the previous trading day in the panel,
+    # and a non-zero prediction (NaN passes, as in the scalar engine).
+    keep = (sig_dates >= start) & (sig_dates <= end) & found & (idx >= 1) & (expected != 0)
+    kept = np.flatnonzero(keep)
+
+    pos = idx[kept]
+    actual_close = close[pos]
+    prev_close = close[pos - 1]
+    actual_change = actual_close - prev_close
+    sig_dirs = directions[kept]
+
+    direction_match = ((sig_dirs == DIRECTION_UP) & (actual_change > 0)) | \
+                      ((sig_dirs == DIRECTION_DOWN) & (actual_change < 0))
+
+    if criteria == 'direction':
+        is_win = direction_match
+    elif criteria == 'magnitude':
+        predicted_change = np.abs(expected[kept] - prev_close)
+        threshold_ratio = magnitude_threshold / 100.0
+        is_win = direction_match & (
+            (predicted_change == 0) | (np.abs(actual_change) >= threshold_ratio * predicted_change)
+        )
+    else:
+        is_win = np.zeros(len(kept), dtype=bool)
+
+    return kept, actual_close, prev_close, is_win
+
+
+def simulate_buy_hold(entry_price, last_price, capital):
+    """
+    Buy & Hold: enter at the first BUY signal's close, exit at the last close.
+    Returns (final_cash, trades, qty) where `qty` is the quantity bought.
+    """
+    cash = capital
+    trades = 0
+    qty = 0
+    if entry_price is not None and entry_price > 0:
+        qty = int(cash // entry_price)
+        cash -= (qty * entry_price)
+        cash += (qty * last_price)
+        trades = 2
+    return cash, trades, qty
+
+
+def simulate_re_entry(signal_prices, directions, last_price, capital):
+    """
+    Re-Entry: buy on UP when flat, sell on DOWN when holding, liquidate at the
+    last close. Returns (final_cash, trades, fills) where fills are
+    (signal position, signed quantity) pairs in order.
+
+    Repeated signals in the same direction are no-ops, so the signal stream is
+    first reduced with array ops to its alternating BUY/SELL transitions; only
+    the (few) round trips are then compounded sequentially.
+    """
+    positions = np.flatnonzero(directions != DIRECTION_NONE)
+    if len(positions) == 0:
+        return capital, 0, []
+
+    dirs = directions[positions]
+    changed = np.empty(len(dirs), dtype=bool)
+    changed[0] = True
+    changed[1:] = dirs[1:] != dirs[:-1]
+    positions = positions[changed]
+    if directions[positions[0]] == DIRECTION_DOWN:
+        # Sells while flat do nothing
+        positions = positions[1:]
+
+    buy_positions = positions[0::2]
+    sell_positions = positions[1::2]
+    buys = signal_prices[buy_positions].tolist()
+    sells = signal_prices[sell_positions].tolist()
+
+    cash = capital
+    trades = 0
+    fills = []
+    for n, buy_price in enumerate(buys):
+        qty = int(cash // buy_price) if cash > 0 else 0
+        if qty == 0:
+            # Could not afford an entry: later repeated BUYs matter again,
+            # so finish on the exact scalar path from this signal onwards.
+            offset = int(buy_positions[n])
+            rest_cash, rest_trades, rest_fills = _simulate_re_entry_scalar(
+                signal_prices[offset:].tolist(), directions[offset:].tolist(), last_price, cash
+            )
+            fills.extend((offset + position, fill_qty) for position, fill_qty in rest_fills)
+            return rest_cash, trades + rest_trades, fills
+
+        cash -= (qty * buy_price)
+        trades += 1
+        fills.append((int(buy_positions[n]), qty))
+        if n < len(sells):
+            cash += (qty * sells[n])
+            trades += 1
+            fills.append((int(sell_positions[n]), -qty))
+        else:
+            cash += (qty * last_price)
+
+    return cash, trades, fills
+
+
+def _simulate_re_entry_scalar(prices, directions, last_price, cash):
+    """Exact signal-by-signal Re-Entry simulation (flat at entry)."""
+    holdings_qty = 0
+    trades = 0
+    fills = []
+    for position, (current_price, direction) in enumerate(zip(prices, directions)):
+        if direction == DIRECTION_UP:
+            if holdings_qty == 0 and cash > 0:
+                holdings_qty = int(cash // current_price)
+                if holdings_qty > 0:
+                    cash -= (holdings_qty * current_price)
+                    trades += 1
+                    fills.append((position, holdings_qty))
+        elif direction == DIRECTION_DOWN:
+            if holdings_qty > 0:
+                cash += (holdings_qty * current_price)
+                fills.append((position, -holdings_qty))
+                holdings_qty = 0
+                trades += 1
+
+    if holdings_qty > 0:
+        cash += (holdings_qty * last_price)
+    return cash, trades, fills
+
+
+def equity_curve(close, fill_days, fill_qty, capital):
+    """
+    Daily mark-to-market value of one stock's position.
+
+    `fill_days` index into `close` (trades fill at that day's close) and
+    `fill_qty` are signed quantities (+buy / -sell). Position and cash are
+    cumulative sums of the fills, so the curve is built without a day loop.
+    Returns (equity, invested, traded) where `invested` is the daily position
+    value and `traded` the total notional of all fills.
+    """
+    n = len(close)
+    fill_days = np.asarray(fill_days, dtype=np.int64)
+    fill_qty = np.asarray(fill_qty, dtype=np.float64)
+    fill_value = fill_qty * close[fill_days]
+
+    qty = np.zeros(n, dtype=np.float64)
+    np.add.at(qty, fill_days, fill_qty)
+    cash_flow = np.zeros(n, dtype=np.float64)
+    np.add.at(cash_flow, fill_days, -fill_value)
+
+    invested = np.cumsum(qty) * close
+    equity = capital + np.cumsum(cash_flow) + invested
+    return equity, invested, float(np.abs(fill_value).sum())
+
+
+def align_curve(dates, values, axis, before):
+    """
+    Forward-fill a date-sorted curve onto the sorted `axis` dates;
+    axis dates before the first curve date take the value `before`.
+    """
+    pos = np.searchsorted(dates, axis, side='right') - 1
+    aligned = np.full(len(axis), before, dtype=np.float64)
+    known = pos >= 0
+    aligned[known] = values[pos[known]]
+    return aligned
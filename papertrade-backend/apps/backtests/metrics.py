@@ -0,0 +1,58 @@
+"""
+Risk metrics derived from a backtest's daily equity curve.
+
+All metrics are array operations over the curve built during simulation
+(see BacktestEngine.reduce), so they are computed once per run and stored.
+"""
+from typing import Dict, Any
+import numpy as np
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def risk_metrics(dates, equity, invested, traded: float) -> Dict[str, Any]:
+    """
+    CAGR, max drawdown, Sharpe/Sortino (daily returns, annualised, zero
+    risk-free rate), exposure and turnover of an equity curve.
+
+    - cagr / max_drawdown / exposure are percentages.
+    - exposure: average share of equity held in positions.
+    - turnover: total traded notional / average equity.
+    """
+    if len(equity) == 0 or equity[0] <= 0:
+        return {}
+
+    start_value = float(equity[0])
+    end_value = float(equity[-1])
+    years = (dates[-1] - dates[0]).astype(np.int64) / 365.25
+    cagr = ((end_value / start_value) ** (1 / years) - 1) * 100 if years > 0 and end_value > 0 else None
+
+    peak = np.maximum.accumulate(equity)
+    max_drawdown = float(np.max((peak - equity) / peak)) * 100
+
+    sharpe = sortino = None
+    if len(equity) > 1:
+        returns = np.diff(equity) / equity[:-1]
+        mean = returns.mean()
+        std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+        if std > 0:
+            sharpe = float(mean / std * np.sqrt(TRADING_DAYS_PER_YEAR))
+        downside = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2))
+        if downside > 0:
+            sortino = float(mean / downside * np.sqrt(TRADING_DAYS_PER_YEAR))
+
+    exposure = float(np.mean(np.where(equity > 0, invested / equity, 0.0))) * 100
+    turnover = traded / float(equity.mean()) if equity.mean() > 0 else 0.0
+
+    def rounded(value, digits=4):
+        return round(float(value), digits) if value is not None else None
+
+    return {
+        'cagr': rounded(cagr),
+        'max_drawdown': rounded(max_drawdown),
+        'sharpe_ratio': rounded(sharpe),
+        'sortino_ratio': rounded(sortino),
+        'exposure': rounded(exposure),
+        'turnover': rounded(turnover),
+        'trading_days': len(equity),
+    }
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.4 on 2026-10-17 08:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backtests', '0009_backtestrun_trade_strategy'),
+        ('strategies', '0011_strategysignal_entry_price_strategysignal_exit_price_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BacktestSweep',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sweep_id', models.CharField(db_index=True, max_length=100, unique=True)),
+                ('rules_template', models.JSONField(default=dict)),
+                ('parameters', models.JSONField(default=dict, help_text='{"name": {"values": [...]} or {"range": [start, stop, step]}}')),
+                ('total_combinations', models.IntegerField(default=0)),
+                ('selection_mode', models.CharField(choices=[('stock', 'Specific Stocks'), ('sector', 'Sector'), ('category', 'Category'), ('watchlist', 'My Watchlist')], default='stock', max_length=20)),
+                ('selection_config', models.JSONField(blank=True, default=dict)),
+                ('criteria_type', models.CharField(choices=[('direction', 'Direction Only (UP/DOWN)'), ('magnitude', 'Direction + Magnitude (50%)')], default='direction', max_length=20)),
+                ('magnitude_threshold', models.IntegerField(default=50)),
+                ('trade_strategy', models.CharField(blank=True, choices=[('re_entry', 'Active Trading (Re-Entry at Signal)'), ('buy_hold', 'Buy & Hold (First Signal to End)')], max_length=20, null=True)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('initial_wallet_amount', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('rank_by', models.CharField(choices=[('win_rate', 'Win Rate'), ('pnl', 'Total P/L')], default='win_rate', max_length=20)),
+                ('results_json', models.JSONField(blank=True, default=list)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('time_taken', models.FloatField(blank=True, help_text='Execution time in seconds', null=True)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('strategy_rule_based', models.ForeignKey(blank=True, help_text='Strategy the template was taken from', null=True, on_delete=django.db.models.deletion.SET_NULL, to='strategies.strategyrulebased')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='backtest_sweeps', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Backtest Sweep',
+                'verbose_name_plural': 'Backtest Sweeps',
+                'db_table': 'backtest_sweeps',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-17 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backtests', '0010_backtestsweep'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backtestrun',
+            name='walk_forward_config',
+            field=models.JSONField(blank=True, default=dict, help_text='in_sample_days, out_of_sample_days, step_days, rules_template, parameters, rank_by'),
+        ),
+        migrations.AddField(
+            model_name='backtestrun',
+            name='walk_forward_windows',
+            field=models.JSONField(blank=True, default=list, help_text='Per-window best parameters and scores'),
+        ),
+    ]
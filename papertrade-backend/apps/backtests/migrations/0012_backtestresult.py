@@ -0,0 +1,34 @@
+# Generated by Django 5.1.4 on 2026-10-17 08:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backtests', '0011_backtestrun_walk_forward'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BacktestResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock_symbol', models.CharField(max_length=50)),
+                ('signal_date', models.DateField()),
+                ('signal', models.CharField(max_length=10)),
+                ('expected_price', models.FloatField(blank=True, null=True)),
+                ('actual_close', models.FloatField()),
+                ('prev_close', models.FloatField()),
+                ('result', models.CharField(choices=[('WIN', 'Win'), ('LOSS', 'Loss')], max_length=10)),
+                ('backtest_run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='signal_results', to='backtests.backtestrun')),
+            ],
+            options={
+                'verbose_name': 'Backtest Result',
+                'verbose_name_plural': 'Backtest Results',
+                'db_table': 'backtest_results',
+                'indexes': [models.Index(fields=['backtest_run', 'stock_symbol', 'signal_date'], name='backtest_re_backtes_cf5135_idx')],
+            },
+        ),
+    ]
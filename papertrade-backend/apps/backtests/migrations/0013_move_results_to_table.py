@@ -0,0 +1,42 @@
+from datetime import date
+from django.db import migrations
+
+BATCH_SIZE = 5000
+
+
+def move_results_to_table(apps, schema_editor):
+    """Copy list_of_trades_json blobs into backtest_results and clear them."""
+    BacktestRun = apps.get_model('backtests', 'BacktestRun')
+    BacktestResult = apps.get_model('backtests', 'BacktestResult')
+
+    run_ids = BacktestRun.objects.exclude(list_of_trades_json=[]).values_list('id', flat=True)
+    for run_id in list(run_ids):
+        run = BacktestRun.objects.only('id', 'list_of_trades_json').get(id=run_id)
+        rows = []
+        for item in run.list_of_trades_json or []:
+            # Only verification rows (older trade-style rows have no signal_date)
+            if not isinstance(item, dict) or 'signal_date' not in item:
+                continue
+            rows.append(BacktestResult(
+                backtest_run_id=run.id,
+                stock_symbol=item.get('stock_symbol', ''),
+                signal_date=date.fromisoformat(str(item['signal_date'])[:10]),
+                signal=item.get('signal', ''),
+                expected_price=item.get('expected_price'),
+                actual_close=item.get('actual_close') or 0,
+                prev_close=item.get('prev_close') or 0,
+                result=item.get('result', 'LOSS'),
+            ))
+        BacktestResult.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        BacktestRun.objects.filter(id=run.id).update(list_of_trades_json=[])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backtests', '0012_backtestresult'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_results_to_table, migrations.RunPython.noop),
+    ]
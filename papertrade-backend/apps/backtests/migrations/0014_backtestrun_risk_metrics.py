@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-17 08:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backtests', '0013_move_results_to_table'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backtestrun',
+            name='risk_metrics',
+            field=models.JSONField(blank=True, default=dict, help_text='CAGR, max drawdown, Sharpe/Sortino, exposure, turnover'),
+        ),
+        migrations.AlterField(
+            model_name='backtestrun',
+            name='equity_curve_json',
+            field=models.JSONField(blank=True, default=dict, help_text='Daily mark-to-market equity: {"dates": [...], "equity": [...]}'),
+        ),
+    ]
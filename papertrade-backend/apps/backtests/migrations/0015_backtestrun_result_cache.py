@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-17 08:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backtests', '0014_backtestrun_risk_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backtestrun',
+            name='cache_hit',
+            field=models.BooleanField(default=False, help_text='Results cloned from an identical earlier run'),
+        ),
+        migrations.AddField(
+            model_name='backtestrun',
+            name='price_data_version',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='backtestrun',
+            name='spec_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
@@ -62,7 +62,13 @@ class BacktestRun(models.Model):
     
     # Detailed results
     list_of_trades_json = models.JSONField(default=list, blank=True) # Renamed conceptually to "predictions" but keeping field name for now
-    equity_curve_json = models.JSONField(default=list, blank=True)
+    equity_curve_json = models.JSONField(default=dict, blank=True, help_text='Daily mark-to-market equity: {"dates": [...], "equity": [...]}')
+    risk_metrics = models.JSONField(default=dict, blank=True, help_text='CAGR, max drawdown, Sharpe/Sortino, exposure, turnover')
+    
+    # Walk-forward optimisation (empty config = normal run)
+    walk_forward_config = models.JSONField(default=dict, blank=True,
+                                           help_text='in_sample_days, out_of_sample_days, step_days, rules_template, parameters, rank_by')
+    walk_forward_windows = models.JSONField(default=list, blank=True, help_text='Per-window best parameters and scores')
     
     # Deprecated / Legacy
     instrument_type = models.CharField(max_length=10, default='stock')
@@ -77,6 +83,11 @@ class BacktestRun(models.Model):
     time_taken = models.FloatField(null=True, blank=True, help_text='Execution time in seconds')
     error_message = models.TextField(blank=True)
     
+    # Result cache (see cache.py): identical spec + price data => cloned results
+    spec_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    price_data_version = models.CharField(max_length=64, blank=True)
+    cache_hit = models.BooleanField(default=False, help_text='Results cloned from an identical earlier run')
+    
     extra = models.JSONField(default=dict, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
@@ -92,6 +103,35 @@ class BacktestRun(models.Model):
         return f"{self.run_id} - {self.user.email}"
 
 
+class BacktestResult(models.Model):
+    """Per-signal verification result of a backtest run."""
+    
+    RESULT_CHOICES = [
+        ('WIN', 'Win'),
+        ('LOSS', 'Loss'),
+    ]
+    
+    backtest_run = models.ForeignKey(BacktestRun, on_delete=models.CASCADE, related_name='signal_results')
+    stock_symbol = models.CharField(max_length=50)
+    signal_date = models.DateField()
+    signal = models.CharField(max_length=10)
+    expected_price = models.FloatField(null=True, blank=True)
+    actual_close = models.FloatField()
+    prev_close = models.FloatField()
+    result = models.CharField(max_length=10, choices=RESULT_CHOICES)
+    
+    class Meta:
+        db_table = 'backtest_results'
+        verbose_name = 'Backtest Result'
+        verbose_name_plural = 'Backtest Results'
+        indexes = [
+            models.Index(fields=['backtest_run', 'stock_symbol', 'signal_date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.stock_symbol} - {self.signal_date} - {self.result}"
+
+
 class Trade(models.Model):
     """Individual trade record."""
     
@@ -155,3 +195,55 @@ class Trade(models.Model):
     
     def __str__(self):
         return f"{self.stock_enum} - {self.buy_date}"
+
+
+class BacktestSweep(models.Model):
+    """Parameter sweep (grid search) of a rule-based strategy template."""
+    
+    STATUS_CHOICES = BacktestRun.STATUS_CHOICES
+    
+    RANK_BY_CHOICES = [
+        ('win_rate', 'Win Rate'),
+        ('pnl', 'Total P/L'),
+    ]
+    
+    sweep_id = models.CharField(max_length=100, unique=True, db_index=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='backtest_sweeps')
+    
+    # Template: rules_json with "{param}" placeholders, plus parameter ranges
+    strategy_rule_based = models.ForeignKey(StrategyRuleBased, on_delete=models.SET_NULL,
+                                           null=True, blank=True, help_text='Strategy the template was taken from')
+    rules_template = models.JSONField(default=dict)
+    parameters = models.JSONField(default=dict, help_text='{"name": {"values": [...]} or {"range": [start, stop, step]}}')
+    total_combinations = models.IntegerField(default=0)
+    
+    # Same backtest parameters as BacktestRun
+    selection_mode = models.CharField(max_length=20, choices=BacktestRun.SELECTION_MODE_CHOICES, default='stock')
+    selection_config = models.JSONField(default=dict, blank=True)
+    criteria_type = models.CharField(max_length=20, choices=BacktestRun.CRITERIA_TYPE_CHOICES, default='direction')
+    magnitude_threshold = models.IntegerField(default=50)
+    trade_strategy = models.CharField(max_length=20, choices=BacktestRun.TRADE_STRATEGY_CHOICES, null=True, blank=True)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    initial_wallet_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    rank_by = models.CharField(max_length=20, choices=RANK_BY_CHOICES, default='win_rate')
+    
+    # Ranked table: one row per combination (params + accuracy + PnL)
+    results_json = models.JSONField(default=list, blank=True)
+    
+    # Execution metadata
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    time_taken = models.FloatField(null=True, blank=True, help_text='Execution time in seconds')
+    error_message = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'backtest_sweeps'
+        verbose_name = 'Backtest Sweep'
+        verbose_name_plural = 'Backtest Sweeps'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.sweep_id} - {self.user.email}"
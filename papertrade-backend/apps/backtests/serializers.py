@@ -1,13 +1,16 @@
+from django.db.models import Count, F, FloatField, Q
+from django.db.models.functions import Cast
 from rest_framework import serializers
-from .models import BacktestRun, Trade
+from .models import BacktestRun, BacktestSweep, Trade
 
 
-class BacktestRunSerializer(serializers.ModelSerializer):
+class BacktestRunSummarySerializer(serializers.ModelSerializer):
+    """List view: run metadata and headline stats, without the detail payloads."""
     strategy_details = serializers.SerializerMethodField()
 
     class Meta:
         model = BacktestRun
-        fields = '__all__'
+        exclude = ['list_of_trades_json', 'equity_curve_json', 'walk_forward_windows', 'strategy_custom_script']
         read_only_fields = ['user', 'run_id', 'status', 'final_wallet_amount', 
                            'total_pnl', 'pnl_percentage', 'time_taken']
 
@@ -21,6 +24,27 @@ class BacktestRunSerializer(serializers.ModelSerializer):
         return None
 
 
+class BacktestRunSerializer(BacktestRunSummarySerializer):
+    top_stocks = serializers.SerializerMethodField()
+
+    class Meta(BacktestRunSummarySerializer.Meta):
+        exclude = None
+        fields = '__all__'
+
+    def get_top_stocks(self, obj):
+        """Top 5 stocks by win rate (aggregated in SQL from backtest_results)."""
+        rows = obj.signal_results.values('stock_symbol').annotate(
+            total=Count('id'),
+            wins=Count('id', filter=Q(result='WIN')),
+        ).annotate(
+            rate=Cast(F('wins'), FloatField()) * 100 / Cast(F('total'), FloatField())
+        ).order_by('-rate', '-wins', 'stock_symbol')[:5]
+        return [
+            {'symbol': r['stock_symbol'], 'wins': r['wins'], 'total': r['total'], 'rate': r['rate']}
+            for r in rows
+        ]
+
+
 class TradeSerializer(serializers.ModelSerializer):
     stock_symbol = serializers.CharField(source='stock.symbol', read_only=True)
     
@@ -57,3 +81,49 @@ class BacktestRunRequestSerializer(serializers.Serializer):
     initial_wallet = serializers.DecimalField(max_digits=15, decimal_places=2, default=0, required=False)
     trade_strategy = serializers.ChoiceField(choices=['re_entry', 'buy_hold'], required=False, allow_null=True)
     execution_mode = serializers.ChoiceField(choices=['signal_close', 'next_open'], default='signal_close')
+    
+    # Walk-forward optimisation (rule-based strategies only)
+    walk_forward = serializers.JSONField(required=False, help_text='{"in_sample_days", "out_of_sample_days", "step_days", "parameters", "rules_template", "rank_by"}')
+
+
+class BacktestSweepSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BacktestSweep
+        fields = '__all__'
+        read_only_fields = ['user', 'sweep_id', 'status', 'results_json',
+                           'total_combinations', 'time_taken', 'error_message']
+
+
+class BacktestSweepRequestSerializer(serializers.Serializer):
+    """Serializer for parameter sweep request."""
+    
+    # Template: explicit rules_template, or the rules_json of a rule-based strategy
+    strategy_rule_based = serializers.IntegerField(required=False, help_text="ID of StrategyRuleBased to use as template")
+    rules_template = serializers.JSONField(required=False, help_text='rules_json with "{param}" placeholders')
+    parameters = serializers.JSONField(help_text='{"name": {"values": [...]} or {"range": [start, stop, step]}}')
+    rank_by = serializers.ChoiceField(choices=['win_rate', 'pnl'], default='win_rate')
+
+    # Selection
+    selection_mode = serializers.ChoiceField(choices=['stock', 'sector', 'category', 'watchlist'])
+    selection_config = serializers.JSONField(default=dict)
+    
+    # Criteria
+    criteria_type = serializers.ChoiceField(choices=['direction', 'magnitude'], default='direction')
+    magnitude_threshold = serializers.IntegerField(required=False, default=50, min_value=0, max_value=100)
+    
+    # Range
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    
+    # PnL
+    initial_wallet = serializers.DecimalField(max_digits=15, decimal_places=2, default=0, required=False)
+    trade_strategy = serializers.ChoiceField(choices=['re_entry', 'buy_hold'], required=False, allow_null=True)
+
+    def validate(self, attrs):
+        if not attrs.get('strategy_rule_based') and not attrs.get('rules_template'):
+            raise serializers.ValidationError("Must provide either 'rules_template' or 'strategy_rule_based'.")
+        if attrs.get('rules_template') is not None and not isinstance(attrs['rules_template'], dict):
+            raise serializers.ValidationError({'rules_template': 'Must be an object.'})
+        if not isinstance(attrs.get('parameters'), dict) or not attrs['parameters']:
+            raise serializers.ValidationError({'parameters': 'Must be a non-empty object.'})
+        return attrs
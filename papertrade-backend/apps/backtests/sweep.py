@@ -0,0 +1,259 @@
+"""
+Parameter sweep (grid search) for rule-based strategies.
+
+A sweep takes a rules_json template whose values contain "{name}"
+placeholders and a range/list per parameter, and evaluates every
+combination against one loaded price panel. Indicator frames are built
+once per stock and reused by all combinations.
+"""
+import itertools
+import logging
+import re
+from decimal import Decimal
+from typing import List, Dict, Any
+from django.utils import timezone
+from .models import BacktestRun, BacktestSweep
+from .engine import BacktestEngine
+from apps.stocks.models import Stock
+from apps.stocks.panel import PricePanel
+from apps.strategies.logic import StrategyEngine
+from apps.strategies.registry import IndicatorSet
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER = re.compile(r'^\{(\w+)\}$')
+
+
+class ParameterSweep:
+    """Grid search over a rules_json template."""
+
+    DEFAULT_MAX_COMBINATIONS = 500
+
+    def __init__(self, sweep: BacktestSweep, engine_mode: str = None):
+        self.sweep = sweep
+        self.engine_mode = engine_mode
+
+    @staticmethod
+    def _range(spec):
+        """(start, step, count) of a {"range": [start, stop, step]} spec (stop inclusive)."""
+        try:
+            start, stop, step = (Decimal(str(v)) for v in spec['range'])
+        except (TypeError, ValueError, ArithmeticError):
+            raise ValueError('"range" must be [start, stop, step]')
+        if not all(v.is_finite() for v in (start, stop, step)) or step <= 0 or stop < start:
+            raise ValueError('"range" needs finite values, step > 0 and stop >= start')
+        # Decimal steps avoid float drift (e.g. 0.1 increments)
+        return start, step, int((stop - start) / step) + 1
+
+    @classmethod
+    def parameter_count(cls, spec) -> int:
+        """Number of values of one parameter, without building them."""
+        if not isinstance(spec, dict):
+            raise ValueError('Parameter spec must be an object with "values" or "range"')
+
+        if 'values' in spec:
+            values = spec['values']
+            if not isinstance(values, list) or not values:
+                raise ValueError('"values" must be a non-empty list')
+            return len(values)
+
+        if 'range' in spec:
+            return cls._range(spec)[2]
+
+        raise ValueError('Parameter spec must have "values" or "range"')
+
+    @classmethod
+    def parameter_values(cls, spec) -> List[Any]:
+        """
+        Values of one parameter:
+        {"values": [...]} or {"range": [start, stop, step]} (stop inclusive).
+        """
+        cls.parameter_count(spec)
+        if 'values' in spec:
+            return spec['values']
+
+        start, step, count = cls._range(spec)
+        values = [start + step * i for i in range(count)]
+        return [int(v) if v == v.to_integral_value() else float(v) for v in values]
+
+    @classmethod
+    def expand(cls, rules_template: Dict[str, Any], parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        All combinations of the parameter grid, in a stable order.
+        Returns [{'params': {...}, 'rules_json': {...}}, ...].
+        """
+        cls.validate(rules_template, parameters, cls.get_max_combinations())
+
+        names = sorted(parameters)
+        grids = [cls.parameter_values(parameters[name]) for name in names]
+
+        combinations = []
+        for values in itertools.product(*grids):
+            params = dict(zip(names, values))
+            combinations.append({
+                'params': params,
+                'rules_json': cls.substitute(rules_template, params),
+            })
+        return combinations
+
+    @classmethod
+    def validate(cls, rules_template: Dict[str, Any], parameters: Dict[str, Any],
+                 max_combinations: int = None) -> int:
+        """
+        Check that every placeholder has values and every spec is valid.
+        Returns the number of combinations, counted without expanding the
+        grid; with `max_combinations`, a larger grid (or parameter) is rejected.
+        """
+        missing = cls.placeholders(rules_template) - set(parameters)
+        if missing:
+            raise ValueError(f'No values for placeholders: {", ".join(sorted(missing))}')
+
+        total = 1
+        for name in sorted(parameters):
+            count = cls.parameter_count(parameters[name])
+            if max_combinations is not None and count > max_combinations:
+                raise ValueError(f'Parameter "{name}" has {count} values, over the limit of {max_combinations}')
+            total *= count
+        if max_combinations is not None and total > max_combinations:
+            raise ValueError(f'{total} combinations exceed the limit of {max_combinations}')
+        return total
+
+    @classmethod
+    def placeholders(cls, node) -> set:
+        """Placeholder names used anywhere in the template."""
+        names = set()
+        if isinstance(node, dict):
+            for value in node.values():
+                names |= cls.placeholders(value)
+        elif isinstance(node, list):
+            for value in node:
+                names |= cls.placeholders(value)
+        elif isinstance(node, str):
+            match = _PLACEHOLDER.match(node)
+            if match:
+                names.add(match.group(1))
+        return names
+
+    @classmethod
+    def substitute(cls, node, params: Dict[str, Any]):
+        """Copy of the template with every "{name}" string replaced by its value."""
+        if isinstance(node, dict):
+            return {k: cls.substitute(v, params) for k, v in node.items()}
+        if isinstance(node, list):
+            return [cls.substitute(v, params) for v in node]
+        if isinstance(node, str):
+            match = _PLACEHOLDER.match(node)
+            if match and match.group(1) in params:
+                return params[match.group(1)]
+        return node
+
+    @classmethod
+    def get_max_combinations(cls) -> int:
+        """Combination limit from SystemConfig ('backtest.sweep_max_combinations')."""
+        from apps.adminpanel.models import SystemConfig
+        config = SystemConfig.objects.filter(key='backtest.sweep_max_combinations').first()
+        try:
+            return int(config.value) if config else cls.DEFAULT_MAX_COMBINATIONS
+        except ValueError:
+            return cls.DEFAULT_MAX_COMBINATIONS
+
+    def execute(self, stock_ids: List[int]):
+        """Evaluate every combination and store the ranked table on the sweep."""
+        start_time = timezone.now()
+        sweep = self.sweep
+
+        try:
+            if self.engine_mode is None:
+                self.engine_mode = BacktestEngine.get_engine_mode()
+
+            sweep.status = 'running'
+            sweep.save()
+
+            combinations = self.expand(sweep.rules_template, sweep.parameters)
+
+            stocks = list(Stock.objects.filter(id__in=stock_ids, status='active'))
+            if not stocks:
+                raise ValueError('No active stocks found')
+
+            # One panel for all combinations (same buffer as BacktestEngine)
+            fetch_start = sweep.start_date - BacktestEngine.FETCH_BUFFER
+            panel = PricePanel.load([stock.id for stock in stocks], fetch_start, sweep.end_date, indicators=True)
+
+            # Per-stock indicator sets shared by all combinations
+            indicator_sets = {stock.id: IndicatorSet(panel.series(stock.id)) for stock in stocks}
+
+            rows = []
+            for combination in combinations:
+                rows.append(self._evaluate(stocks, panel, indicator_sets, combination))
+
+            sweep.results_json = self.rank(rows, sweep.rank_by)
+            sweep.total_combinations = len(rows)
+            sweep.status = 'completed'
+            sweep.time_taken = (timezone.now() - start_time).total_seconds()
+            sweep.save()
+
+            logger.info(f"Sweep {sweep.sweep_id} completed ({len(rows)} combinations)")
+
+        except Exception as e:
+            logger.error(f"Sweep {sweep.sweep_id} failed: {str(e)}")
+            sweep.status = 'failed'
+            sweep.error_message = str(e)
+            sweep.save()
+            raise
+
+    def _evaluate(self, stocks, panel, indicator_sets, combination) -> Dict[str, Any]:
+        """Backtest one combination in memory (an unsaved BacktestRun)."""
+        sweep = self.sweep
+        rules_json = combination['rules_json']
+
+        run = BacktestRun(
+            run_id=sweep.sweep_id,
+            user=sweep.user,
+            criteria_type=sweep.criteria_type,
+            magnitude_threshold=sweep.magnitude_threshold,
+            trade_strategy=sweep.trade_strategy,
+            start_date=sweep.start_date,
+            end_date=sweep.end_date,
+            initial_wallet_amount=sweep.initial_wallet_amount,
+        )
+        engine = BacktestEngine(run, engine_mode=self.engine_mode)
+
+        def calculator(prices):
+            return StrategyEngine.calculate_rule_based_strategy(
+                prices, rules_json, indicator_set=indicator_sets[prices.stock_id]
+            )
+
+        engine.run_stocks(stocks, panel, calculator, engine.capital_per_stock(len(stocks)))
+        engine.reduce([engine.partial()])
+
+        return dict(self.summarize(run), params=combination['params'])
+
+    @staticmethod
+    def summarize(run: BacktestRun) -> Dict[str, Any]:
+        """Accuracy and PnL figures of an evaluated (reduced) run."""
+        return {
+            'total_signals': run.total_signals,
+            'win_count': run.win_count,
+            'loss_count': run.loss_count,
+            'win_rate': round(float(run.win_rate), 2),
+            'final_wallet_amount': round(float(run.final_wallet_amount), 2) if run.final_wallet_amount is not None else None,
+            'total_pnl': round(float(run.total_pnl), 2) if run.total_pnl is not None else None,
+            'pnl_percentage': round(float(run.pnl_percentage), 2) if run.pnl_percentage is not None else None,
+            'number_of_trades': run.number_of_trades,
+        }
+
+    @staticmethod
+    def rank(rows: List[Dict[str, Any]], rank_by: str = 'win_rate') -> List[Dict[str, Any]]:
+        """Sort best first (ties broken by the other metric) and number the rows."""
+        def pnl(row):
+            return row['total_pnl'] if row['total_pnl'] is not None else float('-inf')
+
+        if rank_by == 'pnl':
+            key = lambda row: (pnl(row), row['win_rate'])
+        else:
+            key = lambda row: (row['win_rate'], pnl(row))
+
+        ranked = sorted(rows, key=key, reverse=True)
+        for i, row in enumerate(ranked, start=1):
+            row['rank'] = i
+        return ranked
@@ -1,10 +1,12 @@
 """
 Celery tasks for backtest execution.
 """
-from celery import shared_task
+from celery import shared_task, chord
 import logging
+from datetime import datetime
+from django.utils import timezone
 from .models import BacktestRun
-from .engine import BacktestEngine
+from .engine import BacktestEngine, run_backtest_shard
 from apps.notifications.models import Notification
 
 logger = logging.getLogger(__name__)
@@ -53,19 +55,18 @@ def execute_backtest_task(backtest_run_id: int, stock_ids: list, execution_mode:
                 backtest_run.save()
                 raise Exception(f'Global concurrent backtest limit exceeded: {global_limit}')
         
-        # Execute backtest
         engine = BacktestEngine(backtest_run)
-        engine.execute(stock_ids, execution_mode)
+        shard_size = BacktestEngine.get_shard_size()
         
-        # Create notification
-        Notification.objects.create(
-            user=backtest_run.user,
-            title='Backtest Completed',
-            message=f'Your backtest {backtest_run.run_id} has completed successfully. '
-                   f'Total P/L: ₹{backtest_run.total_pnl}',
-            notification_type='success',
-        )
+        if len(stock_ids) > shard_size and not backtest_run.walk_forward_config:
+            # Sharded execution: fan shards out to workers, merge in a chord callback
+            _dispatch_shards(engine, stock_ids, shard_size)
+            return
+        
+        # Execute backtest
+        engine.execute(stock_ids, execution_mode)
         
+        _notify_completed(backtest_run)
         logger.info(f"Backtest task completed for run {backtest_run.run_id}")
         
     except BacktestRun.DoesNotExist:
@@ -76,11 +77,143 @@ def execute_backtest_task(backtest_run_id: int, stock_ids: list, execution_mode:
         # Create error notification
         try:
             backtest_run = BacktestRun.objects.get(id=backtest_run_id)
-            Notification.objects.create(
-                user=backtest_run.user,
-                title='Backtest Failed',
-                message=f'Your backtest {backtest_run.run_id} failed: {str(e)}',
-                notification_type='error',
-            )
+            _notify_failed(backtest_run, e)
         except:
             pass
+
+
+def _dispatch_shards(engine: BacktestEngine, stock_ids: list, shard_size: int):
+    """Split the run into shards and start the group -> merge chord."""
+    started_at = timezone.now()
+    try:
+        stock_ids = engine.prepare(stock_ids)
+        if engine.load_cached(stock_ids, started_at):
+            _notify_completed(engine.backtest_run)
+            return
+    except Exception as e:
+        engine.fail(e)
+        raise
+    
+    capital = engine.capital_per_stock(len(stock_ids))
+    shards = BacktestEngine.split_shards(stock_ids, shard_size)
+    run_id = engine.backtest_run.id
+    
+    chord(
+        execute_backtest_shard_task.s(run_id, shard, capital, engine.engine_mode)
+        for shard in shards
+    )(merge_backtest_shards_task.s(run_id, started_at.isoformat()).on_error(
+        fail_backtest_shards_task.s(run_id)
+    ))
+    
+    logger.info(f"Backtest {engine.backtest_run.run_id} dispatched as {len(shards)} shards")
+
+
+@shared_task
+def execute_backtest_shard_task(backtest_run_id: int, stock_ids: list, capital_per_stock: float, engine_mode: str = None):
+    """
+    Execute one shard of a backtest.
+    Errors are returned (not raised) so the merge step can fail the run.
+    """
+    try:
+        return run_backtest_shard(backtest_run_id, stock_ids, capital_per_stock, engine_mode)
+    except Exception as e:
+        logger.error(f"Backtest shard failed for run {backtest_run_id}: {str(e)}")
+        return {'error': str(e)}
+
+
+@shared_task
+def merge_backtest_shards_task(partials: list, backtest_run_id: int, started_at: str):
+    """Reduce step: merge shard partials into the BacktestRun."""
+    try:
+        backtest_run = BacktestRun.objects.get(id=backtest_run_id)
+    except BacktestRun.DoesNotExist:
+        logger.error(f"BacktestRun {backtest_run_id} not found")
+        return
+    
+    engine = BacktestEngine(backtest_run)
+    errors = [p['error'] for p in partials if 'error' in p]
+    if errors:
+        engine.fail(errors[0])
+        _notify_failed(backtest_run, errors[0])
+        return
+    
+    try:
+        time_taken = (timezone.now() - datetime.fromisoformat(started_at)).total_seconds()
+        engine.merge(partials, time_taken)
+    except Exception as e:
+        engine.fail(e)
+        _notify_failed(backtest_run, e)
+        return
+    
+    _notify_completed(backtest_run)
+    logger.info(f"Backtest task completed for run {backtest_run.run_id} ({len(partials)} shards)")
+
+
+@shared_task
+def fail_backtest_shards_task(request, exc, traceback, backtest_run_id: int):
+    """
+    Chord error callback: a shard or the merge step raised (e.g. a lost
+    worker), so the merge never closed the run. Fail it if still running.
+    """
+    try:
+        backtest_run = BacktestRun.objects.get(id=backtest_run_id)
+    except BacktestRun.DoesNotExist:
+        logger.error(f"BacktestRun {backtest_run_id} not found")
+        return
+    
+    if backtest_run.status != 'running':
+        return
+    
+    BacktestEngine(backtest_run).fail(exc)
+    _notify_failed(backtest_run, exc)
+
+
+def _notify_completed(backtest_run: BacktestRun):
+    # Create notification
+    Notification.objects.create(
+        user=backtest_run.user,
+        title='Backtest Completed',
+        message=f'Your backtest {backtest_run.run_id} has completed successfully. '
+               f'Total P/L: ₹{backtest_run.total_pnl}',
+        notification_type='success',
+    )
+
+
+def _notify_failed(backtest_run: BacktestRun, error):
+    Notification.objects.create(
+        user=backtest_run.user,
+        title='Backtest Failed',
+        message=f'Your backtest {backtest_run.run_id} failed: {str(error)}',
+        notification_type='error',
+    )
+
+
+@shared_task
+def execute_sweep_task(sweep_id: int, stock_ids: list):
+    """Execute a parameter sweep in background."""
+    from .models import BacktestSweep
+    from .sweep import ParameterSweep
+    
+    try:
+        sweep = BacktestSweep.objects.get(id=sweep_id)
+    except BacktestSweep.DoesNotExist:
+        logger.error(f"BacktestSweep {sweep_id} not found")
+        return
+    
+    try:
+        ParameterSweep(sweep).execute(stock_ids)
+        Notification.objects.create(
+            user=sweep.user,
+            title='Parameter Sweep Completed',
+            message=f'Your parameter sweep {sweep.sweep_id} has completed '
+                   f'({sweep.total_combinations} combinations).',
+            notification_type='success',
+        )
+    except Exception as e:
+        logger.error(f"Sweep task failed: {str(e)}")
+        Notification.objects.create(
+            user=sweep.user,
+            title='Parameter Sweep Failed',
+            message=f'Your parameter sweep {sweep.sweep_id} failed: {str(e)}',
+            notification_type='error',
+        )
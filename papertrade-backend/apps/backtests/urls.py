@@ -5,8 +5,10 @@ from . import views
 router = DefaultRouter()
 router.register(r'runs', views.BacktestRunViewSet, basename='backtest-run')
 router.register(r'trades', views.TradeViewSet, basename='trade')
+router.register(r'sweeps', views.BacktestSweepViewSet, basename='backtest-sweep')
 
 urlpatterns = [
     path('run/', views.run_backtest, name='run-backtest'),
+    path('sweep/', views.run_sweep, name='run-sweep'),
     path('', include(router.urls)),
 ]
@@ -1,11 +1,17 @@
 from rest_framework import viewsets
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.permissions import IsAuthenticated
+from django.db.models import Q
 from django.utils import timezone
+import base64
+import json
 import uuid
 from apps.users.utils import get_success_response, get_error_response
-from .models import BacktestRun, Trade
-from .serializers import BacktestRunSerializer, TradeSerializer, BacktestRunRequestSerializer
+from .models import BacktestRun, BacktestSweep, Trade
+from .serializers import (
+    BacktestRunSerializer, BacktestRunSummarySerializer, TradeSerializer, BacktestRunRequestSerializer,
+    BacktestSweepSerializer, BacktestSweepRequestSerializer,
+)
 
 
 class BacktestRunViewSet(viewsets.ModelViewSet):
@@ -18,8 +24,14 @@ class BacktestRunViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return self.queryset.filter(user=self.request.user)
     
+    def get_serializer_class(self):
+        # List views don't ship detail payloads (results live in backtest_results)
+        if self.action == 'list':
+            return BacktestRunSummarySerializer
+        return BacktestRunSerializer
+    
     def list(self, request):
-        queryset = self.get_queryset().order_by('-created_at')
+        queryset = self.get_queryset().select_related('strategy_predefined').order_by('-created_at')
         
         # Pagination parameters
         page_size = int(request.query_params.get('page_size', 10))
@@ -71,96 +83,129 @@ class BacktestRunViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def export_csv(self, request, pk=None):
-        """Export backtest results as CSV."""
-        import csv
-        import os
-        from django.http import HttpResponse
-        from django.conf import settings
-        
+        """Export backtest results as CSV (streamed from backtest_results)."""
+        from django.http import StreamingHttpResponse
+        from .exports import stream_csv
+
         try:
             backtest = self.get_queryset().get(pk=pk)
-            
-            # Create CSV response
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="backtest_{backtest.run_id}.csv"'
-            
-            writer = csv.writer(response)
-            
-            # Write header
-            writer.writerow([
-                'Run ID', 'Stock', 'Buy Date', 'Buy Price', 'Sell Date', 
-                'Sell Price', 'Quantity', 'P/L', 'P/L %'
-            ])
-            
-            # Write trades
-            for trade in backtest.list_of_trades_json:
-                buy_price = float(trade['buy_price'])
-                sell_price = float(trade['sell_price'])
-                pnl = float(trade['pnl'])
-                pnl_pct = ((sell_price - buy_price) / buy_price * 100) if buy_price > 0 else 0
-                
-                writer.writerow([
-                    backtest.run_id,
-                    trade['stock_symbol'],
-                    trade['buy_date'],
-                    f"₹{buy_price:.2f}",
-                    trade['sell_date'],
-                    f"₹{sell_price:.2f}",
-                    trade['quantity'],
-                    f"₹{pnl:.2f}",
-                    f"{pnl_pct:.2f}%"
-                ])
-            
-            # Write summary
-            writer.writerow([])
-            writer.writerow(['Summary'])
-            writer.writerow(['Total Trades', backtest.number_of_trades])
-            writer.writerow(['Initial Wallet', f"₹{backtest.initial_wallet_amount}"])
-            writer.writerow(['Final Wallet', f"₹{backtest.final_wallet_amount}"])
-            writer.writerow(['Total P/L', f"₹{backtest.total_pnl}"])
-            writer.writerow(['P/L %', f"{backtest.pnl_percentage}%"])
-            
-            return response
-            
         except BacktestRun.DoesNotExist:
             return get_error_response('BACKTEST_NOT_FOUND', 'Backtest not found', status_code=404)
 
+        response = StreamingHttpResponse(stream_csv(backtest), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="backtest_{backtest.run_id}.csv"'
+        return response
+
+    @action(detail=True, methods=['get'])
+    def export(self, request, pk=None):
+        """
+        Export backtest results in a columnar format for pandas/Arrow users.
+        ?type=parquet (default) or ?type=arrow (Arrow IPC stream); needs pyarrow.
+        """
+        from django.http import StreamingHttpResponse
+        from .exports import COLUMNAR_FORMATS, stream_columnar
+
+        file_format = request.query_params.get('type', 'parquet')
+        if file_format not in COLUMNAR_FORMATS:
+            return get_error_response(
+                'VALIDATION_ERROR',
+                f'type must be one of: {", ".join(COLUMNAR_FORMATS)}',
+                status_code=400
+            )
+
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return get_error_response(
+                'EXPORT_UNAVAILABLE', 'Columnar export requires pyarrow on the server', status_code=501
+            )
+
+        try:
+            backtest = self.get_queryset().get(pk=pk)
+        except BacktestRun.DoesNotExist:
+            return get_error_response('BACKTEST_NOT_FOUND', 'Backtest not found', status_code=404)
+
+        content_type, extension = COLUMNAR_FORMATS[file_format]
+        response = StreamingHttpResponse(stream_columnar(backtest, file_format), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="backtest_{backtest.run_id}.{extension}"'
+        return response
+
+    # Result orderings for the results endpoint: (field, descending) keys,
+    # always ending with 'id' so keyset pagination has a unique position.
+    RESULT_ORDERINGS = {
+        'stock_symbol': [('stock_symbol', False), ('signal_date', True), ('id', False)],
+        '-stock_symbol': [('stock_symbol', True), ('signal_date', True), ('id', True)],
+        'signal_date': [('signal_date', False), ('stock_symbol', False), ('id', False)],
+        '-signal_date': [('signal_date', True), ('stock_symbol', False), ('id', False)],
+    }
+    RESULT_FIELDS = ['id', 'stock_symbol', 'signal_date', 'signal', 'expected_price',
+                     'actual_close', 'prev_close', 'result']
+
     @action(detail=True, methods=['get'])
     def results(self, request, pk=None):
-        """Paginated results for a backtest run."""
+        """
+        Paginated results for a backtest run (filtered, sorted and paginated in SQL).
+        
+        Query params: search (symbol substring), result (WIN/LOSS), ordering
+        (stock_symbol, -stock_symbol, signal_date, -signal_date), page_size and
+        either page (offset) or cursor (keyset, from the previous next_cursor).
+        next_cursor is null on the last page; in cursor mode current_page and
+        total_pages are null (they only mean something for offset pages).
+        """
         try:
             backtest = self.get_queryset().get(pk=pk)
-            trades = backtest.list_of_trades_json
+            queryset = backtest.signal_results.all()
             
             # Filtering
-            search = request.query_params.get('search', '').lower()
+            search = request.query_params.get('search', '').strip()
             if search:
-                trades = [t for t in trades if search in t.get('stock_symbol', '').lower()]
+                queryset = queryset.filter(stock_symbol__icontains=search)
+            result = request.query_params.get('result', '').upper()
+            if result in ('WIN', 'LOSS'):
+                queryset = queryset.filter(result=result)
             
             # Sorting (Default: Symbol ASC, Date DESC)
-            # Python sort is stable. Sort by secondary (Date DESC) first, then primary (Symbol ASC).
-            trades.sort(key=lambda x: x.get('signal_date', ''), reverse=True)
-            trades.sort(key=lambda x: x.get('stock_symbol', ''))
+            ordering = request.query_params.get('ordering', 'stock_symbol')
+            keys = self.RESULT_ORDERINGS.get(ordering, self.RESULT_ORDERINGS['stock_symbol'])
+            queryset = queryset.order_by(*[f'-{field}' if desc else field for field, desc in keys])
             
             # Pagination
             page = int(request.query_params.get('page', 1))
             page_size = int(request.query_params.get('page_size', 10))
+            if page < 1 or page_size < 1:
+                raise ValueError('page and page_size must be positive')
+            page_size = min(page_size, 1000)
             
-            total_count = len(trades)
+            total_count = queryset.count()
             total_pages = (total_count + page_size - 1) // page_size
             
-            start = (page - 1) * page_size
-            end = start + page_size
+            # One extra row tells whether a next page exists
+            cursor = request.query_params.get('cursor')
+            if cursor:
+                # Keyset: continue after the last row of the previous page
+                queryset = queryset.filter(self._keyset_filter(keys, self._decode_cursor(cursor)))
+                rows = list(queryset.values(*self.RESULT_FIELDS)[:page_size + 1])
+                page = total_pages = None
+            else:
+                start = (page - 1) * page_size
+                rows = list(queryset.values(*self.RESULT_FIELDS)[start:start + page_size + 1])
             
-            paginated_trades = trades[start:end]
+            has_next = len(rows) > page_size
+            rows = rows[:page_size]
+            next_cursor = None
+            if has_next:
+                next_cursor = self._encode_cursor([str(rows[-1][field]) if field == 'signal_date' else rows[-1][field] for field, _ in keys])
+            for row in rows:
+                row['signal_date'] = row['signal_date'].strftime('%Y-%m-%d')
             
             return get_success_response({
-                'results': paginated_trades,
+                'results': rows,
                 'pagination': {
                     'total_count': total_count,
                     'total_pages': total_pages,
                     'current_page': page,
-                    'page_size': page_size
+                    'page_size': page_size,
+                    'next_cursor': next_cursor,
                 }
             })
             
@@ -169,6 +214,50 @@ class BacktestRunViewSet(viewsets.ModelViewSet):
         except ValueError:
              return get_error_response('INVALID_PARAM', 'Invalid page parameters', status_code=400)
 
+    @staticmethod
+    def _encode_cursor(values):
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor):
+        try:
+            return json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except (ValueError, TypeError):
+            raise ValueError('Invalid cursor')
+
+    @staticmethod
+    def _keyset_filter(keys, values):
+        """Rows strictly after `values` in the (field, descending) key order."""
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError('Invalid cursor')
+        condition = Q()
+        equal = {}
+        for (field, desc), value in zip(keys, values):
+            lookup = 'lt' if desc else 'gt'
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        return condition
+
+
+def _resolve_stock_ids(request, selection_mode, selection_config):
+    """Resolve a backtest selection (stock/sector/category/watchlist) to stock ids."""
+    from apps.stocks.models import Stock
+    
+    stock_ids = []
+    if selection_mode == 'stock':
+        stock_ids = selection_config.get('ids', [])
+    elif selection_mode == 'sector':
+        # Fetch stocks in sectors
+        sector_ids = selection_config.get('ids', [])
+        stock_ids = list(Stock.objects.filter(sectors__id__in=sector_ids).values_list('id', flat=True))
+    elif selection_mode == 'category':
+        category_ids = selection_config.get('ids', [])
+        stock_ids = list(Stock.objects.filter(categories__id__in=category_ids).values_list('id', flat=True))
+    elif selection_mode == 'watchlist':
+        # Get user's watchlist
+        stock_ids = list(Stock.objects.filter(watched_by__user=request.user).values_list('id', flat=True))
+    return stock_ids
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -190,25 +279,9 @@ def run_backtest(request):
     
     # Validate date range
     # Resolve selection to stock_ids
-    stock_ids = []
     selection_mode = serializer.validated_data['selection_mode']
     selection_config = serializer.validated_data['selection_config']
-    
-    if selection_mode == 'stock':
-        stock_ids = selection_config.get('ids', [])
-    elif selection_mode == 'sector':
-        # Fetch stocks in sectors
-        from apps.stocks.models import Stock
-        sector_ids = selection_config.get('ids', [])
-        stock_ids = list(Stock.objects.filter(sectors__id__in=sector_ids).values_list('id', flat=True))
-    elif selection_mode == 'category':
-        from apps.stocks.models import Stock
-        category_ids = selection_config.get('ids', [])
-        stock_ids = list(Stock.objects.filter(categories__id__in=category_ids).values_list('id', flat=True))
-    elif selection_mode == 'watchlist':
-        from apps.stocks.models import Stock
-        # Get user's watchlist
-        stock_ids = list(Stock.objects.filter(watched_by__user=request.user).values_list('id', flat=True))
+    stock_ids = _resolve_stock_ids(request, selection_mode, selection_config)
         
     if not stock_ids:
         return get_error_response('NO_STOCKS_SELECTED', 'No stocks found for the selection', status_code=400)
@@ -237,6 +310,23 @@ def run_backtest(request):
         except StrategyRuleBased.DoesNotExist:
             return get_error_response('INVALID_STRATEGY', 'StrategyRuleBased not found', status_code=400)
     
+    # Walk-forward config (validated up front, executed by the engine)
+    walk_forward_config = serializer.validated_data.get('walk_forward') or {}
+    if walk_forward_config:
+        from .walkforward import WalkForward
+        from .sweep import ParameterSweep
+        if not strategy_rule_based:
+            return get_error_response('INVALID_WALK_FORWARD', 'Walk-forward requires a rule-based strategy', status_code=400)
+        try:
+            total_combinations = WalkForward.validate_config(walk_forward_config, strategy_rule_based.rules_json)
+        except ValueError as e:
+            return get_error_response('INVALID_WALK_FORWARD', str(e), status_code=400)
+        max_combinations = ParameterSweep.get_max_combinations()
+        if total_combinations > max_combinations:
+            return get_error_response('TOO_MANY_COMBINATIONS',
+                                     f'{total_combinations} combinations exceed the limit of {max_combinations}',
+                                     status_code=400)
+    
     backtest = BacktestRun.objects.create(
         run_id=run_id,
         user=request.user,
@@ -250,6 +340,7 @@ def run_backtest(request):
         end_date=serializer.validated_data['end_date'],
         initial_wallet_amount=serializer.validated_data.get('initial_wallet', 100000),
         trade_strategy=serializer.validated_data.get('trade_strategy'),
+        walk_forward_config=walk_forward_config,
         status='pending',
     )
 
@@ -266,7 +357,7 @@ def run_backtest(request):
         from .engine import BacktestEngine
         try:
             engine = BacktestEngine(backtest)
-            engine.execute(stock_ids)
+            engine.execute_parallel(stock_ids)
             backtest.refresh_from_db()
             return get_success_response({
                 'run_id': run_id,
@@ -294,6 +385,123 @@ def run_backtest(request):
         }, status_code=201)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def run_sweep(request):
+    """
+    Run a parameter sweep (grid search) of a rule-based strategy template.
+    Every combination is evaluated against one price panel in a single job.
+    """
+    from .tasks import execute_sweep_task
+    from .sweep import ParameterSweep
+    from apps.subscriptions.services import SubscriptionService
+    
+    # Subscription Check (a sweep counts as one backtest run)
+    allowed, msg = SubscriptionService.check_limit(request.user, 'BACKTEST_RUN')
+    if not allowed:
+        return get_error_response('SUBSCRIPTION_LIMIT_REACHED', msg, status_code=403)
+    
+    serializer = BacktestSweepRequestSerializer(data=request.data)
+    
+    if not serializer.is_valid():
+        return get_error_response('VALIDATION_ERROR', 'Invalid input data', 
+                                 serializer.errors, status_code=400)
+    
+    data = serializer.validated_data
+    
+    # Template
+    from apps.strategies.models import StrategyRuleBased
+    strategy_rule_based = None
+    if data.get('strategy_rule_based'):
+        try:
+            strategy_rule_based = StrategyRuleBased.objects.get(id=data['strategy_rule_based'])
+            if strategy_rule_based.user and strategy_rule_based.user != request.user and not strategy_rule_based.is_public:
+                 return get_error_response('PERMISSION_DENIED', 'You do not have access to this strategy', status_code=403)
+        except StrategyRuleBased.DoesNotExist:
+            return get_error_response('INVALID_STRATEGY', 'StrategyRuleBased not found', status_code=400)
+    rules_template = data.get('rules_template') or strategy_rule_based.rules_json
+    
+    # Validate the grid up front
+    try:
+        total_combinations = ParameterSweep.validate(rules_template, data['parameters'])
+    except ValueError as e:
+        return get_error_response('INVALID_PARAMETERS', str(e), status_code=400)
+    
+    max_combinations = ParameterSweep.get_max_combinations()
+    if total_combinations > max_combinations:
+        return get_error_response('TOO_MANY_COMBINATIONS',
+                                 f'{total_combinations} combinations exceed the limit of {max_combinations}',
+                                 status_code=400)
+    
+    stock_ids = _resolve_stock_ids(request, data['selection_mode'], data['selection_config'])
+    if not stock_ids:
+        return get_error_response('NO_STOCKS_SELECTED', 'No stocks found for the selection', status_code=400)
+    
+    sweep = BacktestSweep.objects.create(
+        sweep_id=f"SW-{uuid.uuid4().hex[:12].upper()}",
+        user=request.user,
+        strategy_rule_based=strategy_rule_based,
+        rules_template=rules_template,
+        parameters=data['parameters'],
+        total_combinations=total_combinations,
+        selection_mode=data['selection_mode'],
+        selection_config=data['selection_config'],
+        criteria_type=data['criteria_type'],
+        magnitude_threshold=data.get('magnitude_threshold', 50),
+        start_date=data['start_date'],
+        end_date=data['end_date'],
+        initial_wallet_amount=data.get('initial_wallet', 0),
+        trade_strategy=data.get('trade_strategy'),
+        rank_by=data['rank_by'],
+        status='pending',
+    )
+    
+    SubscriptionService.increment_usage(request.user, 'BACKTEST_RUN')
+    
+    # Same execution mode switch as run_backtest
+    from apps.adminpanel.models import SystemConfig
+    config = SystemConfig.objects.filter(key='BACKTEST_EXECUTION_MODE').first()
+    mode = config.value if config else 'background'
+    
+    if mode == 'direct':
+        try:
+            ParameterSweep(sweep).execute(stock_ids)
+            sweep.refresh_from_db()
+            return get_success_response(BacktestSweepSerializer(sweep).data, status_code=201)
+        except Exception as e:
+            return get_error_response('EXECUTION_FAILED', f'Direct execution failed: {str(e)}', status_code=500)
+    
+    execute_sweep_task.delay(sweep.id, stock_ids)
+    return get_success_response({
+        'sweep_id': sweep.sweep_id,
+        'id': sweep.id,
+        'status': 'pending',
+        'total_combinations': total_combinations,
+        'message': 'Parameter sweep queued for execution'
+    }, status_code=201)
+
+
+class BacktestSweepViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet for viewing parameter sweeps and their ranked results."""
+    
+    queryset = BacktestSweep.objects.all()
+    serializer_class = BacktestSweepSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user)
+    
+    def list(self, request):
+        queryset = self.get_queryset().order_by('-created_at')
+        serializer = self.get_serializer(queryset, many=True)
+        return get_success_response(serializer.data)
+    
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        return get_success_response(serializer.data)
+
+
 class TradeViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for viewing trades."""
     
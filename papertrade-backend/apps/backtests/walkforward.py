@@ -0,0 +1,236 @@
+"""
+Walk-forward optimisation for rule-based strategies.
+
+start_date..end_date is split into rolling windows: the parameter grid of
+a rules_json template (see sweep.py) is scored on each in-sample window,
+the best combination is traded on the following out-of-sample window, and
+the out-of-sample results are stitched into the BacktestRun.
+
+Prices are loaded once. Indicator frames are built once per stock over the
+whole range (warm state carries across windows), and each combination's
+signals are generated once and re-scored per window.
+"""
+import logging
+from datetime import timedelta
+import numpy as np
+from typing import List, Dict, Any
+from .models import BacktestRun
+from .engine import BacktestEngine
+from .sweep import ParameterSweep
+from apps.stocks.models import Stock
+from apps.stocks.panel import PricePanel
+from apps.strategies.logic import StrategyEngine
+from apps.strategies.registry import IndicatorSet
+
+logger = logging.getLogger(__name__)
+
+
+class WalkForward:
+    """Rolling in-sample / out-of-sample optimisation of one BacktestRun."""
+
+    def __init__(self, engine: BacktestEngine):
+        self.engine = engine
+        self.backtest_run = engine.backtest_run
+
+    @staticmethod
+    def validate_config(config: Dict[str, Any], rules_template: Dict[str, Any] = None) -> int:
+        """
+        Check a walk_forward_config (window sizes and parameter grid).
+        Returns the number of parameter combinations.
+        """
+        if not isinstance(config, dict):
+            raise ValueError('Walk-forward config must be an object')
+        for key in ('in_sample_days', 'out_of_sample_days'):
+            value = config.get(key)
+            if not isinstance(value, int) or value <= 0:
+                raise ValueError(f'"{key}" must be a positive integer')
+        step_days = config.get('step_days')
+        if step_days is not None and (not isinstance(step_days, int) or step_days <= 0):
+            raise ValueError('"step_days" must be a positive integer')
+        if step_days is not None and step_days < config['out_of_sample_days']:
+            # Overlapping out-of-sample windows would count the same days twice
+            raise ValueError('"step_days" must be at least "out_of_sample_days"')
+        if config.get('rank_by', 'win_rate') not in ('win_rate', 'pnl'):
+            raise ValueError('"rank_by" must be "win_rate" or "pnl"')
+
+        template = config.get('rules_template') or rules_template
+        if not isinstance(template, dict) or not template:
+            raise ValueError('Walk-forward needs a rules template (rules_template or a rule-based strategy)')
+        parameters = config.get('parameters')
+        if not isinstance(parameters, dict) or not parameters:
+            raise ValueError('"parameters" must be a non-empty object')
+        return ParameterSweep.validate(template, parameters)
+
+    @staticmethod
+    def windows(start_date, end_date, in_sample_days: int, out_of_sample_days: int, step_days: int = None):
+        """
+        Rolling windows as (in_sample_start, in_sample_end, oos_start, oos_end).
+        Windows advance by `step_days` (default and minimum: the out-of-sample
+        length, so out-of-sample windows never overlap);
+        the last out-of-sample window is clipped to end_date.
+        """
+        step = timedelta(days=step_days or out_of_sample_days)
+        windows = []
+        is_start = start_date
+        while True:
+            is_end = is_start + timedelta(days=in_sample_days - 1)
+            oos_start = is_end + timedelta(days=1)
+            if oos_start > end_date:
+                break
+            oos_end = min(oos_start + timedelta(days=out_of_sample_days - 1), end_date)
+            windows.append((is_start, is_end, oos_start, oos_end))
+            is_start += step
+        return windows
+
+    def execute(self, stock_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Run the walk-forward and set the run's stitched out-of-sample stats.
+        Returns the stitched out-of-sample result rows.
+        """
+        run = self.backtest_run
+        config = run.walk_forward_config
+        rules_template = config.get('rules_template') or (
+            run.strategy_rule_based.rules_json if run.strategy_rule_based else None
+        )
+        self.validate_config(config, rules_template)
+
+        combinations = ParameterSweep.expand(rules_template, config['parameters'])
+        windows = self.windows(
+            run.start_date, run.end_date,
+            config['in_sample_days'], config['out_of_sample_days'], config.get('step_days')
+        )
+        if not windows:
+            raise ValueError('Date range is too short for one in-sample + out-of-sample window')
+        rank_by = config.get('rank_by', 'win_rate')
+
+        # Load all prices once; indicator sets per stock cover the whole range
+        stocks = list(Stock.objects.filter(id__in=stock_ids))
+        panel = PricePanel.load([stock.id for stock in stocks], run.start_date - BacktestEngine.FETCH_BUFFER, run.end_date, indicators=True)
+        indicator_sets = {stock.id: IndicatorSet(panel.series(stock.id)) for stock in stocks}
+        in_sample_panels = [panel.until(w[1]) for w in windows]
+
+        # 1. Score every combination on every in-sample window
+        scores = [[] for _ in windows]
+        for n, combination in enumerate(combinations):
+            signals = self._signals(stocks, panel, indicator_sets, combination['rules_json'])
+            for i, (is_start, is_end, _, _) in enumerate(windows):
+                window_run, _, _ = self._score(stocks, in_sample_panels[i], signals, is_start, is_end,
+                                            run.initial_wallet_amount)
+                scores[i].append(dict(ParameterSweep.summarize(window_run), combination=n))
+
+        # 2. Trade each window's best combination out-of-sample, compounding the wallet
+        wallet = run.initial_wallet_amount
+        stats = {'total_signals': 0, 'win_count': 0, 'loss_count': 0, 'number_of_trades': 0}
+        results = []
+        window_rows = []
+        curves = []
+        signal_cache = {}
+        for i, (is_start, is_end, oos_start, oos_end) in enumerate(windows):
+            best = ParameterSweep.rank(scores[i], rank_by)[0]
+            n = best['combination']
+            if n not in signal_cache:
+                signal_cache[n] = self._signals(stocks, panel, indicator_sets, combinations[n]['rules_json'])
+
+            window_run, window_results, curve = self._score(stocks, panel.until(oos_end), signal_cache[n],
+                                                            oos_start, oos_end, wallet)
+            results.extend(window_results)
+            if curve is not None:
+                curves.append(curve)
+            stats['total_signals'] += window_run.total_signals
+            stats['win_count'] += window_run.win_count
+            stats['loss_count'] += window_run.loss_count
+            stats['number_of_trades'] += window_run.number_of_trades
+            if window_run.final_wallet_amount is not None:
+                wallet = window_run.final_wallet_amount
+
+            in_sample = {k: v for k, v in best.items() if k not in ('combination', 'rank')}
+            window_rows.append({
+                'window': i + 1,
+                'in_sample_start': str(is_start),
+                'in_sample_end': str(is_end),
+                'out_of_sample_start': str(oos_start),
+                'out_of_sample_end': str(oos_end),
+                'params': combinations[n]['params'],
+                'in_sample': in_sample,
+                'out_of_sample': ParameterSweep.summarize(window_run),
+            })
+
+        # Stitched out-of-sample results
+        run.total_signals = stats['total_signals']
+        run.win_count = stats['win_count']
+        run.loss_count = stats['loss_count']
+        if stats['total_signals'] > 0:
+            run.win_rate = (stats['win_count'] / stats['total_signals']) * 100
+        else:
+            run.win_rate = 0
+
+        if self.engine.simulates_pnl():
+            initial_capital = run.initial_wallet_amount
+            run.final_wallet_amount = wallet
+            run.total_pnl = wallet - initial_capital
+            run.pnl_percentage = ((wallet - initial_capital) / initial_capital) * 100
+            run.number_of_trades = stats['number_of_trades']
+            if curves:
+                self._stitch_curves(curves)
+
+        run.walk_forward_windows = window_rows
+        logger.info(f"Backtest {run.run_id} walk-forward: {len(windows)} windows x {len(combinations)} combinations")
+        return results
+
+    @staticmethod
+    def _signals(stocks, panel, indicator_sets, rules_json) -> Dict[int, list]:
+        """Signals of one combination per stock over the whole range."""
+        signals = {}
+        for stock in stocks:
+            indicator_set = indicator_sets[stock.id]
+            signals[stock.id] = StrategyEngine.calculate_rule_based_strategy(
+                indicator_set.series, rules_json, indicator_set=indicator_set
+            ) if len(indicator_set) else []
+        return signals
+
+    def _score(self, stocks, panel, signals, start_date, end_date, wallet):
+        """
+        Evaluate precomputed signals on one window (an unsaved BacktestRun
+        over start_date..end_date, prices truncated to end_date).
+        Returns (window_run, result_rows, equity_curve).
+        """
+        run = self.backtest_run
+        window_run = BacktestRun(
+            run_id=run.run_id,
+            user=run.user,
+            criteria_type=run.criteria_type,
+            magnitude_threshold=run.magnitude_threshold,
+            trade_strategy=run.trade_strategy,
+            start_date=start_date,
+            end_date=end_date,
+            initial_wallet_amount=wallet,
+        )
+        engine = BacktestEngine(window_run, engine_mode=self.engine.engine_mode)
+        engine.run_stocks(stocks, panel, lambda prices: signals[prices.stock_id],
+                          engine.capital_per_stock(len(stocks)))
+        results = engine.reduce([engine.partial()])
+        return window_run, results, engine.equity_curve
+
+    def _stitch_curves(self, curves):
+        """
+        Chain the out-of-sample equity curves (each starts from the previous
+        window's final wallet) into the run's curve; dates already covered
+        by an earlier window are dropped.
+        """
+        parts = []
+        last_date = None
+        traded = 0.0
+        for dates, equity, invested, window_traded in curves:
+            keep = dates > last_date if last_date is not None else np.ones(len(dates), dtype=bool)
+            if keep.any():
+                parts.append((dates[keep], equity[keep], invested[keep]))
+                last_date = dates[keep][-1]
+            traded += window_traded
+        if not parts:
+            return
+        self.engine.set_equity_curve(
+            np.concatenate([p[0] for p in parts]),
+            np.concatenate([p[1] for p in parts]),
+            np.concatenate([p[2] for p in parts]),
+            traded,
+        )
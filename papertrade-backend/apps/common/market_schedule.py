@@ -1,6 +1,6 @@
 import os
 import json
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from django.conf import settings
 from pathlib import Path
 
@@ -55,6 +55,19 @@ class MarketSchedule:
             
         return True, ""
 
+    @classmethod
+    def trading_days(cls, start_date, end_date):
+        """
+        Dates in [start_date, end_date] the market is open, oldest first.
+        """
+        days = []
+        current_date = start_date
+        while current_date <= end_date:
+            if cls.is_market_open(current_date)[0]:
+                days.append(current_date)
+            current_date += timedelta(days=1)
+        return days
+
     @classmethod
     def get_holiday_reason(cls, check_date):
         is_open, reason = cls.is_market_open(check_date)
@@ -0,0 +1,205 @@
+"""
+Persistent indicator store.
+
+RSI(14), SMA(5/10/20/50) and the CLOSE_PCT_CHANGE_* series are kept per
+stock and date in StockIndicatorDaily and maintained incrementally: after a
+price sync only the affected dates (and those after them) are recomputed.
+
+Every value depends only on a fixed window of closes and rolling means are
+exact per-window sums (not running sums), so an incremental update writes
+bit-for-bit the same values as a full rebuild.
+"""
+import logging
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+from .models import StockPriceDaily, StockIndicatorDaily
+
+logger = logging.getLogger(__name__)
+
+RSI_PERIOD = 14
+SMA_PERIODS = (5, 10, 20, 50)
+
+# Rule field -> store column
+FIELD_COLUMNS = {
+    'RSI': 'rsi_14',
+    'CLOSE_PCT_CHANGE_0': 'close_pct_change_0',
+    'CLOSE_PCT_CHANGE_1': 'close_pct_change_1',
+    'CLOSE_PCT_CHANGE_1_3': 'close_pct_change_1_3',
+    'CLOSE_PCT_CHANGE_1_7': 'close_pct_change_1_7',
+}
+FIELD_COLUMNS.update({f'SMA_{n}': f'sma_{n}' for n in SMA_PERIODS})
+
+COLUMNS = list(FIELD_COLUMNS.values())
+
+
+def rolling_mean(values, window):
+    """
+    Mean of each full window (NaN before the first full window).
+    Each window is summed in the same fixed order, so a value does not
+    depend on where the array starts.
+    """
+    n = len(values)
+    out = np.full(n, np.nan, dtype=np.float64)
+    if n >= window:
+        total = values[:n - window + 1].copy()
+        for j in range(1, window):
+            total += values[j:n - window + 1 + j]
+        out[window - 1:] = total / window
+    return out
+
+
+def rolling_std(values, window):
+    """Population standard deviation of each full window (as rolling_mean)."""
+    n = len(values)
+    out = np.full(n, np.nan, dtype=np.float64)
+    if n >= window:
+        mean = rolling_mean(values, window)[window - 1:]
+        total = (values[:n - window + 1] - mean) ** 2
+        for j in range(1, window):
+            total += (values[j:n - window + 1 + j] - mean) ** 2
+        out[window - 1:] = np.sqrt(total / window)
+    return out
+
+
+def ema(values, period, alpha=None):
+    """
+    Exponential moving average by recursion, seeded with the simple mean of
+    the first `period` values (NaN before). Leading NaNs are skipped, so it
+    can smooth another indicator. alpha defaults to 2 / (period + 1).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan, dtype=np.float64)
+    finite = np.flatnonzero(~np.isnan(values))
+    if not len(finite):
+        return out
+    start = finite[0]
+    seed_end = start + period
+    if seed_end > len(values):
+        return out
+
+    if alpha is None:
+        alpha = 2 / (period + 1)
+    # y[t] = alpha * x[t] + (1 - alpha) * y[t-1], from the seed
+    chain = np.concatenate(([values[start:seed_end].mean()], values[seed_end:]))
+    out[seed_end - 1:] = pd.Series(chain).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    return out
+
+
+def wilder(values, period):
+    """Wilder smoothing (EMA with alpha = 1 / period)."""
+    return ema(values, period, alpha=1 / period)
+
+
+def sma(close, period):
+    """Simple moving average of closes."""
+    return rolling_mean(close, period)
+
+
+def rsi(close, period=RSI_PERIOD):
+    """RSI from simple rolling means of gains and losses."""
+    delta = np.full(len(close), np.nan, dtype=np.float64)
+    delta[1:] = np.diff(close)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = rolling_mean(gain, period) / rolling_mean(loss, period)
+        return 100 - (100 / (1 + rs))
+
+
+def pct_change(close, periods=1):
+    """Percentage change over `periods` rows."""
+    out = np.full(len(close), np.nan, dtype=np.float64)
+    if len(close) > periods:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[periods:] = (close[periods:] / close[:-periods] - 1) * 100
+    return out
+
+
+def compute(close):
+    """All stored columns for a date-sorted close array."""
+    close = np.asarray(close, dtype=np.float64)
+    change_0 = pct_change(close, 1)
+    change_1 = np.full(len(close), np.nan, dtype=np.float64)
+    change_1[1:] = change_0[:-1]
+
+    columns = {
+        'rsi_14': rsi(close),
+        'close_pct_change_0': change_0,
+        'close_pct_change_1': change_1,
+        # Day -1 vs Day -3 (Period=2) and Day -1 vs Day -7 (Period=6)
+        'close_pct_change_1_3': pct_change(close, 2),
+        'close_pct_change_1_7': pct_change(close, 6),
+    }
+    for n in SMA_PERIODS:
+        columns[f'sma_{n}'] = sma(close, n)
+    return columns
+
+
+class IndicatorStore:
+    """Incremental maintenance of StockIndicatorDaily."""
+
+    # Closes before the first recomputed date needed for exact values
+    LOOKBACK = max(max(SMA_PERIODS), RSI_PERIOD + 1, 7)
+    BATCH_SIZE = 5000
+
+    @classmethod
+    def update(cls, stock_id, from_date=None) -> int:
+        """
+        Recompute indicators for dates >= from_date (default: after the
+        last stored date; everything if nothing is stored yet).
+        Returns the number of rows written.
+        """
+        if from_date is None:
+            last = StockIndicatorDaily.objects.filter(stock_id=stock_id).order_by('-date').first()
+            if last:
+                from_date = last.date + timedelta(days=1)
+
+        if from_date is None:
+            history = []
+            rows = cls._closes(stock_id)
+        else:
+            history = cls._closes(stock_id, date__lt=from_date, descending=True, limit=cls.LOOKBACK)[::-1]
+            rows = cls._closes(stock_id, date__gte=from_date)
+        if not rows:
+            return 0
+
+        closes = np.array([c for _, c in history + rows], dtype=np.float64)
+        columns = compute(closes)
+        offset = len(history)
+
+        objects = []
+        for i, (day, _) in enumerate(rows, start=offset):
+            values = {
+                name: (float(column[i]) if not np.isnan(column[i]) else None)
+                for name, column in columns.items()
+            }
+            objects.append(StockIndicatorDaily(stock_id=stock_id, date=day, **values))
+
+        StockIndicatorDaily.objects.bulk_create(
+            objects,
+            batch_size=cls.BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['stock', 'date'],
+            update_fields=COLUMNS + ['updated_at'],
+        )
+        return len(objects)
+
+    @classmethod
+    def rebuild(cls, stock_id) -> int:
+        """Drop and recompute a stock's whole indicator history."""
+        StockIndicatorDaily.objects.filter(stock_id=stock_id).delete()
+        return cls.update(stock_id)
+
+    @staticmethod
+    def _closes(stock_id, descending=False, limit=None, **filters):
+        """(date, close) pairs of a stock, date-sorted."""
+        queryset = StockPriceDaily.objects.filter(stock_id=stock_id, **filters)
+        queryset = queryset.order_by('-date' if descending else 'date').values_list(
+            'date', Cast('close_price', FloatField())
+        )
+        if limit is not None:
+            queryset = queryset[:limit]
+        return list(queryset)
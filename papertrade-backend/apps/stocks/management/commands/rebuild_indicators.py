@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from apps.stocks.models import Stock
+from apps.stocks.indicators import IndicatorStore
+
+
+class Command(BaseCommand):
+    help = 'Build the stored daily indicators (RSI, SMA, close % changes) from price history'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('symbols', nargs='*', help='Stock symbols (default: all stocks)')
+        parser.add_argument('--full', action='store_true',
+                            help='Drop and recompute everything instead of appending missing dates')
+    
+    def handle(self, *args, **options):
+        stocks = Stock.objects.all().order_by('symbol')
+        if options['symbols']:
+            stocks = stocks.filter(symbol__in=options['symbols'])
+        
+        for stock in stocks:
+            if options['full']:
+                rows = IndicatorStore.rebuild(stock.id)
+            else:
+                rows = IndicatorStore.update(stock.id)
+            self.stdout.write(self.style.SUCCESS(f'{stock.symbol}: {rows} indicator rows written'))
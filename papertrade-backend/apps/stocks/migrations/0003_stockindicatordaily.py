@@ -0,0 +1,37 @@
+# Generated by Django 5.1.4 on 2026-10-17 08:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0002_stock_is_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockIndicatorDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('rsi_14', models.FloatField(blank=True, null=True)),
+                ('sma_5', models.FloatField(blank=True, null=True)),
+                ('sma_10', models.FloatField(blank=True, null=True)),
+                ('sma_20', models.FloatField(blank=True, null=True)),
+                ('sma_50', models.FloatField(blank=True, null=True)),
+                ('close_pct_change_0', models.FloatField(blank=True, null=True)),
+                ('close_pct_change_1', models.FloatField(blank=True, null=True)),
+                ('close_pct_change_1_3', models.FloatField(blank=True, null=True)),
+                ('close_pct_change_1_7', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_indicators', to='stocks.stock')),
+            ],
+            options={
+                'db_table': 'stock_indicators_daily',
+                'ordering': ['-date'],
+                'unique_together': {('stock', 'date')},
+            },
+        ),
+    ]
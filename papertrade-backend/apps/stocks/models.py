@@ -105,3 +105,34 @@ class Stock5MinByDay(models.Model):
     
     def __str__(self):
         return f"{self.stock.symbol} - {self.date} (5min)"
+
+
+class StockIndicatorDaily(models.Model):
+    """
+    Precomputed daily indicators per stock (see indicators.IndicatorStore).
+    Maintained incrementally after price syncs; NULL where the indicator
+    does not have enough history yet.
+    """
+    
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE, related_name='daily_indicators')
+    date = models.DateField()
+    
+    rsi_14 = models.FloatField(null=True, blank=True)
+    sma_5 = models.FloatField(null=True, blank=True)
+    sma_10 = models.FloatField(null=True, blank=True)
+    sma_20 = models.FloatField(null=True, blank=True)
+    sma_50 = models.FloatField(null=True, blank=True)
+    close_pct_change_0 = models.FloatField(null=True, blank=True)
+    close_pct_change_1 = models.FloatField(null=True, blank=True)
+    close_pct_change_1_3 = models.FloatField(null=True, blank=True)
+    close_pct_change_1_7 = models.FloatField(null=True, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'stock_indicators_daily'
+        unique_together = ['stock', 'date']
+        ordering = ['-date']
+    
+    def __str__(self):
+        return f"{self.stock.symbol} - {self.date} (indicators)"
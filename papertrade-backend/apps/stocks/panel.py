@@ -0,0 +1,278 @@
+"""
+Columnar daily price panel.
+
+Loads OHLCV for many stocks over a date range in a single streamed query
+(only the needed columns, cast to float8 in the database) and exposes it as
+stocks x dates float64 matrices. Per-stock views are PriceSeries objects.
+Stored indicators (StockIndicatorDaily) can be loaded alongside; stocks
+whose stored rows are incomplete get the same values computed on load.
+"""
+from array import array
+from datetime import date
+from decimal import Decimal
+import numpy as np
+from django.db.models import F, FloatField, Window
+from django.db.models.functions import Cast, RowNumber
+from .models import StockPriceDaily, StockIndicatorDaily
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class PriceSeries:
+    """One stock's daily OHLCV as date-sorted float64 columns."""
+
+    __slots__ = ('stock_id', 'dates', 'open', 'high', 'low', 'close', 'volume', 'indicators')
+
+    def __init__(self, stock_id, dates, open, high, low, close, volume, indicators=None):
+        self.stock_id = stock_id
+        self.dates = dates
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        # Stored indicator columns aligned with dates (None if not loaded)
+        self.indicators = indicators
+
+    def __len__(self):
+        return len(self.dates)
+
+    @classmethod
+    def empty(cls, stock_id=None):
+        empty = np.empty(0, dtype=np.float64)
+        return cls(stock_id, np.empty(0, dtype='datetime64[D]'), empty, empty, empty, empty, empty)
+
+    @classmethod
+    def from_prices(cls, prices):
+        """Build a series from StockPriceDaily instances (any order)."""
+        prices = sorted(prices, key=lambda x: x.date)
+        if not prices:
+            return cls.empty()
+        return cls(
+            prices[0].stock_id,
+            np.array([p.date for p in prices], dtype='datetime64[D]'),
+            np.array([float(p.open_price) for p in prices], dtype=np.float64),
+            np.array([float(p.high_price) for p in prices], dtype=np.float64),
+            np.array([float(p.low_price) for p in prices], dtype=np.float64),
+            np.array([float(p.close_price) for p in prices], dtype=np.float64),
+            np.array([float(p.volume) if p.volume else 0 for p in prices], dtype=np.float64),
+        )
+
+    @classmethod
+    def load(cls, stock, start_date=None, end_date=None, indicators=False):
+        """Load a single stock's series (see PricePanel.load)."""
+        stock_id = getattr(stock, 'id', stock)
+        return PricePanel.load([stock_id], start_date, end_date, indicators=indicators).series(stock_id)
+
+    def date_list(self):
+        """Dates as datetime.date objects."""
+        return self.dates.tolist()
+
+    def decimal_close(self):
+        """
+        Close prices as Decimal, for strategies that use Decimal arithmetic.
+        Prices are stored with 2 decimal places, so this is lossless.
+        """
+        return [Decimal(f'{c:.2f}') for c in self.close.tolist()]
+
+
+class PricePanel:
+    """Stocks x dates OHLCV matrices (NaN where a stock has no bar)."""
+
+    CHUNK_SIZE = 20000
+
+    def __init__(self, stock_ids, dates, present, open, high, low, close, volume,
+                 indicators=None, indicator_present=None):
+        self.stock_ids = stock_ids
+        self.dates = dates
+        self.present = present
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.indicators = indicators # column -> stocks x dates matrix
+        self.indicator_present = indicator_present
+        self._rows = {stock_id: i for i, stock_id in enumerate(stock_ids)}
+
+    def __contains__(self, stock_id):
+        return stock_id in self._rows
+
+    @classmethod
+    def load(cls, stock_ids, start_date=None, end_date=None, indicators=False):
+        """
+        Fetch OHLCV for all `stock_ids` in [start_date, end_date] with one
+        streamed query and pivot it into stocks x dates matrices.
+        With `indicators`, stored indicators are loaded the same way (see
+        _load_indicators).
+        """
+        stock_ids = list(dict.fromkeys(stock_ids))
+
+        queryset = StockPriceDaily.objects.filter(stock_id__in=stock_ids)
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(date__lte=end_date)
+
+        rows = queryset.order_by().values_list(
+            'stock_id',
+            'date',
+            Cast('open_price', FloatField()),
+            Cast('high_price', FloatField()),
+            Cast('low_price', FloatField()),
+            Cast('close_price', FloatField()),
+            Cast('volume', FloatField()),
+        ).iterator(chunk_size=cls.CHUNK_SIZE)
+
+        stock_col = array('q')
+        day_col = array('l')
+        value_cols = [array('d') for _ in range(5)]
+        for row in rows:
+            stock_col.append(row[0])
+            day_col.append(row[1].toordinal() - _EPOCH_ORDINAL)
+            for col, value in zip(value_cols, row[2:]):
+                col.append(value if value is not None else 0.0)
+
+        days = np.frombuffer(day_col, dtype=day_col.typecode).astype(np.int64)
+        day_axis, date_idx = np.unique(days, return_inverse=True)
+
+        row_lookup = {stock_id: i for i, stock_id in enumerate(stock_ids)}
+        stock_idx = np.fromiter((row_lookup[s] for s in stock_col), dtype=np.int64, count=len(stock_col))
+
+        shape = (len(stock_ids), len(day_axis))
+        present = np.zeros(shape, dtype=bool)
+        present[stock_idx, date_idx] = True
+
+        matrices = []
+        for col in value_cols:
+            matrix = np.full(shape, np.nan, dtype=np.float64)
+            matrix[stock_idx, date_idx] = np.frombuffer(col, dtype=np.float64)
+            matrices.append(matrix)
+
+        panel = cls(stock_ids, day_axis.astype('datetime64[D]'), present, *matrices)
+        if indicators:
+            panel._load_indicators(start_date, end_date, day_axis, row_lookup)
+            panel._fill_indicators(start_date)
+        return panel
+
+    def _load_indicators(self, start_date, end_date, day_axis, row_lookup):
+        """Pivot stored indicator rows onto the panel's (stocks x dates) grid."""
+        from .indicators import COLUMNS
+
+        queryset = StockIndicatorDaily.objects.filter(stock_id__in=self.stock_ids)
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(date__lte=end_date)
+        rows = queryset.order_by().values_list('stock_id', 'date', *COLUMNS).iterator(chunk_size=self.CHUNK_SIZE)
+
+        stock_col = array('q')
+        day_col = array('l')
+        value_cols = [array('d') for _ in COLUMNS]
+        for row in rows:
+            stock_col.append(row_lookup[row[0]])
+            day_col.append(row[1].toordinal() - _EPOCH_ORDINAL)
+            for col, value in zip(value_cols, row[2:]):
+                col.append(value if value is not None else np.nan)
+
+        days = np.frombuffer(day_col, dtype=day_col.typecode).astype(np.int64)
+        date_idx = np.searchsorted(day_axis, days)
+        # Indicator rows for dates without a price bar are ignored
+        on_axis = date_idx < len(day_axis)
+        on_axis[on_axis] = day_axis[date_idx[on_axis]] == days[on_axis]
+        stock_idx = np.frombuffer(stock_col, dtype=np.int64)[on_axis]
+        date_idx = date_idx[on_axis]
+
+        shape = self.present.shape
+        self.indicator_present = np.zeros(shape, dtype=bool)
+        self.indicator_present[stock_idx, date_idx] = True
+        self.indicators = {}
+        for name, col in zip(COLUMNS, value_cols):
+            matrix = np.full(shape, np.nan, dtype=np.float64)
+            matrix[stock_idx, date_idx] = np.frombuffer(col, dtype=np.float64)[on_axis]
+            self.indicators[name] = matrix
+
+    def _fill_indicators(self, start_date):
+        """
+        Compute the indicator columns of stocks whose stored rows do not
+        cover all their loaded dates (store never built, or rows missing).
+        As IndicatorStore.update, the computation starts LOOKBACK bars
+        before the window, so the values equal the stored ones and do not
+        depend on the state of the store.
+        """
+        from .indicators import IndicatorStore, compute
+
+        incomplete = [
+            row for row in range(len(self.stock_ids))
+            if not self.indicator_present[row, self.present[row]].all()
+        ]
+        if not incomplete:
+            return
+
+        warmup = {}
+        if start_date:
+            queryset = StockPriceDaily.objects.filter(
+                stock_id__in=[self.stock_ids[row] for row in incomplete], date__lt=start_date
+            ).annotate(
+                bar=Window(RowNumber(), partition_by=[F('stock_id')], order_by=F('date').desc())
+            ).filter(bar__lte=IndicatorStore.LOOKBACK)
+            for stock_id, close in queryset.order_by('stock_id', 'date').values_list(
+                'stock_id', Cast('close_price', FloatField())
+            ):
+                warmup.setdefault(stock_id, []).append(close)
+
+        for row in incomplete:
+            mask = self.present[row]
+            history = np.array(warmup.get(self.stock_ids[row], []), dtype=np.float64)
+            columns = compute(np.concatenate((history, self.close[row, mask])))
+            for name, values in columns.items():
+                self.indicators[name][row, mask] = values[len(history):]
+            self.indicator_present[row] = mask
+
+    def until(self, end_date):
+        """Panel view truncated to dates <= end_date (no copy of the matrices)."""
+        stop = int(np.searchsorted(self.dates, np.datetime64(end_date, 'D'), side='right'))
+        indicators = indicator_present = None
+        if self.indicators is not None:
+            indicators = {name: matrix[:, :stop] for name, matrix in self.indicators.items()}
+            indicator_present = self.indicator_present[:, :stop]
+        return PricePanel(
+            self.stock_ids,
+            self.dates[:stop],
+            self.present[:, :stop],
+            self.open[:, :stop],
+            self.high[:, :stop],
+            self.low[:, :stop],
+            self.close[:, :stop],
+            self.volume[:, :stop],
+            indicators,
+            indicator_present,
+        )
+
+    def series(self, stock_id):
+        """Date-sorted view of one stock's bars (only dates it has data for)."""
+        row = self._rows.get(stock_id)
+        if row is None:
+            return PriceSeries.empty(stock_id)
+        mask = self.present[row]
+        indicators = None
+        if self.indicators is not None and self.indicator_present[row, mask].all():
+            # Complete after load (stored, or computed by _fill_indicators)
+            indicators = {name: matrix[row, mask] for name, matrix in self.indicators.items()}
+        return PriceSeries(
+            stock_id,
+            self.dates[mask],
+            self.open[row, mask],
+            self.high[row, mask],
+            self.low[row, mask],
+            self.close[row, mask],
+            self.volume[row, mask],
+            indicators,
+        )
+
+
+def as_price_series(prices):
+    """Accept a PriceSeries or a list of StockPriceDaily and return a PriceSeries."""
+    if isinstance(prices, PriceSeries):
+        return prices
+    return PriceSeries.from_prices(prices or [])
@@ -1,13 +1,57 @@
+import logging
 from datetime import timedelta, datetime
 from decimal import Decimal
 import pandas as pd
 import numpy as np
-from django.db.models import F
+from django.db import connection
+from django.db.models import F, Max
 from apps.stocks.models import Stock, StockPriceDaily
+from apps.stocks.panel import PriceSeries, PricePanel, as_price_series
 from apps.common.market_schedule import MarketSchedule
-from .models import StrategyMaster, StrategySignal
+from .models import StrategyMaster, StrategySignal, StrategyCheckpoint
+from .rules import CompiledRules
+from .streaming import RuleStream
+from .registry import IndicatorRegistry, IndicatorSet
+
+logger = logging.getLogger(__name__)
 
 class StrategyEngine:
+    # Predefined strategy code -> signal calculator (single dispatch point)
+    PREDEFINED_CALCULATORS = {
+        'DAILY_CLOSE_MOMENTUM': 'calculate_one_day_trend',
+        'TWO_DAY_CLOSE_MOMENTUM': 'calculate_three_day_trend',
+        'OVERSOLD_REVERSAL': 'calculate_oversold_reversal',
+    }
+
+    @classmethod
+    def get_signal_calculator(cls, strategy=None, rule_strategy=None):
+        """
+        Resolve the signal calculator for a strategy.
+        Returns a callable taking a PriceSeries and returning signal dicts,
+        or None if the strategy has nothing to calculate.
+        
+        Precedence: explicit rule-based strategy, then AUTO (its linked
+        rule-based strategy), then the predefined strategy code (its
+        vectorized or legacy calculator, see get_calculator_mode).
+        """
+        if rule_strategy is None and strategy is not None and strategy.type == 'AUTO':
+            rule_strategy = strategy.rule_based_strategy
+            if rule_strategy is None:
+                return None
+        
+        if rule_strategy is not None:
+            rules_json = rule_strategy.rules_json
+            return lambda prices: cls.calculate_rule_based_strategy(prices, rules_json)
+        
+        if strategy is None:
+            return None
+        name = cls.PREDEFINED_CALCULATORS.get(strategy.code)
+        if name is None:
+            return None
+        if cls.get_calculator_mode() == 'legacy':
+            name += '_legacy'
+        return getattr(cls, name)
+
     @staticmethod
     def calculate_technical_indicators(df):
         """
@@ -29,33 +73,11 @@ class StrategyEngine:
         return df
 
     @staticmethod
-    def calculate_rule_based_strategy(stock_prices, rules_json):
+    def get_rule_blocks(rules_json):
         """
-        Calculates signals based on JSON rules.
-        Support for 'buy_blocks' (Else-If logic) and 'output_percentage'.
+        Unified strategy blocks of a rules_json (converting legacy
+        buy/sell lists to blocks if needed).
         """
-        if not stock_prices:
-            return []
-            
-        signals = []
-        
-        # Convert to Pandas DataFrame
-        data = [{
-            'date': p.date, 
-            'close_price': float(p.close_price),
-            'open_price': float(p.open_price),
-            'high_price': float(p.high_price),
-            'low_price': float(p.low_price),
-            'volume': float(p.volume) if p.volume else 0
-        } for p in stock_prices]
-        
-        df = pd.DataFrame(data)
-        df.sort_values('date', inplace=True)
-        df.reset_index(drop=True, inplace=True)
-        
-        # Calculate Indicators - Need to know which ones from ALL blocks
-        needed_fields = set()
-        
         # Unified Strategy Blocks
         strategy_blocks = rules_json.get('strategy_blocks', [])
 
@@ -79,142 +101,394 @@ class StrategyEngine:
                 b['action'] = 'SELL'
                 strategy_blocks.append(b)
         
+        return strategy_blocks
+
+    @staticmethod
+    def get_rule_indicator_fields(strategy_blocks):
+        """
+        Indicator fields referenced by the blocks: every rule field known to
+        the indicator registry (RSI, SMA_n, CLOSE_PCT_CHANGE_*, EMA_n, MACD,
+        ATR_n, ...). Plain price fields such as CLOSE need no indicator.
+        """
+        needed_fields = set()
+        
         all_rules = []
         for block in strategy_blocks:
             all_rules.extend(block.get('rules', []))
 
         for rule in all_rules:
-            field = rule.get('field')
-            if field in ['RSI']:
-                needed_fields.add('RSI')
-            elif field.startswith('SMA_'):
+            field = (rule.get('field') or '').upper()
+            if IndicatorRegistry.is_field(field):
                 needed_fields.add(field)
+        
+        return needed_fields
 
-        if 'RSI' in needed_fields:
-            delta = df['close_price'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            df['RSI'] = 100 - (100 / (1 + rs))
+    @staticmethod
+    def build_rule_frame(series, needed_fields, indicator_set=None):
+        """
+        Indicator DataFrame for rule evaluation: date, close_price and the
+        requested indicator fields.
+        Fields come from `indicator_set` (an IndicatorSet over the series,
+        see registry), so series shared between fields or strategies are
+        computed once; stored indicators are used when loaded.
+        """
+        if indicator_set is None:
+            indicator_set = IndicatorSet(series)
+        return indicator_set.frame(needed_fields)
+
+    @classmethod
+    def calculate_rule_based_strategy(cls, stock_prices, rules_json, indicator_set=None):
+        """
+        Calculates signals based on JSON rules.
+        Support for 'buy_blocks' (Else-If logic) and 'output_percentage'.
+        `stock_prices` is a PriceSeries (or a list of StockPriceDaily).
+        `indicator_set` (optional IndicatorSet of the same series, one per
+        stock) shares indicator series across calls with different rules,
+        e.g. parameter sweeps or several strategies on one stock.
+        """
+        series = as_price_series(stock_prices)
+        if not len(series):
+            return []
         
-        # Always calculate Percentage Changes as they are core now
-        df['CLOSE_PCT_CHANGE_0'] = df['close_price'].pct_change() * 100
-        df['CLOSE_PCT_CHANGE_1'] = df['CLOSE_PCT_CHANGE_0'].shift(1)
-        # New Rules: Day -1 vs Day -3 (Period=2) and Day -1 vs Day -7 (Period=6)
-        df['CLOSE_PCT_CHANGE_1_3'] = df['close_price'].pct_change(periods=2) * 100
-        df['CLOSE_PCT_CHANGE_1_7'] = df['close_price'].pct_change(periods=6) * 100
+        # Calculate Indicators - Need to know which ones from ALL blocks
+        strategy_blocks = cls.get_rule_blocks(rules_json)
+        needed_fields = cls.get_rule_indicator_fields(strategy_blocks)
+        df = cls.build_rule_frame(series, needed_fields, indicator_set)
+
+        return cls.rule_signals(df, CompiledRules(strategy_blocks))
+
+    @staticmethod
+    def rule_signals(df, compiled_rules):
+        """Signal dicts of compiled rules over an indicator frame."""
+        signals = []
+
+        # Evaluate all blocks column-wise (first matching block wins per day)
+        directions, expected = compiled_rules.evaluate(df)
+
+        dates = df['date'].tolist()
+        for i in np.flatnonzero(directions):
+            # Find next trading day
+            if i < len(df) - 1:
+                signal_date = dates[i+1]
+            else:
+                signal_date = dates[i] + timedelta(days=1)
+                while True:
+                    is_open, _ = MarketSchedule.is_market_open(signal_date)
+                    if is_open: break
+                    signal_date += timedelta(days=1)
+
+            signals.append({
+                'date': signal_date,
+                'signal_direction': CompiledRules.direction_name(directions[i]),
+                'expected_value': expected[i]
+            })
+
+        return signals
+
+    # Stocks per price query when streaming many stocks
+    STREAM_CHUNK_SIZE = 200
+
+    @classmethod
+    def stream_rule_signals(cls, strategy, stocks):
+        """
+        Incremental signals of an AUTO strategy for many stocks.
+        Indicators are streamed (see streaming.RuleStream) from each stock's
+        StrategyCheckpoint, so only bars after the checkpoint are read;
+        stocks without a checkpoint for the current rules replay their
+        history once. Saves the new checkpoints.
+        Returns {stock_id: signal dicts}.
+        """
+        rule_strategy = strategy.rule_based_strategy
+        if rule_strategy is None:
+            return {}
+
+        strategy_blocks = cls.get_rule_blocks(rule_strategy.rules_json)
+        needed_fields = cls.get_rule_indicator_fields(strategy_blocks)
+        if not RuleStream.supports(needed_fields):
+            return {}
+        compiled_rules = CompiledRules(strategy_blocks)
+        rules_hash = RuleStream.rules_hash(rule_strategy.rules_json)
+
+        stock_ids = list(dict.fromkeys(getattr(stock, 'id', stock) for stock in stocks))
+        checkpoints = {
+            checkpoint.stock_id: checkpoint
+            for checkpoint in StrategyCheckpoint.objects.filter(
+                strategy=strategy, stock_id__in=stock_ids, rules_hash=rules_hash
+            )
+        }
+
+        results = {}
+        updated = []
+        for i in range(0, len(stock_ids), cls.STREAM_CHUNK_SIZE):
+            chunk = stock_ids[i:i + cls.STREAM_CHUNK_SIZE]
+            resumed = [stock_id for stock_id in chunk if stock_id in checkpoints]
+            fresh = [stock_id for stock_id in chunk if stock_id not in checkpoints]
 
+            panels = []
+            if resumed:
+                since = min(checkpoints[stock_id].last_date for stock_id in resumed) + timedelta(days=1)
+                panels.append((resumed, PricePanel.load(resumed, since)))
+            if fresh:
+                panels.append((fresh, PricePanel.load(fresh)))
+
+            for ids, prices in panels:
+                for stock_id in ids:
+                    series = prices.series(stock_id)
+                    checkpoint = checkpoints.get(stock_id)
+                    stream = RuleStream(needed_fields)
+
+                    start = 0
+                    if checkpoint:
+                        stream.set_state(checkpoint.state)
+                        start = int(np.searchsorted(series.dates, np.datetime64(checkpoint.last_date), side='right'))
+                    dates = series.dates[start:].tolist()
+                    close = series.close[start:]
+                    if not dates:
+                        results[stock_id] = []
+                        continue
+
+                    bar_range = (series.high[start:], series.low[start:]) if stream.needs_range else None
+                    df = cls.build_stream_frame(stream, dates, close, needed_fields, checkpoint, bar_range)
+                    results[stock_id] = cls.rule_signals(df, compiled_rules)
+
+                    updated.append(StrategyCheckpoint(
+                        stock_id=stock_id,
+                        strategy=strategy,
+                        last_date=dates[-1],
+                        last_close=float(close[-1]),
+                        rules_hash=rules_hash,
+                        state=stream.get_state(),
+                    ))
+
+        if updated:
+            StrategyCheckpoint.objects.bulk_create(
+                updated,
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=['stock', 'strategy'],
+                update_fields=['last_date', 'last_close', 'rules_hash', 'state', 'updated_at'],
+            )
+        return results
+
+    @classmethod
+    def can_stream(cls, strategy):
+        """Whether an AUTO strategy's rule fields can be streamed from checkpoints."""
+        rule_strategy = strategy.rule_based_strategy
+        if rule_strategy is None:
+            return False
+        strategy_blocks = cls.get_rule_blocks(rule_strategy.rules_json)
+        return RuleStream.supports(cls.get_rule_indicator_fields(strategy_blocks))
+
+    @staticmethod
+    def build_stream_frame(stream, dates, close, needed_fields, checkpoint=None, bar_range=None):
+        """
+        Indicator frame (as build_rule_frame) for new bars fed through a stream.
+        After a checkpoint, the checkpointed bar leads the frame: it only
+        provides the previous close and never signals itself.
+        `bar_range` is the bars' (high, low) arrays when the stream needs them.
+        Fields derived from streamed registry series (EMA_n, MACD, ATR_n, ...)
+        apply the registry node's own function, as the batch frame does.
+        """
+        if bar_range is not None:
+            values = stream.advance(close.tolist(), bar_range[0].tolist(), bar_range[1].tolist())
+        else:
+            values = stream.advance(close.tolist())
+        if checkpoint:
+            dates = [checkpoint.last_date] + dates
+            close = np.concatenate(([checkpoint.last_close], close))
+            values = {name: [np.nan] + column for name, column in values.items()}
+
+        df = pd.DataFrame({'date': dates, 'close_price': close})
+        if 'RSI' in needed_fields:
+            df['RSI'] = values['RSI']
+        for name in ('CLOSE_PCT_CHANGE_0', 'CLOSE_PCT_CHANGE_1', 'CLOSE_PCT_CHANGE_1_3', 'CLOSE_PCT_CHANGE_1_7'):
+            df[name] = values[name]
         for field in needed_fields:
             if field.startswith('SMA_'):
-                period = int(field.split('_')[1])
-                ma = df['close_price'].rolling(window=period).mean()
                 # Store as Percentage of Close
-                df[field] = (ma / df['close_price']) * 100
+                df[field] = (np.asarray(values[field], dtype=np.float64) / close) * 100
+            elif not RuleStream.WINDOWED_FIELDS.match(field):
+                node = IndicatorRegistry.node(field)
+                inputs = [
+                    close if name == 'close' else np.asarray(values[name], dtype=np.float64)
+                    for name in node.inputs
+                ]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    df[field] = node.function(*inputs)
+        return df
 
-        # Iterate through Days
-        for i in range(len(df)):
-            if i < 1: continue # Need at least 1 day for Momentum/Change logic
-            
-            row = df.iloc[i]
-            prev_row = df.iloc[i-1]
-            
-            # Helper to get value
-            def get_val(field):
-                field = field.upper()
-                if field in row: return row[field]
-                # Deprecated absolute fields, but keeping safely just in case
-                if field == 'CLOSE': return row['close_price']
-                if field == 'CLOSE_PCT_CHANGE_0': return row['CLOSE_PCT_CHANGE_0']
-                if field == 'CLOSE_PCT_CHANGE_1': return row['CLOSE_PCT_CHANGE_1']
-                if field == 'CLOSE_PCT_CHANGE_1_3': return row['CLOSE_PCT_CHANGE_1_3']
-                if field == 'CLOSE_PCT_CHANGE_1_7': return row['CLOSE_PCT_CHANGE_1_7']
-                return 0
-                
-            def check_conditions(rules):
-                if not rules: return False
-                all_match = True
-                for rule in rules:
-                    field = rule.get('field')
-                    operator = rule.get('operator')
-                    try:
-                        value = float(rule.get('value'))
-                    except:
-                        value = 0
-                        
-                    current_val = get_val(field)
-                    
-                    if pd.isna(current_val):
-                        all_match = False
-                        break
-                        
-                    if operator == 'gt':
-                        if not (current_val > value): all_match = False
-                    elif operator == 'lt':
-                        if not (current_val < value): all_match = False
-                    elif operator == 'eq':
-                        if not (current_val == value): all_match = False
-                    elif operator == 'gte':
-                        if not (current_val >= value): all_match = False
-                    elif operator == 'lte':
-                        if not (current_val <= value): all_match = False
-                        
-                    if not all_match: break
-                return all_match
+    @staticmethod
+    def signal_dates(dates, rows):
+        """
+        Signal dates of bars `rows` (ascending) of a date-sorted datetime64
+        array: the next bar's date, or for the last bar the next open
+        market day.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        n = len(dates)
+        result = dates[np.minimum(rows + 1, n - 1)].tolist()
+        if len(rows) and rows[-1] == n - 1:
+            signal_date = result[-1] + timedelta(days=1)
+            while True:
+                is_open, _ = MarketSchedule.is_market_open(signal_date)
+                if is_open:
+                    break
+                signal_date += timedelta(days=1)
+            result[-1] = signal_date
+        return result
 
-            direction = None
-            output_pct = 0.0
-            
-            # Iterating through Unified Blocks
-            # The FIRST block that matches triggers the signal.
-            for block in strategy_blocks:
-                if check_conditions(block.get('rules', [])):
-                    action = block.get('action', 'BUY').upper()
-                    if action == 'BUY':
-                        direction = 'UP'
-                    elif action == 'SELL':
-                        direction = 'DOWN'
-                    
-                    try:
-                        output_pct = float(block.get('output_percentage', 0))
-                    except: 
-                        output_pct = 0
-                    break # Stop at first match
-            
-            if direction:
-                # Find next trading day
-                today_date = row['date']
-                if i < len(df) - 1:
-                    signal_date = df.iloc[i+1]['date']
-                else:
-                    signal_date = today_date + timedelta(days=1)
-                    while True:
-                        is_open, _ = MarketSchedule.is_market_open(signal_date)
-                        if is_open: break
-                        signal_date += timedelta(days=1)
-                
-                # Calculate Expected Value
-                expected_price = 0.0
-                
-                if output_pct != 0:
-                     if direction == 'UP':
-                         expected_price = round(row['close_price'] * (1 + output_pct / 100), 2)
-                     elif direction == 'DOWN':
-                         # Down means price drop
-                         expected_price = round(row['close_price'] * (1 - output_pct / 100), 2)
-                else:
-                     momentum = row['close_price'] - prev_row['close_price']
-                     expected_price = round(row['close_price'] + momentum, 2)
-                
-                signals.append({
-                    'date': signal_date,
-                    'signal_direction': direction,
-                    'expected_value': expected_price
-                })
+    @staticmethod
+    def _cents(close):
+        """Close prices (2 decimal places) as exact int64 cents."""
+        return np.rint(np.asarray(close, dtype=np.float64) * 100).astype(np.int64)
+
+    @staticmethod
+    def _round_half_even(numerator, denominator):
+        """numerator / denominator rounded like Decimal (ROUND_HALF_EVEN), in ints."""
+        quotient, remainder = np.divmod(numerator, denominator)
+        twice = 2 * remainder
+        return quotient + ((twice > denominator) | ((twice == denominator) & (quotient % 2 == 1)))
 
-        
-        return signals
     @staticmethod
-    def calculate_one_day_trend(stock_prices):
+    def _decimals(cents):
+        """Cents as 2-decimal Decimals (as the Decimal loops produce them)."""
+        return [Decimal(c).scaleb(-2) for c in cents.tolist()]
+
+    @classmethod
+    def get_calculator_mode(cls) -> str:
+        """
+        Predefined calculator mode from SystemConfig ('strategy.calculator_mode').
+        'vectorized' uses the array implementations, 'legacy' the row-by-row
+        Decimal loops (kept for parity testing).
+        """
+        from apps.adminpanel.models import SystemConfig
+        config = SystemConfig.objects.filter(key='strategy.calculator_mode').first()
+        mode = config.value.strip().lower() if config else 'vectorized'
+        return mode if mode in ('vectorized', 'legacy') else 'vectorized'
+
+    @classmethod
+    def calculate_one_day_trend(cls, stock_prices):
+        """
+        Strategy 1: One-Day Close Price Trend
+        - If today > yesterday: UP (today < yesterday: DOWN)
+        - Expected Value = today + (today - yesterday)
+        Prices are compared as exact cents over shifted arrays.
+        """
+        series = as_price_series(stock_prices)
+        if len(series) < 2:
+            return []
+        cents = cls._cents(series.close)
+
+        diff = np.zeros(len(cents), dtype=np.int64)
+        diff[1:] = cents[1:] - cents[:-1]
+        rows = np.flatnonzero(diff)
+
+        return [
+            {
+                'date': signal_date, # Signal is for the NEXT TRADING day
+                'signal_direction': 'UP' if direction > 0 else 'DOWN',
+                'expected_value': expected_price,
+                'entry_price': entry_price
+            }
+            for signal_date, direction, expected_price, entry_price in zip(
+                cls.signal_dates(series.dates, rows),
+                diff[rows].tolist(),
+                cls._decimals(cents[rows] + diff[rows]),
+                cls._decimals(cents[rows]),
+            )
+        ]
+
+    @classmethod
+    def calculate_three_day_trend(cls, stock_prices):
+        """
+        Strategy 2: Three-Day Trend Average
+        - Two rising closes: UP, two falling closes: DOWN
+        - Expected Value = today + average of the two moves
+        """
+        series = as_price_series(stock_prices)
+        if len(series) < 3:
+            return []
+        cents = cls._cents(series.close)
+        today, yesterday, day_before = cents[2:], cents[1:-1], cents[:-2]
+
+        direction = np.zeros(len(today), dtype=np.int8)
+        direction[(today > yesterday) & (yesterday > day_before)] = 1
+        direction[(today < yesterday) & (yesterday < day_before)] = -1
+        hits = np.flatnonzero(direction)
+        rows = hits + 2
+
+        # today + ((today - yesterday) + (yesterday - day_before)) / 2, rounded to cents
+        moves = (today[hits] - yesterday[hits]) + (yesterday[hits] - day_before[hits])
+        expected = cls._round_half_even(2 * today[hits] + moves, 2)
+
+        return [
+            {
+                'date': signal_date,
+                'signal_direction': 'UP' if code > 0 else 'DOWN',
+                'expected_value': expected_price,
+                'entry_price': entry_price
+            }
+            for signal_date, code, expected_price, entry_price in zip(
+                cls.signal_dates(series.dates, rows),
+                direction[hits].tolist(),
+                cls._decimals(expected),
+                cls._decimals(cents[rows]),
+            )
+        ]
+
+    @classmethod
+    def calculate_oversold_reversal(cls, stock_prices):
+        """
+        Strategy: Oversold Reversal (OVERSOLD_REVERSAL)
+        Conditions:
+        1. 20% Drop in last 10 sessions: (Price[-10] - Price[0]) / Price[-10] >= 0.20
+        2. At least 5 Red candles in last 10 sessions.
+        3. Last 2 days (Today, Yesterday) closing Green (Close > Prev Close).
+        Red candles are counted with a rolling sum; all conditions are
+        evaluated on exact cents.
+        """
+        series = as_price_series(stock_prices)
+        n = len(series)
+        # Need at least 11 days (Day -10 to Today)
+        if n < 11:
+            return []
+        cents = cls._cents(series.close)
+
+        red = np.zeros(n, dtype=np.int64)
+        red[1:] = cents[1:] < cents[:-1]
+        red_total = np.cumsum(red)
+
+        current = cents[10:]
+        start = cents[:-10]
+        # Red sessions among [i-9, i]
+        red_candles = red_total[10:] - red_total[:-10]
+        is_green = (cents[10:] > cents[9:-1]) & (cents[9:-1] > cents[8:-2])
+        # Decimal drop_pct vs float 0.20: the float is slightly above 0.2, so an exact 20% drop fails
+        dropped = (start > 0) & (5 * (start - current) > start)
+
+        hits = np.flatnonzero(is_green & dropped & (red_candles >= 5))
+        rows = hits + 10
+        close = cents[rows]
+
+        return [
+            {
+                'date': signal_date,
+                'signal_direction': 'UP',
+                # Expected Value: 5% Bounce Target, Stop Loss: 5% Down
+                'expected_value': expected_price,
+                'stop_loss': stop_loss,
+                'entry_price': entry_price # Entry is Today's Close
+            }
+            for signal_date, expected_price, stop_loss, entry_price in zip(
+                cls.signal_dates(series.dates, rows),
+                cls._decimals(cls._round_half_even(close * 105, 100)),
+                cls._decimals(cls._round_half_even(close * 95, 100)),
+                cls._decimals(close),
+            )
+        ]
+
+    @staticmethod
+    def calculate_one_day_trend_legacy(stock_prices):
         """
         Strategy 1: One-Day Close Price Trend
         - If today > yesterday: UP
@@ -227,16 +501,19 @@ class StrategyEngine:
           Re-reading: "Expected price or expected percentage". 
           Prompt: "The expected percentage for the next day is calculated as: today_close − yesterday_close."
           Okay, I will store this difference as 'expected_value'.
+        Row-by-row reference of calculate_one_day_trend.
         """
         signals = []
-        # sort by date asc
-        sorted_prices = sorted(stock_prices, key=lambda x: x.date)
+        # sorted by date asc
+        series = as_price_series(stock_prices)
+        dates = series.date_list()
+        closes = series.decimal_close()
         
-        for i in range(1, len(sorted_prices)):
-            today = sorted_prices[i]
-            yesterday = sorted_prices[i-1]
+        for i in range(1, len(closes)):
+            today_close = closes[i]
+            yesterday_close = closes[i-1]
             
-            diff = today.close_price - yesterday.close_price
+            diff = today_close - yesterday_close
             direction = None
             if diff > 0:
                 direction = 'UP'
@@ -248,13 +525,13 @@ class StrategyEngine:
             if direction:
                 # Expected Value = Current Price + Momentum (Diff)
                 # Requirement: "stock price with calculation... maximum upto 2 decimal"
-                expected_price = round(today.close_price + diff, 2)
+                expected_price = round(today_close + diff, 2)
                 
                 # Determine Signal Date
-                if i < len(sorted_prices) - 1:
-                    signal_date = sorted_prices[i+1].date
+                if i < len(closes) - 1:
+                    signal_date = dates[i+1]
                 else:
-                    signal_date = today.date + timedelta(days=1)
+                    signal_date = dates[i] + timedelta(days=1)
                     while True:
                         is_open, _ = MarketSchedule.is_market_open(signal_date)
                         if is_open:
@@ -265,48 +542,51 @@ class StrategyEngine:
                     'date': signal_date, # Signal is for the NEXT TRADING day
                     'signal_direction': direction,
                     'expected_value': expected_price,
-                    'entry_price': today.close_price
+                    'entry_price': today_close
                 })
 
                 
         return signals
 
     @staticmethod
-    def calculate_three_day_trend(stock_prices):
+    def calculate_three_day_trend_legacy(stock_prices):
         """
         Strategy 2: Three-Day Trend Average
+        Row-by-row reference of calculate_three_day_trend.
         """
         signals = []
-        sorted_prices = sorted(stock_prices, key=lambda x: x.date)
+        series = as_price_series(stock_prices)
+        dates = series.date_list()
+        closes = series.decimal_close()
         
-        for i in range(2, len(sorted_prices)):
-            today = sorted_prices[i]
-            yesterday = sorted_prices[i-1]
-            day_before = sorted_prices[i-2]
+        for i in range(2, len(closes)):
+            today_close = closes[i]
+            yesterday_close = closes[i-1]
+            day_before_close = closes[i-2]
             
-            diff1 = today.close_price - yesterday.close_price
-            diff2 = yesterday.close_price - day_before.close_price
+            diff1 = today_close - yesterday_close
+            diff2 = yesterday_close - day_before_close
             
             direction = None
             avg_momentum = None
             
-            if today.close_price > yesterday.close_price and yesterday.close_price > day_before.close_price:
+            if today_close > yesterday_close and yesterday_close > day_before_close:
                 direction = 'UP'
                 avg_momentum = (diff1 + diff2) / 2
-            elif today.close_price < yesterday.close_price and yesterday.close_price < day_before.close_price:
+            elif today_close < yesterday_close and yesterday_close < day_before_close:
                 direction = 'DOWN'
                 avg_momentum = (diff1 + diff2) / 2
             
             # If mixed, direction remains None
             
             if direction:
-                 expected_price = round(today.close_price + avg_momentum, 2)
+                 expected_price = round(today_close + avg_momentum, 2)
                  
                  # Determine Signal Date
-                 if i < len(sorted_prices) - 1:
-                     signal_date = sorted_prices[i+1].date
+                 if i < len(closes) - 1:
+                     signal_date = dates[i+1]
                  else:
-                     signal_date = today.date + timedelta(days=1)
+                     signal_date = dates[i] + timedelta(days=1)
                      while True:
                          is_open, _ = MarketSchedule.is_market_open(signal_date)
                          if is_open:
@@ -317,50 +597,52 @@ class StrategyEngine:
                     'date': signal_date,
                     'signal_direction': direction,
                     'expected_value': expected_price,
-                    'entry_price': today.close_price
+                    'entry_price': today_close
                 })
 
             
-        return signals
         return signals
     @staticmethod
-    def calculate_oversold_reversal(stock_prices):
+    def calculate_oversold_reversal_legacy(stock_prices):
         """
         Strategy: Oversold Reversal (OVERSOLD_REVERSAL)
         Conditions:
         1. 20% Drop in last 10 sessions: (Price[-10] - Price[0]) / Price[-10] >= 0.20
         2. At least 5 Red candles in last 10 sessions.
         3. Last 2 days (Today, Yesterday) closing Green (Close > Prev Close).
+        Row-by-row reference of calculate_oversold_reversal.
         """
         signals = []
-        sorted_prices = sorted(stock_prices, key=lambda x: x.date)
+        series = as_price_series(stock_prices)
+        dates = series.date_list()
+        closes = series.decimal_close()
         
         # Need at least 11 days (Day -10 to Today)
-        if len(sorted_prices) < 11:
+        if len(closes) < 11:
             return []
 
-        for i in range(10, len(sorted_prices)):
-            current = sorted_prices[i]       # Day 0
-            prev1 = sorted_prices[i-1]       # Day -1
-            prev2 = sorted_prices[i-2]       # Day -2
+        for i in range(10, len(closes)):
+            current_close = closes[i]       # Day 0
+            prev1_close = closes[i-1]       # Day -1
+            prev2_close = closes[i-2]       # Day -2
             
             # Condition 3: Last 2 Days Green
             # Today must be Green (Close > Prev Close)
             # Yesterday must be Green (Close > Day Before Close)
             # Wait, user said "from last 2 days its closing in green". 
             # Implies Today (i) and Yesterday (i-1).
-            is_today_green = current.close_price > prev1.close_price
-            is_prev_green = prev1.close_price > prev2.close_price
+            is_today_green = current_close > prev1_close
+            is_prev_green = prev1_close > prev2_close
             
             if not (is_today_green and is_prev_green):
                 continue
 
             # Condition 1: 20% Drop in last 10 days
             # Start of window (Day -10)
-            start_node = sorted_prices[i-10]
+            start_close = closes[i-10]
             
             # Use High of Start Node? or Close? Usually Close to Close.
-            drop_pct = (start_node.close_price - current.close_price) / start_node.close_price
+            drop_pct = (start_close - current_close) / start_close
             if drop_pct < 0.20:
                 continue
                 
@@ -372,9 +654,7 @@ class StrategyEngine:
             red_candles = 0
             for j in range(i-9, i+1): 
                 # j is day index. Compare with j-1.
-                day_j = sorted_prices[j]
-                day_prev = sorted_prices[j-1]
-                if day_j.close_price < day_prev.close_price:
+                if closes[j] < closes[j-1]:
                     red_candles += 1
             
             if red_candles < 5:
@@ -383,15 +663,15 @@ class StrategyEngine:
             # All conditions met -> REVERSAL UP
             direction = 'UP'
             # Expected Value: 5% Bounce Target
-            expected_price = round(current.close_price * Decimal('1.05'), 2)
+            expected_price = round(current_close * Decimal('1.05'), 2)
             # Stop Loss: 5% Down
-            stop_loss = round(current.close_price * Decimal('0.95'), 2)
+            stop_loss = round(current_close * Decimal('0.95'), 2)
             
             # Determine Signal Date (Next Trading Day)
-            if i < len(sorted_prices) - 1:
-                signal_date = sorted_prices[i+1].date
+            if i < len(closes) - 1:
+                signal_date = dates[i+1]
             else:
-                signal_date = current.date + timedelta(days=1)
+                signal_date = dates[i] + timedelta(days=1)
                 while True:
                     is_open, _ = MarketSchedule.is_market_open(signal_date)
                     if is_open: break
@@ -402,182 +682,17 @@ class StrategyEngine:
                 'signal_direction': direction,
                 'expected_value': expected_price,
                 'stop_loss': stop_loss,
-                'entry_price': current.close_price # Entry is Today's Close
+                'entry_price': current_close # Entry is Today's Close
             })
             
-        return signals
-    @staticmethod
-    def calculate_auto_strategy(stock_prices, logic_string):
-        """
-        Execute dynamic logic based on strategy definition.
-        Format expectation:
-        UP: <python expression>
-        DOWN: <python expression>
-        
-        Variables available: 
-        CLOSE, OPEN, HIGH, LOW, VOLUME (Current Candle)
-        CLOSE_1, OPEN_1, ... (Previous Candle)
-        """
-        if not logic_string:
-            return []
-            
-        signals = []
-        sorted_prices = sorted(stock_prices, key=lambda x: x.date)
-        
-        # Parse Logic
-        up_condition = None
-        down_condition = None
-        
-        lines = logic_string.split('\n')
-        for line in lines:
-            line = line.strip()
-            if line.startswith('UP:'):
-                up_condition = line.replace('UP:', '').strip()
-            elif line.startswith('DOWN:'):
-                down_condition = line.replace('DOWN:', '').strip()
-        
-        if not up_condition and not down_condition:
-            # Fallback: assume the whole string is an UP condition (simple mode)
-            up_condition = logic_string
-
-        # Parse Expected Logic
-        expected_logic = None
-        for line in lines:
-            if line.strip().startswith('EXPECTED:'):
-                expected_logic = line.replace('EXPECTED:', '').strip()
-                break
-            
-        for i in range(1, len(sorted_prices)):
-            context = {}
-            today = sorted_prices[i]
-            prev = sorted_prices[i-1]
-            prev2 = sorted_prices[i-2] if i >= 2 else None
-            
-            # Context Building
-            context['CLOSE'] = float(today.close_price)
-            context['OPEN'] = float(today.open_price)
-            context['HIGH'] = float(today.high_price)
-            context['LOW'] = float(today.low_price)
-            context['VOLUME'] = float(today.volume) if today.volume else 0
-            
-            context['CLOSE_1'] = float(prev.close_price)
-            context['OPEN_1'] = float(prev.open_price)
-            context['HIGH_1'] = float(prev.high_price)
-            context['LOW_1'] = float(prev.low_price)
-            context['VOLUME_1'] = float(prev.volume) if prev.volume else 0
-
-            # Day Before Yesterday (Handle elegantly if not enough history)
-            if prev2:
-                context['CLOSE_2'] = float(prev2.close_price)
-                context['OPEN_2'] = float(prev2.open_price)
-                context['HIGH_2'] = float(prev2.high_price)
-                context['LOW_2'] = float(prev2.low_price)
-                context['VOLUME_2'] = float(prev2.volume) if prev2.volume else 0
-            else:
-                 # Fallback to avoid crash if strategy attempts usage on day 1
-                context['CLOSE_2'] = context['CLOSE_1'] 
-                context['OPEN_2'] = context['OPEN_1']
-                context['HIGH_2'] = context['HIGH_1']
-                context['LOW_2'] = context['LOW_1']
-                context['VOLUME_2'] = context['VOLUME_1']
-            
-            direction = None
-            
-            # Evaluate using eval() with Restricted Globals for safety
-            # NOTE: This is an internal admin tool, but basic safety applied.
-            safe_dict = {'__builtins__': None, 'abs': abs, 'round': round}
-            safe_dict.update(context)
-            
-            # Evaluate Logic
-            # 1. Custom Expected Logic (Implicit Mode)
-            if expected_logic and not up_condition and not down_condition:
-                try:
-                    val = eval(expected_logic, safe_dict)
-                    expected_price = round(float(val), 2)
-                    
-                    if expected_price > context['CLOSE']:
-                        direction = 'UP'
-                    elif expected_price < context['CLOSE']:
-                        direction = 'DOWN'
-                    # If equal, no signal
-                    
-                except Exception as e:
-                    # print(f"Error evaluating expected logic: {e}")
-                    continue
-
-            # 2. Explicit UP/DOWN Logic (Legacy Mode)
-            else:
-                try:
-                    if up_condition and eval(up_condition, safe_dict):
-                        direction = 'UP'
-                    elif down_condition and eval(down_condition, safe_dict):
-                        direction = 'DOWN'
-                except Exception as e:
-                    continue
-                
-                # Calculate Expected Price for Explicit Mode
-                # Custom Expected Value Logic
-                if expected_logic:
-                    try:
-                        val = eval(expected_logic, safe_dict)
-                        if val is None:
-                            continue # Logic explicit returned None -> No Signal
-                            
-                        expected_price = round(float(val), 2)
-                        
-                        # Implicit Direction Check (Re-evaluate with new val)
-                        # If we are in implicit mode (no up/down condition), we verify direction here again
-                        # But 'direction' var is already set? 
-                        # Wait, logic flow:
-                        # 1. Implicit Mode loop: sets expected_price -> sets direction.
-                        # 2. Explicit Mode loop: sets direction -> sets expected_price.
-                        
-                        # My previous edit put Implicit Mode check BEFORE this block, but this block is inside "if direction:".
-                        # Let's check where I inserted the Implicit Logic.
-                        
-                        # In Step 1059:
-                        # I replaced the "Evaluate Logic" block.
-                        # The implicit mode block runs first.
-                        # AND... it calculates expected_price right there.
-                        
-                        # So if I am in Implicit Mode, I am NOT reaching this "if direction:" block logic for expected_price?
-                        # Ah, I see `if direction:` at the end.
-                        
-                        # Let's review the file content to be sure where I am editing.
-                        pass 
-                    except Exception:
-                         # Fallback if evaluation fails
-                        momentum = today.close_price - prev.close_price
-                        expected_price = round(today.close_price + momentum, 2)
-                else:
-                    # Default momentum
-                    expected_price = round(today.close_price + (today.close_price - prev.close_price), 2)
-
-            if direction:
-                # Determine Signal Date
-                if i < len(sorted_prices) - 1:
-                    signal_date = sorted_prices[i+1].date
-                else:
-                    signal_date = today.date + timedelta(days=1)
-                    while True:
-                        is_open, _ = MarketSchedule.is_market_open(signal_date)
-                        if is_open:
-                            break
-                        signal_date += timedelta(days=1)
-
-                signals.append({
-                    'date': signal_date,
-                    'signal_direction': direction,
-                    'expected_value': expected_price,
-                    'entry_price': context['CLOSE']
-                })
-                
         return signals
     @classmethod
-    def run_strategy(cls, stock, strategy_code, mode='normal', start_date=None, end_date=None):
+    def run_strategy(cls, stock, strategy_code, mode='normal', start_date=None, end_date=None, signals=None):
         """
         Run strategy for a stock.
         mode: 'normal' (append new), 'hard' (recalculate all or range)
+        `signals` (optional) are this stock's precomputed normal-mode
+        signals, e.g. from stream_rule_signals over many stocks.
         """
         try:
             strategy = StrategyMaster.objects.get(code=strategy_code)
@@ -585,9 +700,17 @@ class StrategyEngine:
             print(f"Strategy {strategy_code} not found")
             return
 
-        prices_queryset = StockPriceDaily.objects.filter(stock=stock).order_by('date')
+        # Rule-based (AUTO) strategies read stored indicators
+        uses_rules = strategy.type == 'AUTO'
+
+        # AUTO strategies stream indicators from a checkpoint in normal mode
+        streamed = mode != 'hard' and uses_rules and cls.can_stream(strategy)
+        prices = PriceSeries.empty(stock.id)
 
         if mode == 'hard':
+            # Recalculated history: the next normal run rebuilds the checkpoint
+            StrategyCheckpoint.objects.filter(stock=stock, strategy=strategy).delete()
+
             # Hard sync with date range
             if start_date and end_date:
                 # Delete existing signals in range
@@ -600,65 +723,50 @@ class StrategyEngine:
                 # Fetch prices: We need buffer before start_date to calculate the first signal
                 buffer_days = 5
                 fetch_start = datetime.strptime(str(start_date), '%Y-%m-%d').date() - timedelta(days=buffer_days)
-                prices = list(prices_queryset.filter(date__gte=fetch_start, date__lte=end_date))
+                prices = PriceSeries.load(stock, fetch_start, end_date, indicators=uses_rules)
                 
             else:
                 # Full wipe
                 StrategySignal.objects.filter(stock=stock, strategy=strategy).delete()
-                prices = list(prices_queryset)
+                prices = PriceSeries.load(stock, indicators=uses_rules)
                 
-        else:
+        elif signals is None and not streamed:
             # Normal sync: fetch prices needed for latest calculation
             last_signal = StrategySignal.objects.filter(stock=stock, strategy=strategy).order_by('-date').first()
             query_start = None
             
-            if last_signal:
+            # Indicators of non-streamed rules (VWAP, Bollinger, ...) are computed over the full history
+            if last_signal and not uses_rules:
                 # Calculate for dates AFTER the last signal
                 query_start = last_signal.date - timedelta(days=5) # 5 day buffer for trend calc
-                prices = list(prices_queryset.filter(date__gte=query_start))
+                prices = PriceSeries.load(stock, query_start, indicators=uses_rules)
             else:
-                prices = list(prices_queryset)
+                prices = PriceSeries.load(stock, indicators=uses_rules)
 
-        if not prices:
+        if not len(prices):
             pass # Return 0 signals
 
         # Select Strategy Logic
         generated_signals = []
         
-        if strategy.type == 'AUTO':
-            generated_signals = cls.calculate_auto_strategy(prices, strategy.logic)
-        elif strategy_code == 'DAILY_CLOSE_MOMENTUM':
-            generated_signals = cls.calculate_one_day_trend(prices)
-        elif strategy_code == 'TWO_DAY_CLOSE_MOMENTUM':
-            generated_signals = cls.calculate_three_day_trend(prices)
-        elif strategy_code == 'OVERSOLD_REVERSAL':
-            generated_signals = cls.calculate_oversold_reversal(prices)
+        if signals is not None:
+            generated_signals = signals
+        elif streamed:
+            generated_signals = cls.stream_rule_signals(strategy, [stock]).get(stock.id, [])
+        else:
+            calculator = cls.get_signal_calculator(strategy)
+            if calculator and len(prices):
+                generated_signals = calculator(prices)
             
         # Save Signals
-        new_signals = []
+        candidates = []
         for sig in generated_signals:
             # Filter if date range was specified
             if start_date and end_date:
                  if not (str(start_date) <= str(sig['date']) <= str(end_date)):
                      continue
 
-            # Check if exists (for normal sync or if not deleted)
-            if StrategySignal.objects.filter(stock=stock, strategy=strategy, date=sig['date']).exists():
-                continue
-
-            
-            # Determine Entry Price (Closing Price of 'row' ie. Today)
-            entry_price = round(sig.get('entry_price', 0), 2)
-            # If not explicitly provided by strategy logic (e.g. limit order), default to current close
-            if entry_price == 0 and 'entry_price' not in sig:
-                # We need to find the price for the day the signal was generated (which is NOT sig['date'] necessarily)
-                # sig['date'] is the Target Date (Next Day). 
-                # The loop that generated this signal knows the current row price.
-                # BUT 'sig' dictionary created in calculate methods does not store it currently.
-                # Must update calculate methods to return entry_price.
-                pass 
-
-            new_signals.append(StrategySignal(
+            candidates.append(StrategySignal(
                 stock=stock,
                 strategy=strategy,
                 date=sig['date'],
@@ -667,58 +775,268 @@ class StrategyEngine:
                 stop_loss=sig.get('stop_loss'),
                 entry_price=sig.get('entry_price')
             ))
-        
-        if new_signals:
-            StrategySignal.objects.bulk_create(new_signals, batch_size=500)
+        new_signals = cls.save_signals(candidates)
             
         # RESOLVE PENDING SIGNALS
-        # Check all PENDING signals for this stock/strategy that are in the past
-        pending_signals = StrategySignal.objects.filter(
-            stock=stock, 
-            strategy=strategy, 
-            status='PENDING',
-            date__lt=datetime.now().date()
-        )
-        
-        # We need prices for these dates.
-        # Efficient: Get all dates needed
-        pending_dates = [s.date for s in pending_signals]
-        if pending_dates:
-            price_map = {
-                p.date: p.close_price 
-                for p in StockPriceDaily.objects.filter(stock=stock, date__in=pending_dates)
-            }
-            
-            updates = []
-            for sig in pending_signals:
-                if sig.date in price_map:
-                    exit_price = price_map[sig.date]
-                    sig.exit_price = exit_price
-                    sig.pnl = exit_price - sig.entry_price if sig.entry_price else 0
-                    
-                    # PnL Percent
-                    if sig.entry_price and sig.entry_price > 0:
-                         sig.pnl_percent = (sig.pnl / sig.entry_price) * 100
-                    
-                    # Determine Status
-                    if sig.signal_direction == 'UP':
-                        if exit_price > sig.entry_price:
-                            sig.status = 'WIN'
-                        elif exit_price < sig.entry_price:
-                            sig.status = 'LOSS'
-                        else:
-                            sig.status = 'NEUTRAL'
-                    elif sig.signal_direction == 'DOWN':
-                        if exit_price < sig.entry_price:
-                            sig.status = 'WIN'
-                        elif exit_price > sig.entry_price:
-                            sig.status = 'LOSS'
-                        else:
-                            sig.status = 'NEUTRAL'
-                            
-                    updates.append(sig)
-            
-            if updates:
-                StrategySignal.objects.bulk_update(updates, ['exit_price', 'status', 'pnl', 'pnl_percent'])
+        cls.resolve_pending_signals([stock.id], [strategy.id])
 
         return len(new_signals)
+
+    # Rows per INSERT when saving signals
+    SIGNAL_BATCH_SIZE = 1000
+
+    @classmethod
+    def save_signals(cls, signals):
+        """
+        Persist unsaved StrategySignal rows set-based.
+        One query finds which (stock, strategy, date) keys already have a
+        signal; those are kept as they are (normal runs only append). The
+        rest are upserted on that unique key, so a concurrent run that
+        wrote the same key meanwhile is updated rather than failing.
+        Returns the rows written.
+        """
+        if not signals:
+            return []
+        dates = [signal.date for signal in signals]
+        taken = set(StrategySignal.objects.filter(
+            stock_id__in={signal.stock_id for signal in signals},
+            strategy_id__in={signal.strategy_id for signal in signals},
+            date__range=[min(dates), max(dates)],
+        ).values_list('stock_id', 'strategy_id', 'date'))
+
+        new_signals = []
+        for signal in signals:
+            key = (signal.stock_id, signal.strategy_id, signal.date)
+            if key in taken:
+                continue
+            taken.add(key)
+            new_signals.append(signal)
+
+        if new_signals:
+            StrategySignal.objects.bulk_create(
+                new_signals,
+                batch_size=cls.SIGNAL_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['stock', 'strategy', 'date'],
+                update_fields=['signal_direction', 'expected_value', 'stop_loss', 'entry_price', 'updated_at'],
+            )
+        return new_signals
+
+    @staticmethod
+    def resolve_pending_signals(stock_ids=None, strategy_ids=None):
+        """
+        Resolve past PENDING signals against the close on their date (exit
+        price, PnL and WIN/LOSS/NEUTRAL) with one UPDATE ... FROM join on
+        stock_price_daily. Limited to the given stocks / strategies (all if
+        None). Signals without an entry price have no reference and stay
+        pending; a zero entry price resolves with zero PnL.
+        Returns the number of signals resolved.
+        """
+        conditions = []
+        params = [datetime.now().date()]
+        if stock_ids is not None:
+            conditions.append('AND s.stock_id = ANY(%s)')
+            params.append(list(stock_ids))
+        if strategy_ids is not None:
+            conditions.append('AND s.strategy_id = ANY(%s)')
+            params.append(list(strategy_ids))
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE strategies_signal AS s
+                SET exit_price = p.close_price,
+                    pnl = CASE
+                        WHEN s.entry_price > 0 THEN p.close_price - s.entry_price
+                        ELSE 0
+                    END,
+                    pnl_percent = CASE
+                        WHEN s.entry_price > 0
+                        THEN ROUND((p.close_price - s.entry_price) / s.entry_price * 100, 2)
+                        ELSE s.pnl_percent
+                    END,
+                    status = CASE
+                        WHEN s.signal_direction = 'UP' AND p.close_price > s.entry_price THEN 'WIN'
+                        WHEN s.signal_direction = 'UP' AND p.close_price < s.entry_price THEN 'LOSS'
+                        WHEN s.signal_direction = 'DOWN' AND p.close_price < s.entry_price THEN 'WIN'
+                        WHEN s.signal_direction = 'DOWN' AND p.close_price > s.entry_price THEN 'LOSS'
+                        WHEN s.signal_direction IN ('UP', 'DOWN') THEN 'NEUTRAL'
+                        ELSE s.status
+                    END,
+                    updated_at = NOW()
+                FROM stock_price_daily AS p
+                WHERE p.stock_id = s.stock_id
+                  AND p.date = s.date
+                  AND s.status = 'PENDING'
+                  AND s.entry_price IS NOT NULL
+                  AND s.date < %s
+                  {' '.join(conditions)}
+                """,
+                params
+            )
+            return cursor.rowcount
+
+    # Stocks per strategy sync job chunk (see tasks.sync_strategies_task)
+    DEFAULT_SYNC_CHUNK_SIZE = 100
+
+    @classmethod
+    def get_sync_chunk_size(cls) -> int:
+        """Stocks per strategy sync chunk from SystemConfig ('strategy.sync_chunk_size')."""
+        from apps.adminpanel.models import SystemConfig
+        config = SystemConfig.objects.filter(key='strategy.sync_chunk_size').first()
+        try:
+            size = int(config.value) if config else cls.DEFAULT_SYNC_CHUNK_SIZE
+        except ValueError:
+            size = cls.DEFAULT_SYNC_CHUNK_SIZE
+        return size if size > 0 else cls.DEFAULT_SYNC_CHUNK_SIZE
+
+    @classmethod
+    def sync_stocks(cls, stocks, strategy_code=None, mode='normal', start_date=None, end_date=None) -> int:
+        """
+        Strategy sync of a set of stocks: one strategy by code, or every
+        active strategy if strategy_code is None (see run_strategies).
+        Returns the number of signals generated.
+        """
+        strategies = None
+        if strategy_code:
+            strategies = list(
+                StrategyMaster.objects.filter(code=strategy_code).select_related('rule_based_strategy')
+            )
+            if not strategies:
+                logger.warning(f"Strategy {strategy_code} not found")
+                return 0
+        counts = cls.run_strategies(stocks, strategies, mode, start_date=start_date, end_date=end_date)
+        return sum(counts.values())
+
+    @staticmethod
+    def get_active_strategies():
+        """Active StrategyMaster entries (predefined and AUTO) for batch runs."""
+        return list(
+            StrategyMaster.objects.filter(status='active')
+            .select_related('rule_based_strategy')
+            .order_by('id')
+        )
+
+    @classmethod
+    def run_strategies(cls, stocks, strategies=None, mode='normal', start_date=None, end_date=None):
+        """
+        Batch run_strategy: every strategy (default: all active) for every
+        stock in a single pass.
+        Prices and stored indicators are loaded once per chunk of stocks
+        (in normal mode only back to the oldest latest signal, when no
+        batch-computed rules need the full history); non-streamed
+        strategies are evaluated against that panel and one shared
+        IndicatorSet per stock, streamed ones read only bars after their
+        checkpoints, and the chunk's new signals are saved with
+        one bulk upsert (save_signals). Same modes as run_strategy.
+        Returns {strategy code: signals generated}.
+        """
+        if strategies is None:
+            strategies = cls.get_active_strategies()
+        stocks = list(stocks)
+        counts = {strategy.code: 0 for strategy in strategies}
+        if not strategies or not stocks:
+            return counts
+
+        strategy_ids = [strategy.id for strategy in strategies]
+        # AUTO strategies stream from their checkpoints in normal mode (reading
+        # only new bars); the others are computed from a shared panel
+        streamed_ids = {
+            strategy.id for strategy in strategies
+            if mode != 'hard' and strategy.type == 'AUTO' and cls.can_stream(strategy)
+        }
+        computed = [strategy for strategy in strategies if strategy.id not in streamed_ids]
+        uses_rules = any(strategy.type == 'AUTO' for strategy in computed)
+        ranged = mode == 'hard' and start_date and end_date
+        fetch_start = fetch_end = None
+        if ranged:
+            # Buffer before start_date to calculate the first signal
+            fetch_start = datetime.strptime(str(start_date), '%Y-%m-%d').date() - timedelta(days=5)
+            fetch_end = end_date
+
+        for i in range(0, len(stocks), cls.STREAM_CHUNK_SIZE):
+            chunk = stocks[i:i + cls.STREAM_CHUNK_SIZE]
+            stock_ids = [stock.id for stock in chunk]
+            existing = StrategySignal.objects.filter(stock_id__in=stock_ids, strategy_id__in=strategy_ids)
+
+            last_dates = {}
+            if mode == 'hard':
+                # Recalculated history: the next normal run rebuilds the checkpoints
+                StrategyCheckpoint.objects.filter(stock_id__in=stock_ids, strategy_id__in=strategy_ids).delete()
+                if ranged:
+                    existing.filter(date__range=[start_date, end_date]).delete()
+                else:
+                    existing.delete()
+            else:
+                # Predefined strategies only append after their latest signal (5 day buffer)
+                last_dates = {
+                    (row['stock_id'], row['strategy_id']): row['last_date']
+                    for row in existing.values('stock_id', 'strategy_id').annotate(last_date=Max('date'))
+                }
+
+            load_start = fetch_start
+            if mode != 'hard':
+                # Predefined strategies only need bars from their latest signal (5 day buffer);
+                # batch-computed rules (indicators that do not stream) and first runs need the full history
+                last_signal_dates = [
+                    last_dates.get((stock_id, strategy.id)) for strategy in computed for stock_id in stock_ids
+                ]
+                if not uses_rules and last_signal_dates and all(last_signal_dates):
+                    load_start = min(last_signal_dates) - timedelta(days=5)
+
+            indicator_sets = {}
+            if computed:
+                panel = PricePanel.load(stock_ids, load_start, fetch_end, indicators=uses_rules)
+                indicator_sets = {stock_id: IndicatorSet(panel.series(stock_id)) for stock_id in stock_ids}
+
+            generated = []
+            for strategy in strategies:
+                streamed = None
+                if strategy.id in streamed_ids:
+                    streamed = cls.stream_rule_signals(strategy, stock_ids)
+
+                calculator = None
+                if streamed is None:
+                    if strategy.type == 'AUTO' and strategy.rule_based_strategy is not None:
+                        rules_json = strategy.rule_based_strategy.rules_json
+                        calculator = lambda indicator_set: cls.calculate_rule_based_strategy(
+                            indicator_set.series, rules_json, indicator_set=indicator_set
+                        )
+                    else:
+                        signal_calculator = cls.get_signal_calculator(strategy)
+                        if signal_calculator:
+                            calculator = lambda indicator_set: signal_calculator(indicator_set.series)
+
+                for stock_id in stock_ids:
+                    if streamed is not None:
+                        signals = streamed.get(stock_id, [])
+                    elif calculator and len(indicator_sets[stock_id]):
+                        signals = calculator(indicator_sets[stock_id])
+                    else:
+                        continue
+
+                    last_date = last_dates.get((stock_id, strategy.id))
+                    if streamed is None and strategy.type != 'AUTO' and last_date:
+                        since = last_date - timedelta(days=5)
+                        signals = [sig for sig in signals if sig['date'] > since]
+                    if ranged:
+                        signals = [sig for sig in signals if str(start_date) <= str(sig['date']) <= str(end_date)]
+                    generated.extend((stock_id, strategy, sig) for sig in signals)
+
+            new_signals = cls.save_signals([
+                StrategySignal(
+                    stock_id=stock_id,
+                    strategy=strategy,
+                    date=sig['date'],
+                    signal_direction=sig['signal_direction'],
+                    expected_value=sig.get('expected_value'),
+                    stop_loss=sig.get('stop_loss'),
+                    entry_price=sig.get('entry_price')
+                )
+                for stock_id, strategy, sig in generated
+            ])
+            for signal in new_signals:
+                counts[signal.strategy.code] += 1
+            cls.resolve_pending_signals(stock_ids, strategy_ids)
+
+        return counts
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.4 on 2026-10-17 08:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0003_stockindicatordaily'),
+        ('strategies', '0011_strategysignal_entry_price_strategysignal_exit_price_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StrategyCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_date', models.DateField()),
+                ('last_close', models.FloatField()),
+                ('rules_hash', models.CharField(max_length=64)),
+                ('state', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='strategy_checkpoints', to='stocks.stock')),
+                ('strategy', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='strategies.strategymaster')),
+            ],
+            options={
+                'verbose_name': 'Strategy Checkpoint',
+                'verbose_name_plural': 'Strategy Checkpoints',
+                'db_table': 'strategies_checkpoint',
+                'unique_together': {('stock', 'strategy')},
+            },
+        ),
+    ]
@@ -82,6 +82,32 @@ class StrategySignal(models.Model):
         return f"{self.stock.symbol} - {self.strategy.code} - {self.date}"
 
 
+class StrategyCheckpoint(models.Model):
+    """
+    Streaming indicator state of a rule-based strategy for one stock
+    (see streaming.RuleStream), as of the last processed bar.
+    Valid only for the rules it was built with (rules_hash).
+    """
+
+    stock = models.ForeignKey('stocks.Stock', on_delete=models.CASCADE, related_name='strategy_checkpoints')
+    strategy = models.ForeignKey(StrategyMaster, on_delete=models.CASCADE, related_name='checkpoints')
+    last_date = models.DateField()
+    last_close = models.FloatField()
+    rules_hash = models.CharField(max_length=64)
+    state = models.JSONField(default=dict)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'strategies_checkpoint'
+        unique_together = ['stock', 'strategy']
+        verbose_name = 'Strategy Checkpoint'
+        verbose_name_plural = 'Strategy Checkpoints'
+
+    def __str__(self):
+        return f"{self.stock_id} - {self.strategy_id} @ {self.last_date}"
+
+
 class StrategyRuleBased(models.Model):
     """User-created rule-based strategies."""
     
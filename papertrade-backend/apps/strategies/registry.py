@@ -0,0 +1,324 @@
+"""
+Indicator registry and dependency graph for rule fields.
+
+Every rules_json field (RSI, SMA_20, MACD_HIST, ...) and every intermediate
+series it is derived from (sma:20, ema:12, macd:12:26, ...) is a node with
+named inputs. Nodes are resolved from name patterns, so parametric fields
+need no per-value registration.
+
+An IndicatorSet evaluates nodes for one stock on demand and memoizes them:
+all strategies and blocks run against the same set share every series,
+e.g. SMA_20 and BB_MIDDLE both reuse sma:20, and MACD, MACD_SIGNAL and
+EMA_12 all reuse ema:12. Series kept in the indicator store
+(StockIndicatorDaily) are read from the loaded PriceSeries instead of
+being recomputed.
+
+Price levels (SMA, EMA, bands, VWAP) and ATR are fields in percent of
+close; RSI variants are 0-100, MACD values are in price units.
+"""
+import re
+import numpy as np
+import pandas as pd
+from apps.stocks import indicators
+from apps.backtests.strategies import RSIStrategy, MomentumStrategy
+
+BASE_SERIES = ('close', 'open', 'high', 'low', 'volume')
+
+
+class Node:
+    """A series computed by `function` from the series named in `inputs`."""
+
+    __slots__ = ('name', 'inputs', 'function', 'stored')
+
+    def __init__(self, name, inputs, function, stored=None):
+        self.name = name
+        self.inputs = inputs
+        self.function = function
+        self.stored = stored # indicator store column, if kept there
+
+
+class IndicatorRegistry:
+    """Name patterns -> node builders, with resolved nodes cached."""
+
+    _families = []
+    _nodes = {}
+
+    @classmethod
+    def register(cls, pattern):
+        """Decorator: builder(name, *groups) -> Node (or None for invalid parameters)."""
+        regex = re.compile(f'^(?:{pattern})$')
+
+        def decorator(builder):
+            cls._families.append((regex, builder))
+            return builder
+        return decorator
+
+    @classmethod
+    def node(cls, name):
+        """Node for a series name, None if nothing is registered for it."""
+        if name not in cls._nodes:
+            node = None
+            for regex, builder in cls._families:
+                match = regex.match(name)
+                if match:
+                    node = builder(name, *match.groups())
+                    if node is not None:
+                        break
+            cls._nodes[name] = node
+        return cls._nodes[name]
+
+    @classmethod
+    def is_field(cls, field) -> bool:
+        """Whether `field` is a rules_json field (upper-case public node)."""
+        return bool(field) and field == field.upper() and cls.node(field) is not None
+
+    @classmethod
+    def dependencies(cls, fields):
+        """All series the fields depend on (including themselves), inputs first."""
+        order = []
+        seen = set()
+
+        def visit(name):
+            if name in seen:
+                return
+            seen.add(name)
+            node = cls.node(name)
+            for dependency in (node.inputs if node else ()):
+                visit(dependency)
+            order.append(name)
+
+        for field in sorted(fields):
+            visit(field)
+        return order
+
+
+class IndicatorSet:
+    """Memoized indicator series of one stock (a PriceSeries)."""
+
+    def __init__(self, series):
+        self.series = series
+        self.values = {name: getattr(series, name) for name in BASE_SERIES}
+        self._dates = None
+
+    def __len__(self):
+        return len(self.series)
+
+    def get(self, name):
+        """Values of a series, computing (once) whatever it depends on."""
+        values = self.values.get(name)
+        if values is None:
+            for dependency in IndicatorRegistry.dependencies([name]):
+                if dependency not in self.values:
+                    self.values[dependency] = self._compute(dependency)
+            values = self.values[name]
+        return values
+
+    def _compute(self, name):
+        node = IndicatorRegistry.node(name)
+        if node is None:
+            raise KeyError(f'Unknown indicator {name!r}')
+        stored = self.series.indicators
+        if node.stored and stored is not None and node.stored in stored:
+            return stored[node.stored]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return node.function(*(self.values[dependency] for dependency in node.inputs))
+
+    def frame(self, fields):
+        """Indicator DataFrame for rule evaluation: date, close_price and `fields`."""
+        if self._dates is None:
+            self._dates = self.series.date_list()
+        columns = {'date': self._dates, 'close_price': self.series.close}
+        for field in sorted(fields):
+            columns[field] = self.get(field)
+        return pd.DataFrame(columns)
+
+
+def _params(suffix, defaults):
+    """Integer parameters of a field suffix ('_20_2') padded with defaults."""
+    params = tuple(int(p) for p in suffix.split('_')[1:]) if suffix else ()
+    if len(params) > len(defaults) or any(p <= 0 for p in params):
+        return None
+    return params + defaults[len(params):]
+
+
+def _pct_of_close(values, close):
+    return (values / close) * 100
+
+
+register = IndicatorRegistry.register
+
+
+# Intermediate series
+
+@register(r'sma:(\d+)')
+def _sma(name, period):
+    period = int(period)
+    stored = f'sma_{period}' if period in indicators.SMA_PERIODS else None
+    return Node(name, ('close',), lambda close: indicators.sma(close, period), stored)
+
+
+@register(r'std:(\d+)')
+def _std(name, period):
+    return Node(name, ('close',), lambda close: indicators.rolling_std(close, int(period)))
+
+
+@register(r'ema:(\d+)')
+def _ema(name, period):
+    return Node(name, ('close',), lambda close: indicators.ema(close, int(period)))
+
+
+@register(r'rsi:(\d+)')
+def _rsi(name, period):
+    period = int(period)
+    stored = 'rsi_14' if period == indicators.RSI_PERIOD else None
+    return Node(name, ('close',), lambda close: indicators.rsi(close, period), stored)
+
+
+@register(r'rsi_wilder:(\d+)')
+def _rsi_wilder(name, period):
+    return Node(name, ('close',), lambda close: RSIStrategy(int(period)).calculate(close))
+
+
+@register(r'pct:(\d+)')
+def _pct(name, periods):
+    periods = int(periods)
+    stored = {1: 'close_pct_change_0', 2: 'close_pct_change_1_3', 6: 'close_pct_change_1_7'}.get(periods)
+    return Node(name, ('close',), lambda close: indicators.pct_change(close, periods), stored)
+
+
+@register(r'momentum:(\d+)')
+def _momentum(name, period):
+    return Node(name, ('close',), lambda close: MomentumStrategy(int(period)).calculate(close))
+
+
+@register(r'macd:(\d+):(\d+)')
+def _macd(name, fast, slow):
+    return Node(name, (f'ema:{fast}', f'ema:{slow}'), lambda fast_ema, slow_ema: fast_ema - slow_ema)
+
+
+@register(r'macd_signal:(\d+):(\d+):(\d+)')
+def _macd_signal(name, fast, slow, signal):
+    return Node(name, (f'macd:{fast}:{slow}',), lambda macd: indicators.ema(macd, int(signal)))
+
+
+@register(r'tr')
+def _true_range(name):
+    def true_range(high, low, close):
+        prev_close = np.concatenate(([np.nan], close[:-1]))
+        ranges = np.vstack((high - low, np.abs(high - prev_close), np.abs(low - prev_close)))
+        return np.nanmax(ranges, axis=0) if len(close) else high - low
+    return Node(name, ('high', 'low', 'close'), true_range)
+
+
+@register(r'atr:(\d+)')
+def _atr(name, period):
+    return Node(name, ('tr',), lambda tr: indicators.wilder(tr, int(period)))
+
+
+@register(r'vwap:(\d+)')
+def _vwap(name, period):
+    period = int(period)
+
+    def vwap(high, low, close, volume):
+        typical = (high + low + close) / 3
+        return indicators.rolling_mean(typical * volume, period) / indicators.rolling_mean(volume, period)
+    return Node(name, ('high', 'low', 'close', 'volume'), vwap)
+
+
+# Rule fields
+
+@register(r'RSI')
+def _rsi_field(name):
+    return Node(name, ('rsi:14',), lambda rsi: rsi)
+
+
+@register(r'CLOSE_PCT_CHANGE_(0|1_3|1_7)')
+def _close_pct_change(name, window):
+    periods = {'0': 1, '1_3': 2, '1_7': 6}[window]
+    return Node(name, (f'pct:{periods}',), lambda change: change)
+
+
+@register(r'CLOSE_PCT_CHANGE_1')
+def _close_pct_change_prev(name):
+    # Previous day's change (Day -1 vs Day -2)
+    def shifted(change):
+        out = np.full(len(change), np.nan, dtype=np.float64)
+        out[1:] = change[:-1]
+        return out
+    return Node(name, ('pct:1',), shifted, 'close_pct_change_1')
+
+
+@register(r'SMA_(\d+)')
+def _sma_field(name, period):
+    if int(period) <= 0:
+        return None
+    return Node(name, (f'sma:{int(period)}', 'close'), _pct_of_close)
+
+
+@register(r'EMA((?:_\d+)*)')
+def _ema_field(name, suffix):
+    params = _params(suffix, (20,))
+    return params and Node(name, (f'ema:{params[0]}', 'close'), _pct_of_close)
+
+
+@register(r'RSI_WILDER((?:_\d+)*)')
+def _rsi_wilder_field(name, suffix):
+    params = _params(suffix, (14,))
+    return params and Node(name, (f'rsi_wilder:{params[0]}',), lambda rsi: rsi)
+
+
+@register(r'MACD((?:_\d+)*)')
+def _macd_field(name, suffix):
+    params = _params(suffix, (12, 26, 9))
+    return params and Node(name, ('macd:{}:{}'.format(*params),), lambda macd: macd)
+
+
+@register(r'MACD_SIGNAL((?:_\d+)*)')
+def _macd_signal_field(name, suffix):
+    params = _params(suffix, (12, 26, 9))
+    return params and Node(name, ('macd_signal:{}:{}:{}'.format(*params),), lambda signal: signal)
+
+
+@register(r'MACD_HIST((?:_\d+)*)')
+def _macd_hist_field(name, suffix):
+    params = _params(suffix, (12, 26, 9))
+    return params and Node(
+        name,
+        ('macd:{}:{}'.format(*params[:2]), 'macd_signal:{}:{}:{}'.format(*params)),
+        lambda macd, signal: macd - signal,
+    )
+
+
+@register(r'BB_(UPPER|MIDDLE|LOWER)((?:_\d+)*)')
+def _bollinger_field(name, band, suffix):
+    params = _params(suffix, (20, 2))
+    if not params:
+        return None
+    period, width = params
+    sign = {'UPPER': 1, 'MIDDLE': 0, 'LOWER': -1}[band]
+
+    def bollinger(middle, std, close):
+        if sign > 0:
+            return _pct_of_close(middle + std * width, close)
+        if sign < 0:
+            return _pct_of_close(middle - std * width, close)
+        return _pct_of_close(middle, close)
+    return Node(name, (f'sma:{period}', f'std:{period}', 'close'), bollinger)
+
+
+@register(r'MOMENTUM((?:_\d+)*)')
+def _momentum_field(name, suffix):
+    params = _params(suffix, (10,))
+    return params and Node(name, (f'momentum:{params[0]}',), lambda momentum: momentum)
+
+
+@register(r'ATR((?:_\d+)*)')
+def _atr_field(name, suffix):
+    params = _params(suffix, (14,))
+    return params and Node(name, (f'atr:{params[0]}', 'close'), _pct_of_close)
+
+
+@register(r'VWAP((?:_\d+)*)')
+def _vwap_field(name, suffix):
+    params = _params(suffix, (20,))
+    return params and Node(name, (f'vwap:{params[0]}', 'close'), _pct_of_close)
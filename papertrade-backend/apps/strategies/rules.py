@@ -0,0 +1,134 @@
+"""
+Rule compiler for rule-based strategies.
+
+strategy_blocks are parsed once (field names, operators and values) and
+evaluated column-wise over an indicator frame (see
+StrategyEngine.build_rule_frame) as NumPy boolean masks. The semantics are
+those of the original row-by-row evaluation:
+
+- a rule on a NaN value never matches; unknown operators only require a value;
+- unknown fields read as 0, 'CLOSE' reads close_price;
+- a block with no rules never matches;
+- the first matching block wins (even if its action is neither BUY nor SELL);
+- the first day never signals (momentum needs a previous close).
+"""
+import numpy as np
+
+DIRECTION_UP = 1
+DIRECTION_DOWN = -1
+DIRECTION_NONE = 0
+
+_DIRECTIONS = {1: 'UP', -1: 'DOWN'}
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except:
+        return 0
+
+
+class CompiledRules:
+    """strategy_blocks compiled into vectorized masks."""
+
+    OPERATORS = {
+        'gt': np.greater,
+        'lt': np.less,
+        'eq': np.equal,
+        'gte': np.greater_equal,
+        'lte': np.less_equal,
+    }
+
+    def __init__(self, strategy_blocks):
+        self.blocks = []
+        for block in strategy_blocks:
+            rules = [
+                (rule.get('field').upper(), self.OPERATORS.get(rule.get('operator')), _to_float(rule.get('value')))
+                for rule in block.get('rules', [])
+            ]
+            self.blocks.append({
+                'rules': rules,
+                'action': block.get('action', 'BUY'),
+                'output_pct': _to_float(block.get('output_percentage', 0)),
+            })
+
+    @staticmethod
+    def column(df, field):
+        """Values of a rule field over the frame (a scalar 0 for unknown fields)."""
+        if field in df.columns:
+            return df[field].to_numpy(dtype=np.float64)
+        if field == 'CLOSE':
+            return df['close_price'].to_numpy(dtype=np.float64)
+        return 0.0
+
+    def block_mask(self, df, rules):
+        """Days on which every rule of a block holds."""
+        n = len(df)
+        if not rules:
+            return np.zeros(n, dtype=bool)
+
+        mask = np.ones(n, dtype=bool)
+        with np.errstate(invalid='ignore'):
+            for field, operator, value in rules:
+                values = self.column(df, field)
+                rule_mask = ~np.isnan(values)
+                if operator is not None:
+                    rule_mask = rule_mask & operator(values, value)
+                mask &= rule_mask
+        return mask
+
+    def evaluate(self, df):
+        """
+        Evaluate the blocks over an indicator frame.
+        Returns (directions, expected): int8 direction codes (0 = no signal)
+        and expected prices (NaN where there is no signal).
+        """
+        n = len(df)
+        close = df['close_price'].to_numpy(dtype=np.float64)
+        prev_close = np.empty(n, dtype=np.float64)
+        prev_close[0] = np.nan
+        prev_close[1:] = close[:-1]
+
+        directions = np.zeros(n, dtype=np.int8)
+        expected = np.full(n, np.nan, dtype=np.float64)
+
+        # Days not yet claimed by an earlier block (day 0 never signals)
+        open_days = np.ones(n, dtype=bool)
+        if n:
+            open_days[0] = False
+
+        for block in self.blocks:
+            if not open_days.any():
+                break
+            hit = open_days & self.block_mask(df, block['rules'])
+            if not hit.any():
+                continue
+            open_days &= ~hit
+
+            action = block['action'].upper()
+            if action == 'BUY':
+                direction = DIRECTION_UP
+            elif action == 'SELL':
+                direction = DIRECTION_DOWN
+            else:
+                continue # Matched, but the block does not signal
+
+            output_pct = block['output_pct']
+            if output_pct != 0:
+                if direction == DIRECTION_UP:
+                    values = close[hit] * (1 + output_pct / 100)
+                else:
+                    # Down means price drop
+                    values = close[hit] * (1 - output_pct / 100)
+            else:
+                momentum = close[hit] - prev_close[hit]
+                values = close[hit] + momentum
+
+            directions[hit] = direction
+            expected[hit] = np.round(values, 2)
+
+        return directions, expected
+
+    @staticmethod
+    def direction_name(code):
+        return _DIRECTIONS.get(int(code))
@@ -0,0 +1,373 @@
+"""
+Streaming indicators for incremental (daily) strategy runs.
+
+Each indicator consumes one close at a time with bounded state that can be
+saved as JSON, so a daily run only needs the bars since the last checkpoint
+(StrategyCheckpoint) instead of re-reading history.
+
+Windowed indicators (SMA, rolling RSI, % changes) keep their window and sum
+it in the same fixed order as apps.stocks.indicators, so streamed values are
+bit-for-bit equal to the stored / batch ones. Recursive indicators (EMA,
+Wilder RSI, MACD, ATR) keep their smoothed value and repeat the batch
+kernel's arithmetic: the same seed mean, then pandas' ewm(adjust=False)
+step, so they match the batch values as well.
+"""
+import hashlib
+import json
+import math
+import re
+from abc import ABC, abstractmethod
+from collections import deque
+import numpy as np
+from .registry import IndicatorRegistry
+
+NAN = float('nan')
+
+
+def _window_mean(window, period):
+    """Mean of a full window, summed left to right (see indicators.rolling_mean)."""
+    total = 0.0
+    for i, value in enumerate(window):
+        total = value if i == 0 else total + value
+    return total / period
+
+
+class StreamingIndicator(ABC):
+    """Base class: update(close) -> value, plus JSON state."""
+
+    # Bar indicators are updated with (close, high, low)
+    uses_range = False
+
+    @abstractmethod
+    def update(self, close):
+        """Consume the next close and return the indicator value."""
+
+    @abstractmethod
+    def get_state(self):
+        """JSON-serializable state."""
+
+    @abstractmethod
+    def set_state(self, state):
+        """Restore state saved by get_state."""
+
+
+class RollingSMA(StreamingIndicator):
+    """Simple moving average over the last `period` closes."""
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque(maxlen=period)
+
+    def update(self, close):
+        self.window.append(close)
+        if len(self.window) < self.period:
+            return NAN
+        return _window_mean(self.window, self.period)
+
+    def get_state(self):
+        return {'window': list(self.window)}
+
+    def set_state(self, state):
+        self.window = deque(state['window'], maxlen=self.period)
+
+
+class RollingRSI(StreamingIndicator):
+    """RSI from simple rolling means of gains and losses (the rule engine's RSI)."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = None
+        self.gains = deque(maxlen=period)
+        self.losses = deque(maxlen=period)
+
+    def update(self, close):
+        delta = close - self.prev_close if self.prev_close is not None else NAN
+        self.prev_close = close
+        self.gains.append(delta if delta > 0 else 0.0)
+        self.losses.append(-delta if delta < 0 else 0.0)
+        if len(self.gains) < self.period:
+            return NAN
+
+        avg_gain = _window_mean(self.gains, self.period)
+        avg_loss = _window_mean(self.losses, self.period)
+        if avg_loss == 0:
+            return NAN if avg_gain == 0 else 100.0
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+    def get_state(self):
+        return {'prev_close': self.prev_close, 'gains': list(self.gains), 'losses': list(self.losses)}
+
+    def set_state(self, state):
+        self.prev_close = state['prev_close']
+        self.gains = deque(state['gains'], maxlen=self.period)
+        self.losses = deque(state['losses'], maxlen=self.period)
+
+
+class EMA(StreamingIndicator):
+    """
+    Exponential moving average as indicators.ema: seeded with the mean of
+    the first `period` values (leading NaNs skipped), then smoothed with
+    alpha (default 2 / (period + 1)).
+    """
+
+    def __init__(self, period, alpha=None):
+        self.period = period
+        if alpha is None:
+            alpha = 2 / (period + 1)
+        # pandas' ewm weights (alpha goes through the center of mass)
+        self.new_weight = 1. / (1. + (1 - alpha) / alpha)
+        self.old_weight = 1. - self.new_weight
+        self.seed = []
+        self.value = None
+
+    def update(self, value):
+        if self.value is None:
+            if math.isnan(value) and not self.seed:
+                return NAN
+            self.seed.append(value)
+            if len(self.seed) < self.period:
+                return NAN
+            self.value = float(np.array(self.seed, dtype=np.float64).mean())
+            self.seed = []
+        elif self.value != value:
+            self.value = (
+                (self.old_weight * self.value + self.new_weight * value)
+                / (self.old_weight + self.new_weight)
+            )
+        return self.value
+
+    def get_state(self):
+        return {'seed': self.seed, 'value': self.value}
+
+    def set_state(self, state):
+        self.seed = list(state['seed'])
+        self.value = state['value']
+
+
+class WilderRSI(StreamingIndicator):
+    """RSI from Wilder-smoothed gains and losses (RSIStrategy.calculate)."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = None
+        self.avg_gain = EMA(period, alpha=1 / period)
+        self.avg_loss = EMA(period, alpha=1 / period)
+
+    def update(self, close):
+        if self.prev_close is None:
+            self.prev_close = close
+            return NAN
+        delta = close - self.prev_close
+        self.prev_close = close
+        avg_gain = self.avg_gain.update(delta if delta > 0 else 0.0)
+        avg_loss = self.avg_loss.update(-delta if delta < 0 else 0.0)
+        if math.isnan(avg_gain):
+            return NAN
+        if avg_loss == 0:
+            return 100.0
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+    def get_state(self):
+        return {
+            'prev_close': self.prev_close,
+            'avg_gain': self.avg_gain.get_state(),
+            'avg_loss': self.avg_loss.get_state(),
+        }
+
+    def set_state(self, state):
+        self.prev_close = state['prev_close']
+        self.avg_gain.set_state(state['avg_gain'])
+        self.avg_loss.set_state(state['avg_loss'])
+
+
+class MACD(StreamingIndicator):
+    """MACD line (fast EMA - slow EMA), NaN until the slow EMA is seeded."""
+
+    def __init__(self, fast=12, slow=26):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+
+    def update(self, close):
+        return self.fast.update(close) - self.slow.update(close)
+
+    def get_state(self):
+        return {'fast': self.fast.get_state(), 'slow': self.slow.get_state()}
+
+    def set_state(self, state):
+        self.fast.set_state(state['fast'])
+        self.slow.set_state(state['slow'])
+
+
+class MACDSignal(StreamingIndicator):
+    """MACD signal line: EMA of the MACD line."""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.macd = MACD(fast, slow)
+        self.signal = EMA(signal)
+
+    def update(self, close):
+        return self.signal.update(self.macd.update(close))
+
+    def get_state(self):
+        return {'macd': self.macd.get_state(), 'signal': self.signal.get_state()}
+
+    def set_state(self, state):
+        self.macd.set_state(state['macd'])
+        self.signal.set_state(state['signal'])
+
+
+class ATR(StreamingIndicator):
+    """Average true range: Wilder-smoothed true range of (close, high, low) bars."""
+
+    uses_range = True
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = None
+        self.average = EMA(period, alpha=1 / period)
+
+    def update(self, close, high, low):
+        true_range = high - low
+        if self.prev_close is not None:
+            true_range = max(true_range, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        return self.average.update(true_range)
+
+    def get_state(self):
+        return {'prev_close': self.prev_close, 'average': self.average.get_state()}
+
+    def set_state(self, state):
+        self.prev_close = state['prev_close']
+        self.average.set_state(state['average'])
+
+
+# Registry series (see registry.py) that stream: name pattern -> indicator
+STREAMED_SERIES = [
+    (re.compile(r'^ema:(\d+)$'), EMA),
+    (re.compile(r'^rsi_wilder:(\d+)$'), WilderRSI),
+    (re.compile(r'^macd:(\d+):(\d+)$'), MACD),
+    (re.compile(r'^macd_signal:(\d+):(\d+):(\d+)$'), MACDSignal),
+    (re.compile(r'^atr:(\d+)$'), ATR),
+]
+
+
+def streamed_series(name):
+    """A new streaming indicator for a registry series, None if it does not stream."""
+    for regex, indicator in STREAMED_SERIES:
+        match = regex.match(name)
+        if match:
+            return indicator(*(int(param) for param in match.groups()))
+    return None
+
+
+class PctChange(StreamingIndicator):
+    """Percentage change over `periods` closes."""
+
+    def __init__(self, periods=1):
+        self.periods = periods
+        self.window = deque(maxlen=periods + 1)
+
+    def update(self, close):
+        self.window.append(close)
+        if len(self.window) <= self.periods:
+            return NAN
+        base = self.window[0]
+        if base == 0:
+            return math.copysign(math.inf, close) if close else NAN
+        return (close / base - 1) * 100
+
+    def get_state(self):
+        return {'window': list(self.window)}
+
+    def set_state(self, state):
+        self.window = deque(state['window'], maxlen=self.periods + 1)
+
+
+class RuleStream:
+    """
+    Streaming indicator columns of one rule-based strategy for one stock.
+    Produces the same frame columns as StrategyEngine.build_rule_frame.
+
+    RSI, SMA_n and CLOSE_PCT_CHANGE_* are columns of their own. Other
+    fields (EMA_n, RSI_WILDER_n, MACD*, ATR_n) are derived from columns
+    named after the registry series they depend on (ema:20, atr:14, ...).
+    """
+
+    # Fields with a column of their own
+    WINDOWED_FIELDS = re.compile(r'^(RSI|SMA_\d+|CLOSE_PCT_CHANGE_(0|1|1_3|1_7))$')
+
+    def __init__(self, needed_fields):
+        self.columns = {
+            'CLOSE_PCT_CHANGE_0': PctChange(1),
+            'CLOSE_PCT_CHANGE_1_3': PctChange(2),
+            'CLOSE_PCT_CHANGE_1_7': PctChange(6),
+        }
+        if 'RSI' in needed_fields:
+            self.columns['RSI'] = RollingRSI(14)
+        for field in sorted(needed_fields):
+            if field.startswith('SMA_'):
+                self.columns[field] = RollingSMA(int(field.split('_')[1]))
+            elif not self.WINDOWED_FIELDS.match(field):
+                for name in self.series_inputs(field):
+                    if name not in self.columns:
+                        self.columns[name] = streamed_series(name)
+        self.prev_change = NAN # CLOSE_PCT_CHANGE_1 is the previous bar's change
+
+    @staticmethod
+    def series_inputs(field):
+        """Registry series a derived field is computed from (besides close)."""
+        node = IndicatorRegistry.node(field)
+        return [name for name in node.inputs if name != 'close'] if node else []
+
+    @classmethod
+    def supports(cls, needed_fields):
+        """Whether every field streams (e.g. VWAP, MOMENTUM and Bollinger bands do not)."""
+        return all(
+            cls.WINDOWED_FIELDS.match(field) or (
+                IndicatorRegistry.node(field) is not None
+                and all(
+                    any(regex.match(name) for regex, _ in STREAMED_SERIES)
+                    for name in cls.series_inputs(field)
+                )
+            )
+            for field in needed_fields
+        )
+
+    @staticmethod
+    def rules_hash(rules_json):
+        """Checkpoints are only valid for the rules they were built with."""
+        canonical = json.dumps(rules_json, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def advance(self, closes, highs=None, lows=None):
+        """
+        Feed new closes (with their highs and lows when a column uses
+        them, see needs_range); returns {column: [values]} aligned with them.
+        """
+        values = {name: [] for name in self.columns}
+        values['CLOSE_PCT_CHANGE_1'] = []
+        for i, close in enumerate(closes):
+            for name, indicator in self.columns.items():
+                if indicator.uses_range:
+                    values[name].append(indicator.update(close, highs[i], lows[i]))
+                else:
+                    values[name].append(indicator.update(close))
+            values['CLOSE_PCT_CHANGE_1'].append(self.prev_change)
+            self.prev_change = values['CLOSE_PCT_CHANGE_0'][-1]
+        return values
+
+    @property
+    def needs_range(self):
+        """Whether advance needs highs and lows."""
+        return any(indicator.uses_range for indicator in self.columns.values())
+
+    def get_state(self):
+        state = {name: indicator.get_state() for name, indicator in self.columns.items()}
+        state['prev_change'] = None if math.isnan(self.prev_change) else self.prev_change
+        return state
+
+    def set_state(self, state):
+        for name, indicator in self.columns.items():
+            indicator.set_state(state[name])
+        prev_change = state.get('prev_change')
+        self.prev_change = NAN if prev_change is None else prev_change
@@ -0,0 +1,106 @@
+"""
+Celery tasks for strategy signal sync.
+"""
+from celery import shared_task, chord
+import logging
+from django.db import transaction
+from django.utils import timezone
+from apps.stocks.models import Stock
+from apps.sync.models import SyncLog
+from apps.sync.utils import record_sync_progress, update_sync_extra, fail_sync_log
+from .logic import StrategyEngine
+from .models import StrategyMaster
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def sync_strategies_task(sync_log_id: int, stock_ids: list, strategy_code: str = None,
+                         mode: str = 'normal', start_date: str = None, end_date: str = None):
+    """
+    Strategy sync job for many stocks.
+    The stocks are split into chunks processed in parallel by
+    sync_strategy_chunk_task; finish_strategy_sync_task closes the SyncLog.
+    strategy_code None syncs all active strategies.
+    """
+    try:
+        if strategy_code and not StrategyMaster.objects.filter(code=strategy_code).exists():
+            raise ValueError(f"Strategy {strategy_code} not found")
+
+        chunk_size = StrategyEngine.get_sync_chunk_size()
+        chunks = [stock_ids[i:i + chunk_size] for i in range(0, len(stock_ids), chunk_size)]
+        SyncLog.objects.filter(id=sync_log_id).update(total_items=len(stock_ids))
+        update_sync_extra(sync_log_id, status='running', chunks=len(chunks))
+
+        if not chunks:
+            finish_strategy_sync_task([], sync_log_id)
+            return
+
+        chord(
+            sync_strategy_chunk_task.s(sync_log_id, chunk, strategy_code, mode, start_date, end_date)
+            for chunk in chunks
+        )(finish_strategy_sync_task.s(sync_log_id).on_error(
+            fail_strategy_sync_task.s(sync_log_id)
+        ))
+
+        logger.info(f"Strategy sync {sync_log_id} dispatched as {len(chunks)} chunks")
+
+    except Exception as e:
+        logger.error(f"Strategy sync {sync_log_id} failed: {str(e)}")
+        fail_sync_log(sync_log_id, e)
+
+
+@shared_task
+def sync_strategy_chunk_task(sync_log_id: int, stock_ids: list, strategy_code: str = None,
+                             mode: str = 'normal', start_date: str = None, end_date: str = None):
+    """
+    Sync one chunk of stocks in a single pass and record its progress.
+    If the chunk fails as a whole, its stocks are retried one by one so
+    failures are recorded per stock (all of them if the stocks could not
+    be loaded).
+    """
+    stocks = []
+    signals_generated = 0
+    errors = []
+
+    try:
+        stocks = list(Stock.objects.filter(id__in=stock_ids).order_by('id'))
+        with transaction.atomic():
+            signals_generated = StrategyEngine.sync_stocks(stocks, strategy_code, mode, start_date, end_date)
+    except Exception as e:
+        if not stocks:
+            logger.error(f"Strategy sync {sync_log_id} chunk failed: {str(e)}")
+            errors = [{'stock': stock_id, 'error': str(e)} for stock_id in stock_ids]
+            record_sync_progress(sync_log_id, 0, errors, signals_generated=0)
+            return {'processed': len(stock_ids), 'failed': len(errors), 'signals_generated': 0}
+
+        logger.warning(f"Strategy sync {sync_log_id} chunk failed ({str(e)}), retrying per stock")
+        for stock in stocks:
+            try:
+                with transaction.atomic():
+                    signals_generated += StrategyEngine.sync_stocks([stock], strategy_code, mode, start_date, end_date)
+            except Exception as e:
+                errors.append({
+                    'stock': stock.symbol,
+                    'error': str(e)
+                })
+                logger.error(f"Failed to sync strategies for {stock.symbol}: {str(e)}")
+
+    record_sync_progress(sync_log_id, len(stocks) - len(errors), errors, signals_generated=signals_generated)
+    return {'processed': len(stocks), 'failed': len(errors), 'signals_generated': signals_generated}
+
+
+@shared_task
+def finish_strategy_sync_task(results: list, sync_log_id: int):
+    """Chord callback: close the SyncLog of a strategy sync job."""
+    SyncLog.objects.filter(id=sync_log_id).update(end_time=timezone.now())
+    update_sync_extra(sync_log_id, status='completed')
+    logger.info(f"Strategy sync {sync_log_id} completed ({len(results)} chunks)")
+
+
+@shared_task
+def fail_strategy_sync_task(request, exc, traceback, sync_log_id: int):
+    """Chord error callback: a chunk or the callback raised, close the SyncLog as failed."""
+    logger.error(f"Strategy sync {sync_log_id} failed: {str(exc)}")
+    fail_sync_log(sync_log_id, exc)
+
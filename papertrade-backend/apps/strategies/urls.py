@@ -10,4 +10,5 @@ router.register(r'rule-based', views.StrategyRuleBasedViewSet, basename='strateg
 urlpatterns = [
     path('', include(router.urls)),
     path('sync/', views.SyncStrategiesView.as_view(), name='strategy-sync'),
+    path('sync/status/<str:task_id>/', views.SyncStrategiesStatusView.as_view(), name='strategy-sync-status'),
 ]
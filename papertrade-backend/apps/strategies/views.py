@@ -5,6 +5,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from apps.users.utils import get_success_response, get_error_response
 from django.db import models
+from django.urls import reverse
+from django.utils import timezone
 from .models import StrategyMaster, StrategyRuleBased, StrategySignal
 from .serializers import StrategyMasterSerializer, StrategyRuleBasedSerializer, StrategySignalSerializer
 from .logic import StrategyEngine
@@ -311,8 +313,11 @@ class SyncStrategiesView(APIView):
             "type": "stock" | "sector",
             "id": <id>,
             "strategy": <code>,
+            "all_strategies": true (instead of strategy: every active strategy in one pass),
             "mode": "normal" | "hard"
         }
+        Bulk syncs (all_stocks / symbols) run as a background job and
+        return 202 with a task_id to poll at sync/status/<task_id>/.
         """
         sync_type = request.data.get('type')
         target_id = request.data.get('id')
@@ -324,12 +329,13 @@ class SyncStrategiesView(APIView):
         # New optional fields for bulk sync
         all_stocks = request.data.get('all_stocks')
         symbols = request.data.get('symbols') # List of strings
+        all_strategies = request.data.get('all_strategies')
         
-        if not strategy_code:
-             return get_error_response('Missing required field: strategy')
+        if not strategy_code and not all_strategies:
+             return get_error_response(code='MISSING_FIELD', message='Missing required field: strategy')
              
         if not any([target_id, all_stocks, symbols]) and sync_type == 'stock':
-             return get_error_response('Must provide id, symbols list, or all_stocks=true')
+             return get_error_response(code='MISSING_FIELD', message='Must provide id, symbols list, or all_stocks=true')
 
         from apps.stocks.models import Stock
         
@@ -344,25 +350,111 @@ class SyncStrategiesView(APIView):
                     stock = Stock.objects.get(id=target_id)
                     stocks_to_sync.append(stock)
                 except Stock.DoesNotExist:
-                    return get_error_response('Stock not found')
+                    return get_error_response(code='NOT_FOUND', message='Stock not found', status_code=status.HTTP_404_NOT_FOUND)
         elif sync_type == 'sector':
             # Implement sector logic later if needed
-            return get_error_response('Sector sync not yet implemented')
+            return get_error_response(
+                code='NOT_IMPLEMENTED',
+                message='Sector sync not yet implemented',
+                status_code=status.HTTP_501_NOT_IMPLEMENTED
+            )
             
-        count = 0
-        for stock in stocks_to_sync:
-            result = StrategyEngine.run_strategy(
-                stock, 
-                strategy_code, 
-                mode, 
-                start_date=start_date, 
-                end_date=end_date
+        if all_stocks or symbols:
+            # Bulk sync runs as a background job; poll SyncStrategiesStatusView
+            return self.start_job(request, stocks_to_sync, None if all_strategies else strategy_code,
+                                  mode, start_date, end_date)
+
+        if all_strategies:
+            # Batch mode: prices loaded once per stock for all active strategies
+            counts = StrategyEngine.run_strategies(
+                stocks_to_sync, mode=mode, start_date=start_date, end_date=end_date
             )
-            if result:
-                count += result
-                
+            return get_success_response({
+                'signals_generated': sum(counts.values()),
+                'strategies': counts,
+            })
+
+        count = StrategyEngine.sync_stocks(stocks_to_sync, strategy_code, mode, start_date, end_date)
         return get_success_response({'signals_generated': count})
 
+    @staticmethod
+    def start_job(request, stocks, strategy_code, mode, start_date, end_date):
+        """Queue a chunked strategy sync job with a SyncLog for its progress."""
+        import uuid
+        from apps.users.models import User
+        from apps.sync.models import SyncLog
+        from .tasks import sync_strategies_task
+
+        # Determine user_id to log (SyncLog requires regular User or None)
+        user_id_log = request.user.id if isinstance(request.user, User) else None
+        task_id = str(uuid.uuid4())
+        sync_log = SyncLog.objects.create(
+            sync_type='strategy',
+            mode='hard' if mode == 'hard' else 'normal',
+            triggered_by_user_id=user_id_log,
+            start_time=timezone.now(),
+            total_items=len(stocks),
+            extra={
+                'task_id': task_id,
+                'status': 'queued',
+                'strategy': strategy_code or 'ALL',
+                'processed': 0,
+                'signals_generated': 0,
+            },
+        )
+        sync_strategies_task.apply_async(
+            args=[sync_log.id, [stock.id for stock in stocks], strategy_code, mode, start_date, end_date],
+            task_id=task_id,
+        )
+
+        return get_success_response({
+                'task_id': task_id,
+                'sync_log_id': sync_log.id,
+                'status_url': reverse('strategy-sync-status', args=[task_id]),
+                'message': 'Strategy sync started'
+            },
+            status_code=status.HTTP_202_ACCEPTED
+        )
+
+
+class SyncStrategiesStatusView(APIView):
+    """Progress of a strategy sync job by task id."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, task_id):
+        from apps.sync.models import SyncLog
+
+        sync_log = SyncLog.objects.filter(sync_type='strategy', extra__task_id=task_id).first()
+        if sync_log is None:
+            return get_error_response(
+                code='NOT_FOUND',
+                message='Strategy sync job not found',
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+
+        extra = sync_log.extra
+        processed = extra.get('processed', 0)
+        if sync_log.total_items:
+            progress = round(processed * 100 / sync_log.total_items, 1)
+        else:
+            progress = 100.0 if extra.get('status') == 'completed' else 0.0
+
+        return get_success_response({
+            'task_id': task_id,
+            'sync_log_id': sync_log.id,
+            'status': extra.get('status'),
+            'strategy': extra.get('strategy'),
+            'total_items': sync_log.total_items,
+            'processed': processed,
+            'progress': progress,
+            'success_count': sync_log.success_count,
+            'failed_count': sync_log.failed_count,
+            'signals_generated': extra.get('signals_generated', 0),
+            'errors': sync_log.error_details.get('errors', []),
+            'start_time': sync_log.start_time,
+            'end_time': sync_log.end_time,
+        })
+
 
 class StrategyRuleBasedViewSet(viewsets.ModelViewSet):
     queryset = StrategyRuleBased.objects.all()
@@ -0,0 +1,140 @@
+"""
+Client for the Go data service.
+"""
+import json
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+
+class GoServiceError(Exception):
+    """A Go service request failed, or its stream ended before completing."""
+
+
+class GoDataClient:
+    """
+    Go data service client over one requests.Session (kept-alive connections).
+    The session pools at most `concurrency` connections per host and blocks
+    further requests until one is free, so a thread pool sharing the client
+    never exceeds that many in-flight requests to the service.
+
+    get_day calls the per-day endpoints. iter_range streams the batch range
+    endpoint (POST /batch/range): many symbols and a whole date range per
+    request, consumed line by line as the service produces it.
+    """
+
+    # Symbols per batch range request (the service accepts up to 100)
+    BATCH_SYMBOLS = 20
+    # Connect timeout, and read timeout between two streamed lines
+    TIMEOUT = 10
+    STREAM_TIMEOUT = 120
+
+    def __init__(self, base_url, api_secret, api_logger=None, session=None, concurrency=10):
+        self.base_url = base_url.rstrip('/')
+        self.api_logger = api_logger
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=concurrency, pool_block=True)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+        self.session.headers.update({'X-API-KEY': api_secret})
+
+    @classmethod
+    def from_config(cls, api_logger=None, concurrency=10):
+        """Client for the service URL and secret in SystemConfig (default: settings)."""
+        from apps.adminpanel.models import SystemConfig
+
+        url_config = SystemConfig.objects.filter(key='go_service_url').first()
+        secret_config = SystemConfig.objects.filter(key='internal_api_secret').first()
+        return cls(
+            url_config.value if url_config else settings.GO_SERVICE_URL,
+            secret_config.value if secret_config else settings.INTERNAL_API_SECRET,
+            api_logger=api_logger,
+            concurrency=concurrency,
+        )
+
+    def get_day(self, symbol, date, kind='stock', timewise=True):
+        """
+        Data of one symbol and day from /stock/data or /sector/data.
+        Returns None when the service has no data for the day (non-200).
+        """
+        url = f"{self.base_url}/{kind}/data"
+        params = {
+            'symbol': symbol,
+            'date': str(date),
+            'timewise': 'true' if timewise else 'false'
+        }
+        req_start = time.time()
+        try:
+            response = self.session.get(url, params=params, timeout=self.TIMEOUT)
+        except requests.RequestException as e:
+            self._log(url, params, 0, str(e), req_start, method='GET')
+            raise GoServiceError(f"Request failed: {str(e)}")
+
+        self._log(url, params, response.status_code, response.text, req_start, method='GET')
+        if response.status_code != 200:
+            return None
+        return response.json()['data']
+
+    def iter_range(self, symbols, from_date, to_date, kind='stock', timewise=True):
+        """
+        Yield the daily records of `symbols` over [from_date, to_date]
+        (ISO dates) as they stream in, BATCH_SYMBOLS symbols per request.
+        Records are the per-day payload plus 'symbol' and 'date'; a symbol
+        the service could not fetch yields {'symbol', 'error'} instead.
+        Raises GoServiceError if a request fails or its stream is cut short.
+        """
+        symbols = list(symbols)
+        for i in range(0, len(symbols), self.BATCH_SYMBOLS):
+            yield from self._stream_batch(symbols[i:i + self.BATCH_SYMBOLS], from_date, to_date, kind, timewise)
+
+    def _stream_batch(self, symbols, from_date, to_date, kind, timewise):
+        url = f"{self.base_url}/batch/range"
+        payload = {
+            'symbols': symbols,
+            'from_date': str(from_date),
+            'to_date': str(to_date),
+            'type': kind,
+            'timewise': timewise,
+        }
+        req_start = time.time()
+        summary = None
+        status_code = 0
+        try:
+            with self.session.post(url, json=payload, stream=True,
+                                   timeout=(self.TIMEOUT, self.STREAM_TIMEOUT)) as response:
+                status_code = response.status_code
+                if status_code != 200:
+                    raise GoServiceError(f"Batch range request failed ({status_code}): {response.text[:500]}")
+
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    record = json.loads(line)
+                    if 'status' in record:
+                        summary = record
+                        continue
+                    yield record
+        except requests.RequestException as e:
+            self._log(url, payload, status_code, str(e), req_start)
+            raise GoServiceError(f"Batch range request failed: {str(e)}")
+        except GoServiceError as e:
+            self._log(url, payload, status_code, str(e), req_start)
+            raise
+
+        self._log(url, payload, status_code, summary, req_start)
+        if summary is None:
+            raise GoServiceError('Batch range stream ended before its summary line')
+
+    def _log(self, url, payload, status_code, body, req_start, method='POST'):
+        if self.api_logger:
+            self.api_logger.log(
+                url=url,
+                method=method,
+                params=payload,
+                response_status=status_code,
+                response_body=body,
+                duration_ms=(time.time() - req_start) * 1000
+            )
@@ -0,0 +1,100 @@
+"""
+Concurrent fetch stage for price sync.
+
+Fetch jobs (HTTP calls to the Go service) run on a bounded thread pool and
+hand their rows to the calling thread through a bounded queue. The caller
+is the single DB writer: worker threads never touch the database, and a
+full queue blocks the fetchers until the writer catches up (backpressure).
+"""
+import queue
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of one job's rows
+_DONE = object()
+
+
+class ConcurrentFetcher:
+    """Runs fetch jobs `concurrency` at a time, buffering at most `queue_size` rows."""
+
+    DEFAULT_CONCURRENCY = 8
+    DEFAULT_QUEUE_SIZE = 2000
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, queue_size=DEFAULT_QUEUE_SIZE):
+        self.concurrency = max(1, concurrency)
+        self.queue_size = max(1, queue_size)
+
+    @classmethod
+    def from_config(cls, shares=1):
+        """
+        Fetcher sized by SystemConfig 'sync.fetch_concurrency' and 'sync.fetch_queue_size'.
+
+        'sync.fetch_concurrency' is the in-flight request budget of a whole
+        sync job. A job split into chunk tasks passes their count as
+        `shares`, and each fetcher gets budget // shares threads (at least
+        one), so the job stays within max(budget, shares) requests however
+        many chunks run at once.
+        """
+        from apps.adminpanel.models import SystemConfig
+
+        def int_config(key, default):
+            config = SystemConfig.objects.filter(key=key).first()
+            try:
+                return int(config.value) if config else default
+            except ValueError:
+                return default
+
+        return cls(
+            int_config('sync.fetch_concurrency', cls.DEFAULT_CONCURRENCY) // max(1, shares),
+            int_config('sync.fetch_queue_size', cls.DEFAULT_QUEUE_SIZE),
+        )
+
+    def run(self, jobs):
+        """
+        Run `jobs` ((key, job) pairs, job() returning an iterable of rows)
+        and yield (key, row, None) for each row as it arrives, or
+        (key, None, error) when a job raises. Rows of one job keep their order.
+        Closing the generator early stops the remaining jobs.
+        """
+        jobs = list(jobs)
+        rows = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+
+        def put(entry):
+            # Blocks while the writer is behind, unless the run was stopped
+            while not stop.is_set():
+                try:
+                    rows.put(entry, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def work(key, job):
+            try:
+                for row in job():
+                    if not put((key, row, None)):
+                        return
+            except Exception as e:
+                put((key, None, e))
+            finally:
+                put((key, _DONE, None))
+
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='sync-fetch')
+        try:
+            for key, job in jobs:
+                executor.submit(work, key, job)
+
+            pending = len(jobs)
+            while pending:
+                key, row, error = rows.get()
+                if row is _DONE:
+                    pending -= 1
+                    continue
+                yield key, row, error
+        finally:
+            stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0003_delete_marketstatus'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='synclog',
+            name='sync_type',
+            field=models.CharField(choices=[('stock', 'Stock'), ('sector', 'Sector'), ('option', 'Option'), ('strategy', 'Strategy')], max_length=20),
+        ),
+    ]
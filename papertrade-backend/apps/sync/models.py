@@ -9,6 +9,7 @@ class SyncLog(models.Model):
         ('stock', 'Stock'),
         ('sector', 'Sector'),
         ('option', 'Option'),
+        ('strategy', 'Strategy'),
     ]
     
     SYNC_MODE_CHOICES = [
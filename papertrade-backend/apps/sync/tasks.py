@@ -1,22 +1,30 @@
 """
 Celery tasks for sync operations.
 """
-from celery import shared_task
+from celery import shared_task, chord
 from django.utils import timezone
 from django.conf import settings
 from django.db import transaction
-import requests
 import logging
-import time
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
+from django.contrib.postgres.aggregates import ArrayAgg
 from .models import SyncLog
-from .utils import ExternalAPILogger
-from apps.stocks.models import Stock, StockPriceDaily, Stock5MinByDay
+from .utils import ExternalAPILogger, record_sync_progress, update_sync_extra, fail_sync_log
+from .client import GoDataClient
+from .fetcher import ConcurrentFetcher
+from .writer import PriceWriter
+from apps.stocks.models import Stock, StockPriceDaily
+from apps.stocks.indicators import IndicatorStore
+from apps.strategies.models import StrategyCheckpoint
 from apps.sectors.models import Sector
 from apps.common.market_schedule import MarketSchedule
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_FETCH_MODE = 'batch'
+DEFAULT_SYNC_CHUNK_SIZE = 50
+
 
 @shared_task
 def auto_sync_daily():
@@ -31,10 +39,15 @@ def auto_sync_daily():
     return "Sync tasks queued"
 
 
-@shared_task
-def sync_stocks_task(is_auto=False, user_id=None, from_date=None, to_date=None, instruments=None, sync_indices=None):
+@shared_task(bind=True)
+def sync_stocks_task(self, is_auto=False, user_id=None, from_date=None, to_date=None, instruments=None, sync_indices=None):
     """
     Sync stock data from Go service.
+
+    The stocks are split into chunks synced in parallel by
+    sync_stocks_chunk_task (a Celery chord); each chunk adds its counts to
+    the SyncLog, and finish_stock_sync_task closes it. Progress is kept
+    live in SyncLog.extra. When run eagerly (run_sync), chunks run inline.
     
     Args:
         is_auto: Whether this is an auto sync
@@ -44,10 +57,7 @@ def sync_stocks_task(is_auto=False, user_id=None, from_date=None, to_date=None,
         instruments: Optional list of stock symbols to sync
         sync_indices: If True, sync ONLY indices. If False, sync ONLY stocks. If None, sync ALL.
     """
-    from apps.adminpanel.models import SystemConfig
-
     start_time = timezone.now()
-    api_logger = ExternalAPILogger()
     
     # Determine sync type for logging
     log_sync_type = 'stock'
@@ -57,14 +67,15 @@ def sync_stocks_task(is_auto=False, user_id=None, from_date=None, to_date=None,
     # Create sync log
     sync_log = SyncLog.objects.create(
         sync_type=log_sync_type,
+        mode='hard' if from_date and to_date else 'normal',
         is_auto_sync=is_auto,
         triggered_by_user_id=user_id,
         start_time=start_time,
+        extra={'task_id': self.request.id, 'status': 'pending'},
     )
     
     try:
         # Get active stocks
-        print(f"DTO-DEBUG: Starting sync_stocks_task. Instruments: {instruments}, Sync Indices: {sync_indices}")
         query = Stock.objects.filter(status='active')
         
         if instruments:
@@ -72,212 +83,335 @@ def sync_stocks_task(is_auto=False, user_id=None, from_date=None, to_date=None,
             
         if sync_indices is not None:
             query = query.filter(is_index=sync_indices)
-            
-        stocks = query
-        total_items = stocks.count()
-        success_count = 0
-        failed_count = 0
-        errors = []
+
+        stock_ids = list(query.order_by('id').values_list('id', flat=True))
+        chunk_size = get_sync_chunk_size()
+        chunks = [stock_ids[i:i + chunk_size] for i in range(0, len(stock_ids), chunk_size)]
+        SyncLog.objects.filter(id=sync_log.id).update(total_items=len(stock_ids))
+        update_sync_extra(sync_log.id, status='running', chunks=len(chunks))
+
+        if self.request.is_eager or not chunks:
+            # Chunks run one after another here, each with the full fetch budget
+            results = [sync_stocks_chunk_task(sync_log.id, chunk, from_date, to_date) for chunk in chunks]
+            finish_stock_sync_task(results, sync_log.id)
+            return
+
+        chord(
+            sync_stocks_chunk_task.s(sync_log.id, chunk, from_date, to_date, parallel_chunks=len(chunks))
+            for chunk in chunks
+        )(finish_stock_sync_task.s(sync_log.id).on_error(
+            fail_stock_sync_task.s(sync_log.id)
+        ))
+
+        logger.info(f"Stock sync {sync_log.id} dispatched as {len(chunks)} chunks")
         
-        # Determine global settings
-        # Default Start Date
-        default_start_date_config = SystemConfig.objects.filter(key='sync.default_start_date').first()
-        default_start_date_str = default_start_date_config.value if default_start_date_config else '2020-01-01'
+    except Exception as e:
+        logger.error(f"Stock sync task failed: {str(e)}")
+        fail_sync_log(sync_log.id, e)
+
+
+@shared_task
+def sync_stocks_chunk_task(sync_log_id: int, stock_ids: list, from_date=None, to_date=None,
+                           parallel_chunks: int = 1):
+    """
+    Sync one chunk of stocks and add its counts to the SyncLog.
+    If the chunk fails as a whole, all its stocks are counted as failed.
+    parallel_chunks is the number of chunks of the job that may run at
+    once; they share the job's fetch concurrency budget.
+    """
+    stocks = []
+    try:
+        stocks = list(Stock.objects.filter(id__in=stock_ids).order_by('id'))
+        success_count, errors, days_saved = _sync_stocks(stocks, from_date, to_date, parallel_chunks)
+    except Exception as e:
+        logger.error(f"Stock sync {sync_log_id} chunk failed: {str(e)}")
+        success_count, days_saved = 0, 0
+        symbols = [stock.symbol for stock in stocks] if stocks else stock_ids
+        errors = [{'stock': symbol, 'error': str(e)} for symbol in symbols]
+
+    record_sync_progress(sync_log_id, success_count, errors, days_saved=days_saved)
+    return {'processed': len(stocks), 'failed': len(errors), 'days_saved': days_saved}
+
+
+@shared_task
+def finish_stock_sync_task(results: list, sync_log_id: int):
+    """Chord callback: close the SyncLog of a stock sync."""
+    SyncLog.objects.filter(id=sync_log_id).update(end_time=timezone.now())
+    update_sync_extra(sync_log_id, status='completed')
+    sync_log = SyncLog.objects.get(id=sync_log_id)
+    logger.info(f"Stock sync completed: {sync_log.success_count}/{sync_log.total_items} successful")
+
+
+@shared_task
+def fail_stock_sync_task(request, exc, traceback, sync_log_id: int):
+    """Chord error callback: a chunk or the callback raised, close the SyncLog as failed."""
+    logger.error(f"Stock sync {sync_log_id} failed: {str(exc)}")
+    fail_sync_log(sync_log_id, exc)
+
+
+def get_sync_chunk_size():
+    """Stocks per sync chunk task (SystemConfig 'sync.chunk_size')."""
+    from apps.adminpanel.models import SystemConfig
+    config = SystemConfig.objects.filter(key='sync.chunk_size').first()
+    try:
+        return max(1, int(config.value)) if config else DEFAULT_SYNC_CHUNK_SIZE
+    except ValueError:
+        return DEFAULT_SYNC_CHUNK_SIZE
+
+
+def _sync_stocks(stocks, from_date=None, to_date=None, parallel_chunks=1):
+    """
+    Fetch and save prices of `stocks`, then refresh their indicators.
+    The fetch concurrency is this chunk's share of the job's budget
+    (see ConcurrentFetcher.from_config).
+    Returns (success_count, errors, days_saved).
+    """
+    from apps.adminpanel.models import SystemConfig
+
+    api_logger = ExternalAPILogger()
+    errors = []
+    success_count = 0
+    days_saved = 0
+
+    # Determine global settings
+    # Default Start Date
+    default_start_date_config = SystemConfig.objects.filter(key='sync.default_start_date').first()
+    default_start_date_str = default_start_date_config.value if default_start_date_config else '2020-01-01'
+    try:
+        global_default_start = datetime.strptime(default_start_date_str, '%Y-%m-%d').date()
+    except ValueError:
+        global_default_start = datetime(2020, 1, 1).date()
+
+    # Go Service URL
+    go_service_url_config = SystemConfig.objects.filter(key='go_service_url').first()
+    go_service_base_url = go_service_url_config.value if go_service_url_config else settings.GO_SERVICE_URL
+    go_service_base_url = go_service_base_url.rstrip('/')
+    
+    # Internal API Secret
+    internal_api_secret_config = SystemConfig.objects.filter(key='internal_api_secret').first()
+    internal_api_secret = internal_api_secret_config.value if internal_api_secret_config else settings.INTERNAL_API_SECRET
+
+    today = timezone.now().date()
+
+    # Determine date range per stock
+    plans = []
+    for stock in stocks:
+        if from_date and to_date:
+            # Hard sync - process all stocks
+            stock_start_date = datetime.strptime(from_date, '%Y-%m-%d').date()
+            end_date = datetime.strptime(to_date, '%Y-%m-%d').date()
+        else:
+            # Normal sync - incremental
+            end_date = today
+            if stock.last_synced_at:
+                stock_start_date = stock.last_synced_at.date()
+            else:
+                stock_start_date = global_default_start
+
+        # Clamp end_date to today to prevent future data from Go service
+        plans.append((stock, stock_start_date, min(end_date, today)))
+
+    if not (from_date and to_date):
+        # Incremental sync fetches only the trading days not stored yet
+        plans = _missing_ranges(plans)
+
+    # Fetch concurrently, save in this task (the single DB writer)
+    fetcher = ConcurrentFetcher.from_config(shares=parallel_chunks)
+    writer = PriceWriter.from_config()
+    client = GoDataClient(
+        go_service_base_url, internal_api_secret, api_logger=api_logger, concurrency=fetcher.concurrency
+    )
+    if get_fetch_mode() == 'daily':
+        results = _sync_stocks_daily(plans, client, fetcher, writer)
+    else:
+        results = _sync_stocks_batched(plans, client, fetcher, writer)
+
+    for stock in stocks:
+        result = results.get(stock.id) or _new_result()
+        days_saved += result['saved']
         try:
-            global_default_start = datetime.strptime(default_start_date_str, '%Y-%m-%d').date()
-        except ValueError:
-            global_default_start = datetime(2020, 1, 1).date()
-
-        # Go Service URL
-        go_service_url_config = SystemConfig.objects.filter(key='go_service_url').first()
-        go_service_base_url = go_service_url_config.value if go_service_url_config else settings.GO_SERVICE_URL
-        go_service_base_url = go_service_base_url.rstrip('/')
-        
-        # Internal API Secret
-        internal_api_secret_config = SystemConfig.objects.filter(key='internal_api_secret').first()
-        internal_api_secret = internal_api_secret_config.value if internal_api_secret_config else settings.INTERNAL_API_SECRET
-
-        # Initialize variables
-        end_date = timezone.now().date()
-        total_items = stocks.count()
-        success_count = 0
-        failed_count = 0
-        
-        # Sync each stock
-        for stock in stocks:
-            try:
-                # Determine date range
-                if from_date and to_date:
-                    # Hard sync - process all stocks
-                    stock_start_date = datetime.strptime(from_date, '%Y-%m-%d').date()
-                    end_date = datetime.strptime(to_date, '%Y-%m-%d').date()
-                else:
-                    # Normal sync - incremental
-                    end_date = timezone.now().date()
-                    
-                    if stock.last_synced_at:
-                        stock_start_date = stock.last_synced_at.date()
-                    else:
-                        stock_start_date = global_default_start
-                
-                # Clamp end_date to today to prevent future data from Go service
-                today = timezone.now().date()
-                if end_date > today:
-                    end_date = today
-                
-                # Sync date range
-                saved_records_count = 0  # Track if we saved any data
-                current_date = stock_start_date
-                while current_date <= end_date:
-                    # Check Market Status (File-Based)
-                    is_open, reason = MarketSchedule.is_market_open(current_date)
-                    if not is_open:
-                        logger.info(f"Skipping {stock.symbol} for {current_date}: Market Closed ({reason})")
-                        current_date += timedelta(days=1)
-                        continue
-
-                    try:
-                        req_start = time.time()
-                        # ... (Rest of existing logic)
-                        if getattr(stock, 'is_index', False):
-                            url = f"{go_service_base_url}/sector/data"
-                            params = {
-                                'symbol': stock.symbol,
-                                'date': current_date.isoformat(),
-                                'timewise': 'false'
-                            }
-                        else:
-                            url = f"{go_service_base_url}/stock/data"
-                            params = {
-                                'symbol': stock.symbol,
-                                'date': current_date.isoformat(),
-                                'timewise': 'true'
-                            }
-                        
-                        try:
-                            # Call Go service
-                            response = requests.get(
-                                url,
-                                params=params,
-                                headers={
-                                    'X-API-KEY': internal_api_secret
-                                },
-                                timeout=10
-                            )
-                            duration = (time.time() - req_start) * 1000
-                            
-                            # Log request
-                            api_logger.log(
-                                url=url,
-                                method='GET',
-                                params=params,
-                                response_status=response.status_code,
-                                response_body=response.text,
-                                duration_ms=duration
-                            )
-                        except Exception as e:
-                            duration = (time.time() - req_start) * 1000
-                            api_logger.log(
-                                url=url,
-                                method='GET',
-                                params=params,
-                                response_status=0,
-                                response_body=str(e),
-                                duration_ms=duration
-                            )
-                            raise e
-                        
-                        if response.status_code == 200:
-                            data = response.json()['data']
-                            
-                            print(f"DTO-DEBUG: Got data for {stock.symbol} on {current_date}")
-                            
-                            # Save daily price
-                            try:
-                                obj, created = StockPriceDaily.objects.update_or_create(
-                                    stock=stock,
-                                    date=current_date,
-                                    defaults={
-                                        'open_price': data['open_price'],
-                                        'high_price': data['high_price'],
-                                        'low_price': data['low_price'],
-                                        'close_price': data['close_price'],
-                                        'volume': data['volume'],
-                                        'iv': data.get('iv'),
-                                        'extra': data.get('extra', {}),
-                                    }
-                                )
-                                saved_records_count += 1  # Increment counter on successful save
-                            except Exception as save_err:
-                                raise save_err
-                            
-                            # Save 5-min candles if available
-                            if data.get('timewise'):
-                                candles_json = {
-                                    candle['time']: {
-                                        'open': candle['open_price'],
-                                        'high': candle['high_price'],
-                                        'low': candle['low_price'],
-                                        'close': candle['close_price'],
-                                        'volume': candle['volume'],
-                                    }
-                                    for candle in data['timewise']
-                                }
-                                
-                                Stock5MinByDay.objects.update_or_create(
-                                    stock=stock,
-                                    date=current_date,
-                                    defaults={
-                                        'candles_json': candles_json,
-                                    }
-                                )
-                        
-                        else:
-                            # No data for this date - might be market closed
-                            pass
-                    
-                    except Exception as e:
-                        logger.warning(f"Failed to sync {stock.symbol} for {current_date}: {str(e)}")
-                    
-                    current_date += timedelta(days=1)
-                
-                # ONLY update last_synced_at if we saved at least one record
-                if saved_records_count > 0:
+            # ONLY update last_synced_at if the stock synced and saved at least one record
+            if result['saved'] > 0:
+                if result['error'] is None:
                     stock.last_synced_at = timezone.now()
                     stock.save()
-                
-                
-                success_count += 1
-                
-            except Exception as e:
-                failed_count += 1
-                errors.append({
-                    'stock': stock.symbol,
-                    'error': str(e)
-                })
-                logger.error(f"Failed to sync stock {stock.symbol}: {str(e)}")
-        
-        
-        # Update sync log
-        sync_log.end_time = timezone.now()
-        sync_log.total_items = total_items
-        sync_log.success_count = success_count
-        sync_log.failed_count = failed_count
-        sync_log.error_details = {'errors': errors}
-        sync_log.save()
-        
-        logger.info(f"Stock sync completed: {success_count}/{total_items} successful")
-        
-    except Exception as e:
-        logger.error(f"Stock sync task failed: {str(e)}")
-        sync_log.error_details = {'error': str(e)}
-        sync_log.save()
+
+                # Recompute stored indicators from the first new/changed date only
+                IndicatorStore.update(stock.id, from_date=result['first_saved_date'])
+                # Streaming checkpoints past a rewritten bar are stale
+                StrategyCheckpoint.objects.filter(stock=stock, last_date__gte=result['first_saved_date']).delete()
+
+            if result['error'] is not None:
+                raise Exception(result['error'])
+
+            success_count += 1
+
+        except Exception as e:
+            errors.append({
+                'stock': stock.symbol,
+                'error': str(e)
+            })
+            logger.error(f"Failed to sync stock {stock.symbol}: {str(e)}")
+
+    return success_count, errors, days_saved
+
+
+def get_fetch_mode():
+    """
+    How sync_stocks_task fetches prices (SystemConfig 'sync.fetch_mode'):
+    'batch' streams whole date ranges of many symbols per request,
+    'daily' requests one symbol and day at a time.
+    """
+    from apps.adminpanel.models import SystemConfig
+    config = SystemConfig.objects.filter(key='sync.fetch_mode').first()
+    mode = config.value.strip().lower() if config else DEFAULT_FETCH_MODE
+    return mode if mode in ('batch', 'daily') else DEFAULT_FETCH_MODE
+
+
+def _new_result():
+    return {'saved': 0, 'first_saved_date': None, 'error': None}
+
+
+def _missing_ranges(plans):
+    """
+    Gap detection for incremental sync. Splits each (stock, start, end) plan
+    into runs of expected trading days (weekdays minus the holiday fixtures)
+    that have no stored StockPriceDaily row, using one grouped query for the
+    dates already stored. The start day (last sync) is always refetched, as
+    its bar may have been stored mid-session.
+    """
+    if not plans:
+        return []
+
+    first_date = min(start for _, start, _ in plans)
+    last_date = max(end for _, _, end in plans)
+    stored = dict(
+        StockPriceDaily.objects.filter(
+            stock_id__in=[stock.id for stock, _, _ in plans],
+            date__range=(first_date, last_date),
+        ).order_by().values('stock_id').annotate(dates=ArrayAgg('date')).values_list('stock_id', 'dates')
+    )
+    trading_days = MarketSchedule.trading_days(first_date, last_date)
+
+    ranges = []
+    for stock, start, end in plans:
+        have = set(stored.get(stock.id, ()))
+        run = None
+        for day in trading_days[bisect_left(trading_days, start):bisect_right(trading_days, end)]:
+            if day == start or day not in have:
+                run = (run[0] if run else day, day)
+            elif run:
+                ranges.append((stock, *run))
+                run = None
+        if run:
+            ranges.append((stock, *run))
+    return ranges
 
 
+def _sync_stocks_batched(plans, client, fetcher, writer):
+    """
+    Fetch (stock, start, end) plans through the batch range endpoint.
+    Stocks sharing a type and date range are requested together, one
+    streamed request per BATCH_SYMBOLS symbols, run concurrently by the
+    fetcher; rows go to the writer here, in the calling thread, as they arrive.
+    Returns {stock_id: {'saved', 'first_saved_date', 'error'}}.
+    """
+    results = {stock.id: _new_result() for stock, _, _ in plans}
+
+    groups = {}
+    for stock, start, end in plans:
+        if start <= end:
+            groups.setdefault((stock.is_index, start, end), []).append(stock)
+
+    batches = []
+    for (is_index, start, end), group in groups.items():
+        for i in range(0, len(group), client.BATCH_SYMBOLS):
+            batches.append(({stock.symbol: stock for stock in group[i:i + client.BATCH_SYMBOLS]}, is_index, start, end))
+
+    def job(by_symbol, is_index, start, end):
+        return lambda: client.iter_range(
+            list(by_symbol), start.isoformat(), end.isoformat(),
+            kind='sector' if is_index else 'stock',
+            timewise=not is_index,
+        )
 
+    rows = fetcher.run((index, job(*batch)) for index, batch in enumerate(batches))
+    for index, record, error in rows:
+        by_symbol, _, start, end = batches[index]
+        if error is not None:
+            logger.error(f"Batch range sync {start} - {end} failed: {str(error)}")
+            for stock in by_symbol.values():
+                if results[stock.id]['error'] is None:
+                    results[stock.id]['error'] = str(error)
+            continue
 
+        stock = by_symbol.get(record.get('symbol'))
+        if stock is None:
+            continue
+        result = results[stock.id]
+        if 'error' in record:
+            result['error'] = record['error']
+            continue
 
+        current_date = datetime.strptime(record['date'], '%Y-%m-%d').date()
+        # Check Market Status (File-Based)
+        is_open, reason = MarketSchedule.is_market_open(current_date)
+        if not is_open:
+            logger.info(f"Skipping {stock.symbol} for {current_date}: Market Closed ({reason})")
+            continue
+
+        try:
+            writer.add(stock, current_date, record, result)
+        except Exception as e:
+            logger.warning(f"Failed to sync {stock.symbol} for {current_date}: {str(e)}")
+
+    writer.flush()
+    return results
+
+
+def _sync_stocks_daily(plans, client, fetcher, writer):
+    """
+    Fetch (stock, start, end) plans one stock and day per request (per-day
+    endpoints), run concurrently by the fetcher; rows go to the writer here.
+    Returns {stock_id: {'saved', 'first_saved_date', 'error'}}.
+    """
+    results = {stock.id: _new_result() for stock, _, _ in plans}
+
+    days = []
+    for stock, start, end in plans:
+        current_date = start
+        while current_date <= end:
+            # Check Market Status (File-Based)
+            is_open, reason = MarketSchedule.is_market_open(current_date)
+            if is_open:
+                days.append((stock, current_date))
+            else:
+                logger.info(f"Skipping {stock.symbol} for {current_date}: Market Closed ({reason})")
+            current_date += timedelta(days=1)
+
+    def job(stock, current_date):
+        def fetch():
+            is_index = getattr(stock, 'is_index', False)
+            data = client.get_day(
+                stock.symbol, current_date.isoformat(),
+                kind='sector' if is_index else 'stock',
+                timewise=not is_index,
+            )
+            # No data for this date - might be market closed
+            return [data] if data else []
+        return fetch
+
+    for index, data, error in fetcher.run((index, job(*day)) for index, day in enumerate(days)):
+        stock, current_date = days[index]
+        try:
+            if error is not None:
+                raise error
+            writer.add(stock, current_date, data, results[stock.id])
+        except Exception as e:
+            logger.warning(f"Failed to sync {stock.symbol} for {current_date}: {str(e)}")
 
+    writer.flush()
+    return results
 
 
 @shared_task
@@ -3,6 +3,9 @@ import json
 import logging
 from datetime import datetime, timedelta
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import SyncLog
 
 class ExternalAPILogger:
     """
@@ -79,3 +82,40 @@ class ExternalAPILogger:
                 continue # Skip files that don't match the date format
             except Exception as e:
                 logging.error(f"Error cleaning up old log {filename}: {e}")
+
+
+def record_sync_progress(sync_log_id, success_count, errors, **counters):
+    """
+    Add one chunk's counts to a SyncLog (row-locked: chunks finish concurrently).
+    Keeps processed/chunks_done and any extra `counters` running in SyncLog.extra.
+    """
+    with transaction.atomic():
+        sync_log = SyncLog.objects.select_for_update().get(id=sync_log_id)
+        sync_log.success_count += success_count
+        sync_log.failed_count += len(errors)
+        if errors:
+            sync_log.error_details = {'errors': sync_log.error_details.get('errors', []) + errors}
+        extra = sync_log.extra
+        extra['processed'] = extra.get('processed', 0) + success_count + len(errors)
+        extra['chunks_done'] = extra.get('chunks_done', 0) + 1
+        for key, value in counters.items():
+            extra[key] = extra.get(key, 0) + value
+        sync_log.save(update_fields=['success_count', 'failed_count', 'error_details', 'extra'])
+
+
+def update_sync_extra(sync_log_id, **values):
+    """Set keys of a SyncLog's extra (row-locked)."""
+    with transaction.atomic():
+        sync_log = SyncLog.objects.select_for_update().get(id=sync_log_id)
+        sync_log.extra.update(values)
+        sync_log.save(update_fields=['extra'])
+
+
+def fail_sync_log(sync_log_id, error):
+    """Close a SyncLog as failed (status in extra, end_time, error)."""
+    with transaction.atomic():
+        sync_log = SyncLog.objects.select_for_update().get(id=sync_log_id)
+        sync_log.end_time = timezone.now()
+        sync_log.error_details = {**sync_log.error_details, 'error': str(error)}
+        sync_log.extra['status'] = 'failed'
+        sync_log.save(update_fields=['end_time', 'error_details', 'extra'])
@@ -0,0 +1,125 @@
+"""
+Buffered ingestion of synced price data.
+"""
+import logging
+from django.db import transaction
+from apps.stocks.models import StockPriceDaily, Stock5MinByDay
+
+logger = logging.getLogger(__name__)
+
+DAILY_UPDATE_FIELDS = [
+    'open_price', 'high_price', 'low_price', 'close_price', 'volume', 'iv', 'extra', 'updated_at',
+]
+CANDLE_UPDATE_FIELDS = ['candles_json', 'updated_at']
+
+
+class PriceWriter:
+    """
+    Buffers synced days (daily price plus 5-min candles) and upserts them
+    with bulk_create(update_conflicts=True), one transaction per
+    `batch_size` days.
+
+    updated_at is in the update fields, so rewritten rows move the
+    backtest cache's price-data version like update_or_create did.
+    A day counts as saved (in the result dict passed to add) once its
+    batch is committed.
+    """
+
+    DEFAULT_BATCH_SIZE = 1000
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = max(1, batch_size)
+        self._days = {}
+
+    @classmethod
+    def from_config(cls):
+        """Writer sized by SystemConfig 'sync.write_batch_size'."""
+        from apps.adminpanel.models import SystemConfig
+        config = SystemConfig.objects.filter(key='sync.write_batch_size').first()
+        try:
+            return cls(int(config.value) if config else cls.DEFAULT_BATCH_SIZE)
+        except ValueError:
+            return cls()
+
+    def add(self, stock, date, data, result):
+        """Queue one day of a stock; flushes when the buffer is full."""
+        price = StockPriceDaily(
+            stock=stock,
+            date=date,
+            open_price=data['open_price'],
+            high_price=data['high_price'],
+            low_price=data['low_price'],
+            close_price=data['close_price'],
+            volume=data['volume'],
+            iv=data.get('iv'),
+            extra=data.get('extra', {}),
+        )
+
+        # 5-min candles if available
+        candles = None
+        if data.get('timewise'):
+            candles = Stock5MinByDay(
+                stock=stock,
+                date=date,
+                candles_json={
+                    candle['time']: {
+                        'open': candle['open_price'],
+                        'high': candle['high_price'],
+                        'low': candle['low_price'],
+                        'close': candle['close_price'],
+                        'volume': candle['volume'],
+                    }
+                    for candle in data['timewise']
+                },
+            )
+
+        # A later copy of the same day replaces the buffered one
+        # (one upsert statement cannot touch a row twice)
+        self._days[(stock.id, date)] = (price, candles, result)
+        if len(self._days) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered days. If the batch fails, days are retried one by one."""
+        days = list(self._days.values())
+        self._days = {}
+        if not days:
+            return
+
+        try:
+            with transaction.atomic():
+                self._write(days)
+            saved = days
+        except Exception as e:
+            logger.warning(f"Bulk write of {len(days)} days failed ({str(e)}), writing them one by one")
+            saved = []
+            for day in days:
+                try:
+                    with transaction.atomic():
+                        self._write([day])
+                    saved.append(day)
+                except Exception as e:
+                    price = day[0]
+                    logger.warning(f"Failed to sync {price.stock.symbol} for {price.date}: {str(e)}")
+
+        for price, _, result in saved:
+            result['saved'] += 1
+            if result['first_saved_date'] is None or price.date < result['first_saved_date']:
+                result['first_saved_date'] = price.date
+
+    @staticmethod
+    def _write(days):
+        StockPriceDaily.objects.bulk_create(
+            [price for price, _, _ in days],
+            update_conflicts=True,
+            unique_fields=['stock', 'date'],
+            update_fields=DAILY_UPDATE_FIELDS,
+        )
+        candles = [candles for _, candles, _ in days if candles is not None]
+        if candles:
+            Stock5MinByDay.objects.bulk_create(
+                candles,
+                update_conflicts=True,
+                unique_fields=['stock', 'date'],
+                update_fields=CANDLE_UPDATE_FIELDS,
+            )
@@ -18,15 +18,7 @@ export default function BacktestDetailPage() {
             router.replace('/strategies');
         }
     }, [id, router]);
-    // WAIT: Top 5 logic needs ALL trades. If we paginate server side, we can't calculate top 5 client side easily unless we fetch all summary or just keep fetching all for stats but paginate table?
-    // User asked to paginate based on backend. 
-    // Let's assume Top 5 can be calculated from the full list or maybe we should fetch full list for stats in background?
-    // Actually, "list_of_trades_json" is still in the "getRunById" response (unless we defer it). 
-    // The current "getRunById" returns the full object including the JSON.
-    // So we HAVE the full data. The user specifically asked "it should return based on backend".
-    // This implies we should NOT rely on the full blob in getRunById for the table.
-    // BUT we might still get it for now.
-    // Ideally, we should use the new endpoint for the table.
+    // Top 5 comes from run.top_stocks; the table uses the paginated results endpoint.
 
     const [predictions, setPredictions] = useState<any[]>([]);
     const [pagination, setPagination] = useState({ page: 1, total_pages: 1, total_count: 0 });
@@ -49,9 +41,6 @@ export default function BacktestDetailPage() {
         try {
             const res = await backtestAPI.getRunById(Number(id));
             setRun(res.data.data);
-            // Calculate Top 5 from the full data if available, or we need a stats endpoint.
-            // For now, let's assume getRunById still returns the big blob and we calculate Top 5 from it,
-            // BUT we render the table using the paginated endpoint to satisfy the "backend logic" requirement.
         } catch (err) {
             console.error("Failed to load backtest data", err);
         }
@@ -80,26 +69,10 @@ export default function BacktestDetailPage() {
         setTableLoading(false);
     }
 
-    // Top 5 Logic (Computed from the main run object which still has the full list for now)
+    // Top 5 Logic (aggregated by the backend from the stored results)
     const topStocks = useMemo(() => {
-        if (!run || !run.list_of_trades_json) return [];
-        // Helper to calc stats from full list...
-        const stats: Record<string, { wins: number, total: number }> = {};
-        run.list_of_trades_json.forEach((trade: any) => {
-            const sym = trade.stock_symbol;
-            if (!stats[sym]) stats[sym] = { wins: 0, total: 0 };
-            stats[sym].total += 1;
-            if (trade.result === 'WIN') stats[sym].wins += 1;
-        });
-        return Object.entries(stats)
-            .map(([symbol, data]) => ({
-                symbol,
-                wins: data.wins,
-                total: data.total,
-                rate: (data.wins / data.total) * 100
-            }))
-            .sort((a, b) => b.rate - a.rate || b.wins - a.wins)
-            .slice(0, 5);
+        if (!run || !run.top_stocks) return [];
+        return run.top_stocks as { symbol: string, wins: number, total: number, rate: number }[];
     }, [run]);
 
     // Handle Page Change